@@ -0,0 +1,28 @@
+"""index sessions by user and time
+
+Revision ID: 4f2a9c1d7b3e
+Revises: c978de915b17
+Create Date: 2026-10-18 10:12:41.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2a9c1d7b3e'
+down_revision: Union[str, Sequence[str], None] = 'c978de915b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_sessions_user_id_created_at', 'sessions', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_sessions_user_id_created_at', table_name='sessions')
@@ -0,0 +1,48 @@
+"""add progress rollup columns
+
+Revision ID: 9b1e7d3c5a20
+Revises: 4f2a9c1d7b3e
+Create Date: 2026-10-18 11:02:17.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e7d3c5a20'
+down_revision: Union[str, Sequence[str], None] = '4f2a9c1d7b3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('progress', sa.Column('total_sessions', sa.Integer(), nullable=True))
+    op.add_column('progress', sa.Column('xp', sa.Integer(), nullable=True))
+    op.add_column('progress', sa.Column('avg_grammar_score', sa.Float(), nullable=True))
+    op.add_column('progress', sa.Column('avg_tone_score', sa.Float(), nullable=True))
+    op.add_column('progress', sa.Column('avg_fluency_score', sa.Float(), nullable=True))
+
+    # Existing rows start from the session log; the logged sessions carry no per-skill
+    # scores, so the averages stay NULL until each user's next session seeds them
+    if sa.inspect(op.get_bind()).has_table('sessions'):
+        op.execute("""
+            UPDATE progress SET
+                total_sessions = (SELECT COUNT(*) FROM sessions WHERE sessions.user_id = progress.user_id),
+                xp = (SELECT COALESCE(SUM(xp_earned), 0) FROM sessions WHERE sessions.user_id = progress.user_id)
+        """)
+    else:
+        op.execute("UPDATE progress SET total_sessions = 0, xp = 0")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('progress') as batch_op:
+        batch_op.drop_column('avg_fluency_score')
+        batch_op.drop_column('avg_tone_score')
+        batch_op.drop_column('avg_grammar_score')
+        batch_op.drop_column('xp')
+        batch_op.drop_column('total_sessions')
@@ -0,0 +1,168 @@
+"""unify session log and progress tables
+
+Revision ID: d41c8e2f9b67
+Revises: 9b1e7d3c5a20
+Create Date: 2026-10-18 13:40:05.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41c8e2f9b67'
+down_revision: Union[str, Sequence[str], None] = '9b1e7d3c5a20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _rebuild(name, columns, copy_sql, indexes):
+    """Recreate `name` with new column types (SQLite can't ALTER them in place)."""
+    op.create_table(f'{name}_new', *columns)
+    if _has_table(name):
+        op.execute(copy_sql.format(new=f'{name}_new', old=name))
+        op.drop_table(name)
+    op.rename_table(f'{name}_new', name)
+    for index_name, index_columns, unique in indexes:
+        op.create_index(index_name, name, index_columns, unique=unique)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # users: accounts from the old session log database sign in by username
+    if _has_table('users'):
+        op.add_column('users', sa.Column('username', sa.String(), nullable=True))
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    # sessions: one table for the turn log, keyed by the client's user id string
+    _rebuild(
+        'sessions',
+        [
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.String(), nullable=True),
+            sa.Column('scenario', sa.String(), nullable=True),
+            sa.Column('transcript', sa.String(), nullable=True),
+            sa.Column('grammar_feedback', sa.JSON(), nullable=True),
+            sa.Column('tone', sa.String(), nullable=True),
+            sa.Column('difficulty', sa.String(), nullable=True),
+            sa.Column('grammar_score', sa.Integer(), nullable=True),
+            sa.Column('tone_score', sa.Integer(), nullable=True),
+            sa.Column('fluency_score', sa.Integer(), nullable=True),
+            sa.Column('xp', sa.Integer(), nullable=True),
+            sa.Column('feedback_message', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        ],
+        """
+        INSERT INTO {new} (id, user_id, scenario, transcript, tone, grammar_score,
+                           feedback_message, xp, created_at)
+        SELECT id, CAST(user_id AS VARCHAR), scenario, transcript, emotion_score,
+               CAST(grammar_score AS INTEGER), feedback_message, xp_earned, created_at
+        FROM {old}
+        """,
+        [
+            ('ix_sessions_id', ['id'], False),
+            ('ix_sessions_user_id_created_at', ['user_id', 'created_at', 'id'], False),
+        ],
+    )
+
+    # progress: the per-user rollup maintained by progress_service
+    _rebuild(
+        'progress',
+        [
+            sa.Column('user_id', sa.String(), nullable=False),
+            sa.Column('total_sessions', sa.Integer(), nullable=True),
+            sa.Column('xp', sa.Integer(), nullable=True),
+            sa.Column('streak', sa.Integer(), nullable=True),
+            sa.Column('level', sa.Integer(), nullable=True),
+            sa.Column('badges', sa.String(), nullable=True),
+            sa.Column('unlocked_scenarios', sa.String(), nullable=True),
+            sa.Column('last_active', sa.String(), nullable=True),
+            sa.Column('last_grammar_score', sa.Integer(), nullable=True),
+            sa.Column('last_tone_score', sa.Integer(), nullable=True),
+            sa.Column('last_fluency_score', sa.Integer(), nullable=True),
+            sa.Column('last_xp', sa.Integer(), nullable=True),
+            sa.Column('avg_grammar_score', sa.Float(), nullable=True),
+            sa.Column('avg_tone_score', sa.Float(), nullable=True),
+            sa.Column('avg_fluency_score', sa.Float(), nullable=True),
+            sa.PrimaryKeyConstraint('user_id'),
+        ],
+        """
+        INSERT INTO {new} (user_id, total_sessions, xp, streak, level, badges, unlocked_scenarios,
+                           last_active, avg_grammar_score, avg_tone_score, avg_fluency_score)
+        SELECT CAST(user_id AS VARCHAR), COALESCE(total_sessions, 0), COALESCE(xp, 0), streak, level,
+               badges, unlocked_scenarios, last_active, avg_grammar_score, avg_tone_score, avg_fluency_score
+        FROM {old}
+        """,
+        [],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild(
+        'progress',
+        [
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('streak', sa.Integer(), nullable=True),
+            sa.Column('level', sa.Integer(), nullable=True),
+            sa.Column('badges', sa.String(), nullable=True),
+            sa.Column('unlocked_scenarios', sa.String(), nullable=True),
+            sa.Column('last_active', sa.String(), nullable=True),
+            sa.Column('total_sessions', sa.Integer(), nullable=True),
+            sa.Column('xp', sa.Integer(), nullable=True),
+            sa.Column('avg_grammar_score', sa.Float(), nullable=True),
+            sa.Column('avg_tone_score', sa.Float(), nullable=True),
+            sa.Column('avg_fluency_score', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id'),
+        ],
+        """
+        INSERT INTO {new} (user_id, streak, level, badges, unlocked_scenarios, last_active,
+                           total_sessions, xp, avg_grammar_score, avg_tone_score, avg_fluency_score)
+        SELECT CAST(user_id AS INTEGER), streak, level, badges, unlocked_scenarios, last_active,
+               total_sessions, xp, avg_grammar_score, avg_tone_score, avg_fluency_score
+        FROM {old}
+        WHERE user_id IN (SELECT CAST(id AS VARCHAR) FROM users)
+        """,
+        [],
+    )
+
+    _rebuild(
+        'sessions',
+        [
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('scenario', sa.String(), nullable=True),
+            sa.Column('transcript', sa.String(), nullable=True),
+            sa.Column('grammar_score', sa.String(), nullable=True),
+            sa.Column('emotion_score', sa.String(), nullable=True),
+            sa.Column('feedback_message', sa.String(), nullable=True),
+            sa.Column('xp_earned', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+        ],
+        """
+        INSERT INTO {new} (id, user_id, scenario, transcript, grammar_score, emotion_score,
+                           feedback_message, xp_earned, created_at)
+        SELECT id, CAST(user_id AS INTEGER), scenario, transcript, CAST(grammar_score AS VARCHAR), tone,
+               feedback_message, xp, created_at
+        FROM {old}
+        WHERE user_id IN (SELECT CAST(id AS VARCHAR) FROM users)
+        """,
+        [
+            ('ix_sessions_id', ['id'], False),
+            ('ix_sessions_user_id_created_at', ['user_id', 'created_at', 'id'], False),
+        ],
+    )
+
+    op.drop_index('ix_users_username', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('username')
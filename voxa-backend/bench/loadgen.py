@@ -0,0 +1,290 @@
+"""Closed-loop load generator: simulated users walking through role-play scenarios.
+
+    python -m bench.loadgen --url http://localhost:8000 [--stages 1,2,4,8,16,32] [--stage-seconds 60]
+    python -m bench.loadgen --in-process [--latency llm=400] ...
+
+Each simulated user runs a scenario over and over. For every turn it uploads
+a clip to /transcribe and then sends the scripted line to /respond_to_user.
+After the last turn it calls /coach_me and polls /get_history. Between steps
+it pauses for a random think time, exponentially distributed around
+--think-ms.
+
+Load steps up through --stages (concurrent users). Each stage lasts
+--stage-seconds. The new users of a stage start evenly over its first
+--ramp-seconds, and samples taken during the ramp are not counted.
+
+For every stage the report gives each step's latency distribution, error
+rate and throughput. It also gives the knee: the first stage where adding
+users stopped buying proportional throughput, where errors passed
+--max-error-rate, or where a step's p95 passed --slo-ms. Run it against one
+worker count at a time to size workers.
+
+--in-process drives the app in this process with the stand-ins from
+bench/stubs.py. This is useful for studying the app's own queueing without
+the models.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+import wave
+from collections import defaultdict
+
+import numpy as np
+
+from bench import stubs
+from bench.run import parse_latency, percentile
+
+SCENARIOS = {
+    "coffee_shop": [
+        "Hi, could I get a cappuccino please?",
+        "Hot, please.",
+        "Do you have oat milk?",
+        "Almond milk works, thank you.",
+    ],
+    "job_interview": [
+        "Good morning, thank you for having me.",
+        "I have been working as a data analyst for three years.",
+        "I think my biggest strength is staying calm under pressure.",
+        "What does a typical day look like for the team?",
+    ],
+    "customer_support": [
+        "Hi, my order arrived damaged yesterday.",
+        "The order number is four five six seven.",
+        "I understand, could you send a replacement instead?",
+        "Great, thanks so much for your help.",
+    ],
+}
+STEPS = ("transcribe", "respond", "coach_me", "history")
+
+
+def wav_clip(text, rng):
+    """A 16 kHz mono WAV roughly as long as `text` takes to say (~0.4 s per word)."""
+    samples = int(16000 * 0.4 * max(1, len(text.split())))
+    t = np.arange(samples) / 16000
+    tone = 3000 * np.sin(2 * np.pi * rng.uniform(120, 240) * t)
+    noise = np.random.default_rng(rng.randint(0, 2**32 - 1)).normal(0, 300, samples)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(16000)
+        clip.writeframes((tone + noise).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+class Recorder:
+    """Attributes each sample to the stage it started in, skipping samples started during a ramp."""
+
+    def __init__(self, stage_seconds, ramp_seconds):
+        self.stage_seconds = stage_seconds
+        self.ramp_seconds = ramp_seconds
+        self.started_at = time.perf_counter()
+        self.latencies = defaultdict(list)  # (stage, step) -> seconds
+        self.errors = defaultdict(lambda: defaultdict(int))  # (stage, step) -> {kind: count}
+
+    def stage_of(self, started):
+        offset = started - self.started_at
+        stage = int(offset // self.stage_seconds)
+        return None if offset - stage * self.stage_seconds < self.ramp_seconds else stage
+
+    def record(self, step, started, error=None):
+        stage = self.stage_of(started)
+        if stage is None:
+            return
+        if error is None:
+            self.latencies[stage, step].append(time.perf_counter() - started)
+        else:
+            self.errors[stage, step][error] += 1
+
+
+async def timed_request(client, recorder, step, method, url, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except Exception as e:
+        recorder.record(step, started, error=type(e).__name__)
+        return None
+    if response.status_code >= 400:
+        recorder.record(step, started, error=str(response.status_code))
+        return None
+    recorder.record(step, started)
+    return response.json()
+
+async def simulated_user(index, client, recorder, args, run_id):
+    rng = random.Random(f"{args.seed}:{index}")
+    user_id = f"loadgen_{run_id}_{index}"
+    scenario_id = args.scenario or rng.choice(sorted(SCENARIOS))
+
+    async def think():
+        mean = args.think_ms / 1000
+        await asyncio.sleep(min(rng.expovariate(1 / mean), 4 * mean) if mean else 0)
+
+    while True:
+        history, conversation_id = [], None
+        for line in SCENARIOS[scenario_id]:
+            clip = wav_clip(line, rng)
+            await timed_request(client, recorder, "transcribe", "POST", "/transcribe",
+                                files={"file": ("turn.wav", clip, "audio/wav")})
+            # The scripted line stands in for the transcript, so the conversation stays on track
+            reply = await timed_request(client, recorder, "respond", "POST", "/respond_to_user", json={
+                "user_id": user_id,
+                "transcript": line,
+                "scenario_id": scenario_id,
+                "conversation_id": conversation_id,
+                "conversation_history": history[-6:],
+            })
+            history += [line, (reply or {}).get("reply", "")]
+            conversation_id = (reply or {}).get("conversation_id", conversation_id)
+            await think()
+
+        await timed_request(client, recorder, "coach_me", "POST", "/coach_me", json={
+            "transcript": " ".join(history[::2]),
+            "grammar_feedback": [],
+            "tone": "confident",
+        })
+        await timed_request(client, recorder, "history", "GET", "/get_history",
+                            params={"user_id": user_id, "limit": 20})
+        await think()
+
+async def drive(client, args):
+    recorder = Recorder(args.stage_seconds, args.ramp_seconds)
+    run_id = uuid.uuid4().hex[:8]
+    users = []
+    try:
+        for stage, target in enumerate(args.stages):
+            stage_end = recorder.started_at + (stage + 1) * args.stage_seconds
+            new_users = target - len(users)
+            print(f"  stage {stage}: {target} users", file=sys.stderr)
+            for _ in range(max(0, new_users)):
+                users.append(asyncio.create_task(simulated_user(len(users), client, recorder, args, run_id)))
+                await asyncio.sleep(args.ramp_seconds / new_users)
+            await asyncio.sleep(max(0, stage_end - time.perf_counter()))
+    finally:
+        for task in users:
+            task.cancel()
+        await asyncio.gather(*users, return_exceptions=True)
+    return recorder
+
+def summarize(recorder, args):
+    measured = args.stage_seconds - args.ramp_seconds
+    stages = []
+    for stage, users in enumerate(args.stages):
+        steps = {}
+        for step in STEPS:
+            latencies = sorted(recorder.latencies.get((stage, step), []))
+            errors = dict(recorder.errors.get((stage, step), {}))
+            total = len(latencies) + sum(errors.values())
+            steps[step] = {
+                "count": total,
+                "throughput_rps": round(len(latencies) / measured, 2),
+                "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+                "errors": errors,
+                "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+                "max_ms": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            }
+        total = sum(s["count"] for s in steps.values())
+        failed = sum(sum(s["errors"].values()) for s in steps.values())
+        stages.append({
+            "users": users,
+            "throughput_rps": round(sum(s["throughput_rps"] for s in steps.values()), 2),
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "steps": steps,
+        })
+    return {"stages": stages, "knee": find_knee(stages, args.slo_ms, args.max_error_rate)}
+
+def find_knee(stages, slo_ms=None, max_error_rate=0.01, min_efficiency=0.5):
+    """The first stage past the system's comfortable capacity, and why; None if there was none.
+
+    Efficiency compares relative throughput growth with relative user growth:
+    1.0 means throughput scaled with users, near 0 means the extra users only queued.
+    """
+    for i, stage in enumerate(stages):
+        if stage["error_rate"] > max_error_rate:
+            return {"users": stage["users"], "reason": f"error rate {stage['error_rate']:.1%}"}
+        if slo_ms is not None:
+            slow = [name for name, s in stage["steps"].items() if s["count"] and s["p95_ms"] > slo_ms]
+            if slow:
+                return {"users": stage["users"], "reason": f"p95 over {slo_ms:g} ms for {', '.join(slow)}"}
+        if i == 0:
+            continue
+        previous = stages[i - 1]
+        if previous["throughput_rps"] and stage["users"] > previous["users"]:
+            gain = stage["throughput_rps"] / previous["throughput_rps"] - 1
+            efficiency = gain / (stage["users"] / previous["users"] - 1)
+            if efficiency < min_efficiency:
+                return {
+                    "users": stage["users"],
+                    "reason": f"throughput +{gain:.0%} for +{stage['users'] / previous['users'] - 1:.0%} users",
+                }
+    return None
+
+def print_report(report):
+    for stage in report["stages"]:
+        print(f"\n{stage['users']} users: {stage['throughput_rps']} req/s, {stage['error_rate']:.2%} errors")
+        print(f"  {'step':<12}{'req/s':>8}{'p50 ms':>9}{'p90 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+        for name, s in stage["steps"].items():
+            print(f"  {name:<12}{s['throughput_rps']:>8}{s['p50_ms']:>9}{s['p90_ms']:>9}{s['p95_ms']:>9}"
+                  f"{s['p99_ms']:>9}{s['error_rate']:>8.1%}")
+    knee = report["knee"]
+    if knee:
+        print(f"\nknee: {knee['users']} users ({knee['reason']})")
+    else:
+        print("\nknee: not reached; add stages with more users")
+
+async def run(args):
+    if not args.in_process:
+        import httpx
+        limits = httpx.Limits(max_connections=max(args.stages) * 2)
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            return await drive(client, args)
+    async with stubs.in_process_client(parse_latency(args.latency)) as (client, _):
+        return await drive(client, args)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--in-process", action="store_true", help="drive the app here, with stub models")
+    parser.add_argument("--latency", default="", help="stub latencies for --in-process, e.g. llm=400")
+    parser.add_argument("--stages", type=lambda s: [int(n) for n in s.split(",")], default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--stage-seconds", type=float, default=60)
+    parser.add_argument("--ramp-seconds", type=float, default=10)
+    parser.add_argument("--think-ms", type=float, default=2000, help="mean pause between a user's steps")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), help="default: each user picks one")
+    parser.add_argument("--slo-ms", type=float, help="a step whose p95 exceeds this marks the knee")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the report as JSON here")
+    args = parser.parse_args()
+    if args.ramp_seconds >= args.stage_seconds:
+        parser.error("--ramp-seconds must be shorter than --stage-seconds")
+
+    workdir = None
+    if args.in_process:
+        workdir = tempfile.mkdtemp(prefix="voxa-loadgen-", dir=stubs.SCRATCH_PARENT)
+        stubs.configure_environment(workdir)
+    try:
+        recorder = asyncio.run(run(args))
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = summarize(recorder, args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
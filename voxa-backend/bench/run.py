@@ -0,0 +1,241 @@
+"""Benchmark the coaching endpoints in-process against stub model backends.
+
+    python -m bench.run [--requests 200] [--concurrency 16] [--latency llm=400,tts=150]
+                        [--baseline bench/baseline.json] [--save-baseline] [--output results.json]
+
+Run from voxa-backend. The app runs in this process against a throwaway
+database and audio store. Whisper, the sentiment pipeline, LanguageTool,
+Ollama and edge-tts are replaced by the stand-ins in bench/stubs.py, so
+results depend on this code and the configured latencies, not on the
+models or the network.
+
+For each endpoint the run reports throughput, p50/p95/p99 latency, errors,
+and how much resident memory grew while the endpoint was driven. With a
+baseline file present, the results are compared against it. The exit status
+is 1 if any endpoint regressed by more than --tolerance, so CI can gate on
+it. --save-baseline records the current run as the new baseline.
+"""
+
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bench import stubs
+
+ENDPOINTS = ("transcribe", "respond_to_user", "coach_me", "track_progress", "get_history")
+USERS = [f"bench_user_{i:02d}" for i in range(20)]
+PHRASES = [
+    "Hello, I'd like to order a coffee.",
+    "Could I get a table for two tomorrow evening?",
+    "I think the price are a bit high for me.",
+    "Thanks so much, that was really helpful!",
+    "Um, I guess I will maybe take the small one.",
+    "Can you tell me more about the job and the team?",
+    "I understand how you feel, let's find a solution together.",
+    "I has been working here for three years.",
+]
+
+
+def parse_latency(text):
+    latency = {}
+    for item in filter(None, (text or "").split(",")):
+        name, _, ms = item.partition("=")
+        latency[name.strip()] = float(ms)
+    return latency
+
+def transcript(rng):
+    return " ".join(rng.sample(PHRASES, rng.randint(1, 3)))
+
+def pcm_clip(rng):
+    # 1-4 s of quiet noise as 16 kHz 16-bit PCM, the format the stub decoder expects
+    samples = rng.randint(1, 4) * 16000
+    noise = np.random.default_rng(rng.randint(0, 2**32 - 1)).normal(0, 500, samples)
+    return noise.astype("<i2").tobytes()
+
+def request_factory(name, rng):
+    """Next request for endpoint `name` as (method, url, httpx kwargs), drawn from `rng`."""
+    def make():
+        user_id = rng.choice(USERS)
+        if name == "transcribe":
+            return "POST", "/transcribe", {"files": {"file": ("clip.pcm", pcm_clip(rng), "application/octet-stream")}}
+        if name == "respond_to_user":
+            return "POST", "/respond_to_user", {"json": {
+                "user_id": user_id,
+                "transcript": transcript(rng),
+                "scenario_id": rng.choice(["cafe_ordering", "job_interview", "customer_support"]),
+                "conversation_history": [transcript(rng) for _ in range(rng.randint(0, 4))],
+            }}
+        if name == "coach_me":
+            return "POST", "/coach_me", {"json": {
+                "transcript": transcript(rng),
+                "grammar_feedback": rng.sample(["Possible agreement error.", "Missing article."], rng.randint(0, 2)),
+                "tone": rng.choice(["confident", "nervous"]),
+            }}
+        if name == "track_progress":
+            return "POST", "/track_progress", {"json": {
+                "user_id": user_id,
+                "transcript": transcript(rng),
+                "grammar_feedback": [],
+                "tone": rng.choice(["confident", "nervous"]),
+            }}
+        return "GET", "/get_history", {"params": {"user_id": user_id, "limit": 20}}
+    return make
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # No /proc (macOS): fall back to the peak, reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+async def drive(client, name, requests, concurrency, warmup, seed):
+    make = request_factory(name, random.Random(f"{seed}:{name}"))
+    for _ in range(warmup):
+        method, url, kwargs = make()
+        await client.request(method, url, **kwargs)
+
+    # Don't bill this endpoint for rows queued by the previous one, or for its garbage
+    from services.progress_service import session_writer
+    await session_writer.flush()
+    gc.collect()
+
+    latencies, errors = [], 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while next(counter) < requests:
+            method, url, kwargs = make()
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_growth_mb": round(rss_mb() - rss_before, 1),
+    }
+
+def compare(results, baseline, tolerance, slack_ms):
+    """Return human-readable regressions of `results` against `baseline`."""
+    regressions = []
+    for name, current in results["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: errors {previous['errors']} -> {current['errors']}")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+        for key in ("p50_ms", "p95_ms"):
+            # Fast, database-bound endpoints jitter by tens of ms between runs on the same machine
+            if current[key] > max(previous[key] * (1 + tolerance), previous[key] + slack_ms):
+                regressions.append(f"{name}: {key} {previous[key]} -> {current[key]}")
+        # Small absolute growth is allocator noise, not a leak
+        allowed = max(previous["rss_growth_mb"] * (1 + tolerance), previous["rss_growth_mb"] + 20)
+        if current["rss_growth_mb"] > allowed:
+            regressions.append(f"{name}: rss growth {previous['rss_growth_mb']} -> {current['rss_growth_mb']} MB")
+    return regressions
+
+def print_table(results, baseline):
+    print(f"{'endpoint':<18}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'rss +MB':>9}")
+    for name, r in results["endpoints"].items():
+        print(f"{name:<18}{r['throughput_rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['errors']:>8}{r['rss_growth_mb']:>9}")
+        previous = baseline and baseline["endpoints"].get(name)
+        if previous:
+            print(f"{'  baseline':<18}{previous['throughput_rps']:>9}{previous['p50_ms']:>10}{previous['p95_ms']:>10}"
+                  f"{previous['p99_ms']:>10}{previous['errors']:>8}{previous['rss_growth_mb']:>9}")
+
+async def run(args, latency):
+    results = {"config": {"requests": args.requests, "concurrency": args.concurrency}, "endpoints": {}}
+    async with stubs.in_process_client(latency) as (client, latency):
+        results["config"]["latency_ms"] = latency
+        for name in args.endpoints:
+            print(f"  {name}...", file=sys.stderr)
+            results["endpoints"][name] = await drive(
+                client, name, args.requests, args.concurrency, args.warmup, args.seed)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per endpoint")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--latency", default="", help="stub latencies in ms, e.g. whisper=150,llm=400")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(__file__), "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown")
+    parser.add_argument("--slack-ms", type=float, default=50, help="latency changes smaller than this never count")
+    parser.add_argument("--workdir", default=stubs.SCRATCH_PARENT,
+                        help="where the throwaway database and audio store live")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="voxa-bench-", dir=args.workdir)
+    stubs.configure_environment(workdir)
+
+    try:
+        results = asyncio.run(run(args, parse_latency(args.latency)))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["config"] != results["config"]:
+            print("warning: baseline was recorded with different settings; comparison is approximate")
+
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.slack_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# bench/stubs.py
+
+"""Deterministic stand-ins for the heavy model backends.
+
+Each stand-in sleeps for a configurable latency and returns output derived
+only from its input, so benchmark runs are repeatable on any machine. They
+replace the models themselves, not the code around them: the micro-batchers,
+grammar pool, caches, LLM client and audio store all run for real.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+import wave
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import httpx
+
+# Per-call latency in milliseconds. Batched models pay this once per batch,
+# plus BATCH_ITEM_COST of it for every extra item in the batch.
+DEFAULT_LATENCY_MS = {
+    "decode": 5,
+    "whisper": 150,
+    "sentiment": 15,
+    "grammar": 20,
+    "llm": 400,
+    "llm_token": 15,
+    "tts": 150,
+}
+BATCH_ITEM_COST = 0.2
+
+WORDS = "sure thanks great coffee table tomorrow order please would like maybe price help".split()
+
+def _digest(text):
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+
+def _batch_seconds(ms, size):
+    return ms / 1000 * (1 + BATCH_ITEM_COST * (size - 1))
+
+
+def stub_transcribe_batch(latency_ms):
+    """Replaces whisper_service's batch function: one sleep per batch, text from the audio length."""
+    def transcribe(audios):
+        time.sleep(_batch_seconds(latency_ms, len(audios)))
+        return [f" I would like {len(audio) // 1600} coffees please." for audio in audios]
+    return transcribe
+
+
+class StubClassifier:
+    """Called like the transformers sentiment pipeline."""
+
+    def __init__(self, latency_ms):
+        self.latency_ms = latency_ms
+
+    def __call__(self, texts, batch_size=None, truncation=True):
+        time.sleep(_batch_seconds(self.latency_ms, len(texts)))
+        return [
+            {"label": "POSITIVE" if _digest(text) % 3 else "NEGATIVE", "score": 0.9}
+            for text in texts
+        ]
+
+
+class StubLanguageTool:
+    """Answers `check()` like language_tool_python.LanguageTool; flags about a third of sentences."""
+
+    def __init__(self, latency_ms):
+        self.latency_ms = latency_ms
+
+    def check(self, sentence):
+        time.sleep(self.latency_ms / 1000)
+        if _digest(sentence) % 3:
+            return []
+        return [SimpleNamespace(message="Possible agreement error.")]
+
+
+def stub_decode_upload(latency_ms):
+    """Replaces ffmpeg decoding: uploads are 16 kHz 16-bit PCM, raw or in a WAV container."""
+    from services.streaming_service import pcm16_to_float32
+
+    async def decode(file):
+        data = await file.read()
+        if data[:4] == b"RIFF":
+            with wave.open(io.BytesIO(data)) as clip:
+                data = clip.readframes(clip.getnframes())
+        await asyncio.sleep(latency_ms / 1000)
+        return pcm16_to_float32(data)
+    return decode
+
+
+def stub_ollama_transport(latency_ms, token_ms):
+    """An httpx transport answering /api/generate the way Ollama does, streaming or not."""
+    async def handle(request):
+        payload = json.loads(request.content)
+        seed = _digest(payload["prompt"])
+        tokens = [WORDS[(seed >> (4 * i)) % len(WORDS)] + " " for i in range(12)]
+        # Like Ollama, the returned context grows with the prompt and the reply
+        context = (payload.get("context") or []) + [
+            _digest(word) % 32000 for word in payload["prompt"].split() + tokens]
+        if not payload.get("stream"):
+            await asyncio.sleep((latency_ms + token_ms * len(tokens)) / 1000)
+            return httpx.Response(200, json={"response": "".join(tokens), "done": True, "context": context})
+
+        async def lines():
+            await asyncio.sleep(latency_ms / 1000)
+            for token in tokens:
+                await asyncio.sleep(token_ms / 1000)
+                yield json.dumps({"response": token, "done": False}).encode() + b"\n"
+            yield json.dumps({"response": "", "done": True, "context": context}).encode() + b"\n"
+        return httpx.Response(200, content=lines())
+
+    return httpx.MockTransport(handle)
+
+
+def install(latency_ms=None):
+    """Swap every model backend for its stand-in. Call before the app starts."""
+    latency = {**DEFAULT_LATENCY_MS, **(latency_ms or {})}
+
+    from config import OLLAMA_URL
+    from services import emotion_service, grammar_service, llm_service, tts_service, whisper_service
+    from services.model_registry import registry
+
+    whisper_service.engine.process_batch = stub_transcribe_batch(latency["whisper"])
+    whisper_service.decode_upload = stub_decode_upload(latency["decode"])
+    registry.register("whisper", lambda: "stub")
+
+    registry.register("sentiment", lambda: StubClassifier(latency["sentiment"]))
+
+    grammar_service._start_tool = lambda: StubLanguageTool(latency["grammar"])
+    registry.register("grammar", grammar_service._start_tool, required=False)
+
+    llm_service._client = httpx.AsyncClient(
+        base_url=OLLAMA_URL, transport=stub_ollama_transport(latency["llm"], latency["llm_token"]))
+    tts_service.set_backend(tts_service.StubTTSBackend(latency_ms=latency["tts"]))
+    return latency
+
+
+# tmpfs keeps fsync timing of the host disk out of the database-bound numbers
+SCRATCH_PARENT = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+def configure_environment(workdir):
+    """Point the app at a throwaway database and audio store under `workdir`.
+
+    Configuration is read at import, so this must run before the app is imported.
+    """
+    os.environ.update({
+        "VOXA_DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}",
+        "VOXA_AUDIO_STORE_DIR": os.path.join(workdir, "responses"),
+        "VOXA_MODEL_BACKEND": "local",
+        "VOXA_MODEL_PRELOAD": "blocking",
+        "VOXA_TTS_BACKEND": "stub",
+    })
+
+@asynccontextmanager
+async def in_process_client(latency_ms=None):
+    """Install the stand-ins, run the app's lifespan and yield (client, latencies in use)."""
+    latency = install(latency_ms)
+    import main
+    from database import engine
+
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with main.lifespan(main.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+                yield client, latency
+    finally:
+        await engine.dispose()
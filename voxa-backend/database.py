@@ -1,12 +1,100 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import os
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./voxa.db"
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import NullPool
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+from config import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT_S,
+    DB_POOL_RECYCLE_S,
+    DB_BUSY_TIMEOUT_MS,
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def make_engine(url: str = DATABASE_URL, **options):
+    if options.get("poolclass") is not NullPool:
+        options.setdefault("pool_size", DB_POOL_SIZE)
+        options.setdefault("max_overflow", DB_MAX_OVERFLOW)
+        options.setdefault("pool_timeout", DB_POOL_TIMEOUT_S)
+        if not _is_sqlite(url):
+            # Server connections can be dropped underneath an idle pool
+            options.setdefault("pool_recycle", DB_POOL_RECYCLE_S)
+            options.setdefault("pool_pre_ping", True)
+    engine = create_async_engine(url, **options)
+
+    if _is_sqlite(url):
+        @event.listens_for(engine.sync_engine, "connect")
+        def _sqlite_pragmas(dbapi_connection, connection_record):
+            # WAL lets readers run alongside the writer; NORMAL only fsyncs at checkpoints
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+            cursor.close()
+
+    return engine
+
+engine = make_engine()
+SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+Base = declarative_base()
+
+async def get_db():
+    """FastAPI dependency: one session per request, closed (and its connection returned) afterwards."""
+    async with SessionLocal() as db:
+        yield db
+
+def upsert(db, table):
+    """INSERT ... ON CONFLICT for whichever backend `db` is bound to."""
+    dialect = db.get_bind().dialect.name
+    return (postgresql if dialect == "postgresql" else sqlite).insert(table)
+
+def _migrate(connection, alembic_cfg):
+    from alembic import command
+    import models  # noqa: F401  (registers every table on Base.metadata)
+
+    alembic_cfg.attributes["connection"] = connection
+    if not inspect(connection).get_table_names():
+        # A brand-new database gets the current schema directly
+        Base.metadata.create_all(connection)
+        command.stamp(alembic_cfg, "head")
+    else:
+        command.upgrade(alembic_cfg, "head")
+
+async def init_db(url: str = DATABASE_URL):
+    """Bring the schema up to date. Runs once at startup, before the pool is used.
+
+    Migrations run in a transaction holding the write lock (BEGIN IMMEDIATE on
+    SQLite, an advisory lock on Postgres), so workers booting together apply
+    each revision exactly once.
+    """
+    from alembic.config import Config
+
+    migration_engine = make_engine(url, poolclass=NullPool)
+    if _is_sqlite(url):
+        @event.listens_for(migration_engine.sync_engine, "connect")
+        def _manual_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(migration_engine.sync_engine, "begin")
+        def _begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    alembic_cfg = Config(ALEMBIC_INI)
+    alembic_cfg.set_main_option("sqlalchemy.url", url)
+    try:
+        async with migration_engine.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                await connection.exec_driver_sql("SELECT pg_advisory_xact_lock(7478420)")
+            await connection.run_sync(_migrate, alembic_cfg)
+    finally:
+        await migration_engine.dispose()
@@ -1,30 +1,69 @@
-from fastapi import FastAPI, UploadFile, File
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import tempfile
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from services.whisper_service import transcribe_audio
+from services.batching import QueueFullError
+from services.audio_service import AudioTooLargeError, AudioDecodeError
 from services.grammar_service import analyze_grammar
 from services.emotion_service import analyze_emotion
-from services.tts_service import generate_tts
-from services.progress_service import log_session, get_progress, score_session, get_history
+from services.tts_service import generate_tts, stream_tts
+from services.progress_service import log_session, get_progress, score_session, session_writer
 from services.feedback_service import generate_feedback
-from services.user_profile_service import get_profile, update_profile
+from services.user_profile_service import get_profile, update_profile, resolve_voice
 from services.auth_service import create_user, authenticate_user, create_token
-from database import engine
-from models.user import Base as UserBase
-from models.session import Session
-from models.progress import Progress
+from services.llm_service import close_client as close_llm_client
+from services.audio_store import audio_store
+from services.conversation_store import conversations
+from services.reply_cache import reply_cache
+from services.scenario_engine import scenario_engine
+from services.model_registry import registry
+from services.metrics import monitor_event_loop
+from config import MODEL_PRELOAD
+from database import engine, get_db, init_db
 from view import response_router
 from routers import progress_router
 from routers import auth_router
-
+from routers.auth_router import current_claims, optional_claims
+from routers import stream_router
+from routers import audio_router
+from routers import health_router
+from routers import metrics_router
 
 
 from fastapi.staticfiles import StaticFiles
 import os
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    await audio_store.start()
+    loop_monitor = asyncio.create_task(monitor_event_loop())
+    preload = None
+    if MODEL_PRELOAD == "blocking":
+        await registry.load_all()
+    elif MODEL_PRELOAD == "background":
+        # Serve /health/live right away; /health/ready flips once the models are warm
+        preload = asyncio.create_task(registry.load_all())
+    yield
+    loop_monitor.cancel()
+    if preload is not None:
+        preload.cancel()
+    # Queued session rows must reach the database before the pool closes
+    await session_writer.close()
+    await audio_store.stop()
+    await close_llm_client()
+    await engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
+# Generated clips are served by audio_router (ETag, Cache-Control, Range); it must precede the mount
+app.include_router(audio_router.router)
+app.include_router(health_router.router)
+app.include_router(metrics_router.router)
 app.mount("/static", StaticFiles(directory=os.path.join("static")), name="static")
 app.add_middleware(
     CORSMiddleware,
@@ -34,15 +73,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request, exc: QueueFullError):
+    # Model queues are saturated; tell clients to back off instead of piling on
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"{exc}, try again shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # Models
 class TextInput(BaseModel):
     text: str
 
 class ReplyInput(BaseModel):
     text: str
-    voice: str = "en-US-JennyNeural"
+    voice: str | None = None  # defaults to the signed-in user's preferred voice
 
 class SessionInput(BaseModel):
+    user_id: str
     transcript: str
     grammar_feedback: list[str]
     tone: str
@@ -56,7 +105,7 @@ class CoachInput(BaseModel):
     transcript: str
     grammar_feedback: list[str]
     tone: str
-    voice: str = "en-US-JennyNeural"
+    voice: str | None = None
 
 class ProfileUpdate(BaseModel):
     preferred_voice: str | None = None
@@ -71,35 +120,50 @@ class LoginInput(BaseModel):
     email: str
     password: str
 
+async def transcribe_upload(file: UploadFile):
+    try:
+        return await transcribe_audio(file)
+    except AudioTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode audio: {e}")
+
 # Endpoints
 @app.post("/transcribe")
 async def transcribe(file: UploadFile = File(...)):
-    transcript = await transcribe_audio(file)
+    transcript = await transcribe_upload(file)
     return {"transcript": transcript}
 
 @app.post("/analyze_grammar")
 async def grammar_check(input: TextInput):
-    feedback = analyze_grammar(input.text)
+    feedback = await analyze_grammar(input.text)
     return {"grammar_feedback": feedback}
 
 @app.post("/analyze_emotion")
 async def emotion(file: UploadFile = File(...)):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
-    result = analyze_emotion(tmp_path)
+    transcript = await transcribe_upload(file)
+    result = await analyze_emotion(transcript)
     return result
 
 @app.post("/generate_reply")
-async def generate_reply(input: ReplyInput):
-    filename = await generate_tts(input.text, input.voice)
+async def generate_reply(input: ReplyInput, db: AsyncSession = Depends(get_db),
+                         claims: dict | None = Depends(optional_claims)):
+    voice = await resolve_voice(db, claims and claims["user_id"], input.voice)
+    filename = await generate_tts(input.text, voice)
     return {"audio_file": filename}
 
+@app.post("/generate_reply/stream")
+async def generate_reply_stream(input: ReplyInput, db: AsyncSession = Depends(get_db),
+                                claims: dict | None = Depends(optional_claims)):
+    voice = await resolve_voice(db, claims and claims["user_id"], input.voice)
+    # Audio for the first sentence is sent while later sentences are still synthesizing
+    return StreamingResponse(stream_tts(input.text, voice), media_type="audio/mpeg")
+
 @app.post("/track_progress")
-async def track_progress(input: SessionInput):
-    await log_session(input.transcript, str(input.grammar_feedback), input.tone)
-    progress = await get_progress()
-    return progress
+async def track_progress(input: SessionInput, db: AsyncSession = Depends(get_db)):
+    # The reply includes this session, so wait for its batch to commit
+    await log_session(input.user_id, input.transcript, input.grammar_feedback, input.tone, wait=True)
+    return await get_progress(db, input.user_id)
 
 @app.post("/generate_feedback")
 async def feedback(input: FeedbackInput):
@@ -108,46 +172,60 @@ async def feedback(input: FeedbackInput):
     return {"feedback_message": message}
 
 @app.post("/coach_me")
-async def coach(input: CoachInput):
+async def coach(input: CoachInput, db: AsyncSession = Depends(get_db),
+                claims: dict | None = Depends(optional_claims)):
     scores = score_session(input.transcript, input.grammar_feedback, input.tone)
     message = generate_feedback(input.transcript, input.grammar_feedback, input.tone, scores)
-    filename = await generate_tts(message, input.voice)
+    voice = await resolve_voice(db, claims and claims["user_id"], input.voice)
+    filename = await generate_tts(message["message"], voice)
     return {"audio_file": filename, "feedback_message": message}
 
-@app.get("/get_history")
-async def history():
-    return await get_history()
+# Same handler as /user_progress/{user_id}, so limit and cursor get the router's validation
+app.add_api_route("/get_history", progress_router.get_user_progress, methods=["GET"])
+
+@app.get("/stats")
+async def stats():
+    return {
+        "session_writer": session_writer.stats(),
+        "audio_store": audio_store.stats(),
+        "conversations": conversations.stats(),
+        "reply_cache": reply_cache.stats(),
+        "scenarios": scenario_engine.stats(),
+        "models": registry.status(),
+    }
 
 @app.get("/get_profile")
-async def profile():
-    return get_profile()
+async def profile(claims: dict = Depends(current_claims), db: AsyncSession = Depends(get_db)):
+    profile = await get_profile(db, claims["user_id"])
+    if profile is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return profile
 
 @app.post("/update_profile")
-async def update(input: ProfileUpdate):
-    return update_profile(input.preferred_voice, input.baseline_tone)
+async def update(input: ProfileUpdate, claims: dict = Depends(current_claims), db: AsyncSession = Depends(get_db)):
+    profile = await update_profile(db, claims["user_id"], input.preferred_voice, input.baseline_tone)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return profile
 
 @app.post("/register")
-async def register(input: RegisterInput):
-    user = create_user(input.name, input.email, input.password)
+async def register(input: RegisterInput, db: AsyncSession = Depends(get_db)):
+    user = await create_user(db, input.name, input.email, input.password)
     if not user:
         return {"error": "Email already registered"}
     token = create_token(user.id)
     return {"token": token, "user": {"name": user.name, "email": user.email}}
 
 @app.post("/login")
-async def login(input: LoginInput):
-    user = authenticate_user(input.email, input.password)
+async def login(input: LoginInput, db: AsyncSession = Depends(get_db)):
+    user = await authenticate_user(db, input.email, input.password)
     if not user:
         return {"error": "Invalid credentials"}
     token = create_token(user.id)
     return {"token": token, "user": {"name": user.name, "email": user.email}}
 
-# Database setup
-UserBase.metadata.create_all(bind=engine)
-Session.__table__.create(bind=engine, checkfirst=True)
-Progress.__table__.create(bind=engine, checkfirst=True)
-
 # Roleplay router
 app.include_router(response_router.router)
 app.include_router(progress_router.router)
-app.include_router(auth_router.router)
\ No newline at end of file
+app.include_router(auth_router.router)
+app.include_router(stream_router.router)
\ No newline at end of file
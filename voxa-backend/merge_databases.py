@@ -0,0 +1,222 @@
+"""Merge the old local SQLite files into the configured database.
+
+    python merge_databases.py [--sessions-db data/user_sessions.db] [--voxa-db voxa.db]
+                              [--profile-json data/user_profile.json]
+
+The target is VOXA_DATABASE_URL (voxa.db by default, or a Postgres URL). It is
+migrated to the current schema first, then:
+
+* --voxa-db, when it is not the target itself, is migrated in place and its
+  users, sessions, progress and user_progress rows are copied over with their
+  ids. Tables that already hold rows in the target are skipped.
+* --sessions-db (the session log the app used to write with aiosqlite) has
+  its users and sessions imported. Sessions already present (same user,
+  timestamp and transcript) are skipped, so the script can be re-run. Scores
+  are computed for rows logged before they were stored.
+
+Afterwards the progress rollup is rebuilt for every user whose sessions were
+imported.
+
+* --profile-json (the single profile the app used to keep in a JSON file and
+  serve to everyone) fills in the voice and baseline tone of every user who
+  hasn't chosen their own, so nobody's voice changes with the move to
+  per-user profiles. Re-running it leaves existing choices alone.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.engine import make_url
+
+import models  # noqa: F401  (registers every table on Base.metadata)
+from config import DATABASE_URL
+from database import Base, SessionLocal, engine, init_db, make_engine
+from models.progress import Progress
+from models.session import Session
+from models.user import User
+from services.progress_service import progress_row, progress_upsert, score_session
+
+CHUNK = 500
+
+def _same_file(url, path):
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database and os.path.abspath(url.database) == os.path.abspath(path)
+
+def _chunks(rows):
+    for start in range(0, len(rows), CHUNK):
+        yield rows[start:start + CHUNK]
+
+async def copy_voxa_db(path):
+    """Copy every table from an existing voxa.db into the target, ids included."""
+    source_url = f"sqlite+aiosqlite:///{os.path.abspath(path)}"
+    await init_db(source_url)
+    source = make_engine(source_url)
+    copied = {}
+    try:
+        async with source.connect() as src, SessionLocal() as db:
+            for table in Base.metadata.sorted_tables:
+                if await db.scalar(select(func.count()).select_from(table)):
+                    print(f"  {table.name}: target already has rows, skipped")
+                    continue
+                rows = [dict(row._mapping) for row in await src.execute(select(table))]
+                for chunk in _chunks(rows):
+                    await db.execute(insert(table), chunk)
+                copied[table.name] = len(rows)
+            if db.get_bind().dialect.name == "postgresql":
+                # Explicit ids don't advance Postgres sequences
+                for table in Base.metadata.sorted_tables:
+                    if "id" in table.c:
+                        await db.execute(text(
+                            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                            f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+                        ))
+            await db.commit()
+    finally:
+        await source.dispose()
+    return copied
+
+def read_session_log(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        users = []
+        if "users" in tables:
+            users = [dict(row) for row in conn.execute("SELECT username, password_hash FROM users")]
+        sessions = []
+        if "sessions" in tables:
+            sessions = [dict(row) for row in conn.execute("SELECT * FROM sessions ORDER BY timestamp, id")]
+        return users, sessions
+    finally:
+        conn.close()
+
+def to_session_rows(records):
+    feedbacks = []
+    for record in records:
+        try:
+            feedbacks.append(json.loads(record.get("grammar_feedback") or "[]"))
+        except json.JSONDecodeError:
+            feedbacks.append([])
+    # Rows logged before scores were stored get them computed the same way the app does
+    scores = [
+        score_session(record.get("transcript") or "", feedback, record.get("tone") or "")
+        for record, feedback in zip(records, feedbacks)
+    ]
+    rows = []
+    for record, feedback, computed in zip(records, feedbacks, scores):
+        stored = {key: record.get(key) for key in computed}
+        rows.append({
+            "user_id": record.get("user_id"),
+            "transcript": record.get("transcript"),
+            "grammar_feedback": feedback,
+            "tone": record.get("tone"),
+            "difficulty": record.get("difficulty"),
+            "created_at": datetime.fromisoformat(record["timestamp"]) if record.get("timestamp") else None,
+            **(stored if None not in stored.values() else computed),
+        })
+    return rows
+
+async def import_session_log(path):
+    users, records = read_session_log(path)
+    rows = to_session_rows(records)
+
+    async with SessionLocal() as db:
+        existing_usernames = set(await db.scalars(select(User.username).where(User.username.is_not(None))))
+        new_users = [user for user in users if user["username"] not in existing_usernames]
+        for chunk in _chunks(new_users):
+            await db.execute(insert(User), chunk)
+
+        existing = {
+            (row.user_id, row.created_at, row.transcript)
+            for row in await db.execute(select(Session.user_id, Session.created_at, Session.transcript))
+        }
+        new_rows = [row for row in rows if (row["user_id"], row["created_at"], row["transcript"]) not in existing]
+        for chunk in _chunks(new_rows):
+            await db.execute(insert(Session), chunk)
+        await db.commit()
+
+    return len(new_users), new_rows
+
+async def import_profile(path):
+    """Apply the old app-wide profile to users without a preference of their own."""
+    with open(path) as f:
+        profile = json.load(f)
+    updated = {}
+    async with SessionLocal() as db:
+        for field in ("preferred_voice", "baseline_tone"):
+            if profile.get(field):
+                column = getattr(User, field)
+                result = await db.execute(update(User).where(column.is_(None)).values({field: profile[field]}))
+                updated[field] = result.rowcount
+        await db.commit()
+    return updated
+
+async def rebuild_progress(user_ids):
+    """Recompute progress rows from the full session history of `user_ids`."""
+    async with SessionLocal() as db:
+        kept = {
+            row.user_id: {"badges": row.badges, "unlocked_scenarios": row.unlocked_scenarios}
+            for row in await db.scalars(select(Progress).where(Progress.user_id.in_(user_ids)))
+        }
+        await db.execute(delete(Progress).where(Progress.user_id.in_(user_ids)))
+        sessions = await db.scalars(
+            select(Session)
+            .where(Session.user_id.in_(user_ids), Session.created_at.is_not(None))
+            .order_by(Session.created_at, Session.id)
+        )
+        params = [
+            progress_row(s.user_id, s.created_at, {
+                "grammar_score": s.grammar_score or 0,
+                "tone_score": s.tone_score or 0,
+                "fluency_score": s.fluency_score or 0,
+                "xp": s.xp or 0,
+            })
+            for s in sessions
+        ]
+        for chunk in _chunks(params):
+            await db.execute(progress_upsert(db), chunk)
+        for user_id, values in kept.items():
+            row = await db.get(Progress, user_id)
+            if row is not None:
+                row.badges, row.unlocked_scenarios = values["badges"], values["unlocked_scenarios"]
+        await db.commit()
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions-db", default="data/user_sessions.db")
+    parser.add_argument("--voxa-db", default="voxa.db")
+    parser.add_argument("--profile-json", default="data/user_profile.json")
+    args = parser.parse_args()
+
+    print(f"Target: {make_url(DATABASE_URL).render_as_string(hide_password=True)}")
+    await init_db()
+    try:
+        if args.voxa_db and os.path.exists(args.voxa_db) and not _same_file(DATABASE_URL, args.voxa_db):
+            print(f"Copying {args.voxa_db}")
+            for table, count in (await copy_voxa_db(args.voxa_db)).items():
+                print(f"  {table}: {count} rows")
+
+        if args.sessions_db and os.path.exists(args.sessions_db):
+            print(f"Importing {args.sessions_db}")
+            user_count, sessions = await import_session_log(args.sessions_db)
+            print(f"  users: {user_count} new")
+            print(f"  sessions: {len(sessions)} new")
+            user_ids = sorted({row["user_id"] for row in sessions if row["user_id"] is not None})
+            if user_ids:
+                await rebuild_progress(user_ids)
+                print(f"  progress: rebuilt for {len(user_ids)} users")
+
+        if args.profile_json and os.path.exists(args.profile_json):
+            print(f"Importing {args.profile_json}")
+            for field, count in (await import_profile(args.profile_json)).items():
+                print(f"  {field}: set for {count} users")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
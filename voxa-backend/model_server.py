@@ -0,0 +1,151 @@
+"""Serve Whisper, the sentiment model and LanguageTool to every API worker on the box.
+
+    python model_server.py [--models whisper sentiment grammar] [--socket PATH]
+
+Run it next to `uvicorn main:app --workers N` started with
+VOXA_MODEL_BACKEND=server. The workers then load no models and send each
+inference over a Unix socket. Requests from every worker feed this process's
+micro-batchers, so they batch together and the models are held once.
+
+Each model can get its own server:
+
+    python model_server.py --models whisper     # listens on VOXA_MODEL_SERVER_SOCKET_WHISPER
+    python model_server.py --models sentiment grammar
+
+Models load in the background as soon as the socket is up. Workers wait for
+them at startup and only then report ready on /health/ready.
+
+Batch sizes, queue depths and cache figures for the hosted models are
+recorded here rather than in the API workers, so this process serves its own
+Prometheus endpoint at http://127.0.0.1:<--metrics-port>/metrics.
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import signal
+
+import numpy as np
+
+# config and the services read the environment when first imported, so they are
+# imported inside the functions below, after main() has pinned the backend
+logger = logging.getLogger("model_server")
+
+SERVICES = {
+    "whisper": "services.whisper_service",
+    "sentiment": "services.emotion_service",
+    "grammar": "services.grammar_service",
+}
+
+def load_handlers(models):
+    """Import only the hosted models' services, so only they register with the registry."""
+    handlers = {}
+    for name in models:
+        service = importlib.import_module(SERVICES[name])
+        if name == "whisper":
+            handlers[name] = lambda payload, body, s=service: s.engine.submit(np.frombuffer(body, dtype=np.float32))
+        elif name == "sentiment":
+            handlers[name] = lambda payload, body, s=service: s.sentiment_batcher.submit(payload)
+        else:
+            handlers[name] = lambda payload, body, s=service: s.check_sentence(payload)
+    return handlers
+
+async def handle_request(header, body, handlers):
+    from services.batching import QueueFullError
+    from services.model_registry import registry
+
+    name = header.get("model")
+    reply = {"id": header.get("id")}
+    try:
+        if name not in handlers:
+            raise LookupError(f"model {name!r} is not hosted by this server")
+        if header.get("op") == "ready":
+            await asyncio.to_thread(registry.get, name)
+            reply["result"] = registry.status()[name]
+        else:
+            reply["result"] = await handlers[name](header.get("payload"), body)
+    except QueueFullError as e:
+        reply.update(error=str(e), kind="queue_full", retry_after=e.retry_after)
+    except Exception as e:
+        logger.exception("%s request failed", name)
+        reply.update(error=f"{type(e).__name__}: {e}")
+    return reply
+
+async def serve_connection(reader, writer, handlers):
+    from services.model_client import encode_frame, read_frame
+
+    # Requests are answered as they finish, not in arrival order; ids match them up
+    tasks = set()
+
+    async def respond(header, body):
+        writer.write(encode_frame(await handle_request(header, body, handlers)))
+        await writer.drain()
+
+    try:
+        while True:
+            header, body = await read_frame(reader)
+            task = asyncio.create_task(respond(header, body))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        writer.close()
+
+def serve_metrics(port, addr="127.0.0.1"):
+    """Serve this process's metrics over HTTP from a background thread; returns the server."""
+    from prometheus_client import start_http_server
+
+    server, _ = start_http_server(port, addr=addr)
+    return server
+
+async def main():
+    # This process owns the models; it must not forward to itself
+    os.environ["VOXA_MODEL_BACKEND"] = "local"
+    from config import MODEL_SERVER_SOCKET, MODEL_SERVER_SOCKETS, MODEL_SERVER_METRICS_PORT
+    from services import metrics
+    from services.model_registry import registry
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", choices=list(SERVICES), default=list(SERVICES))
+    parser.add_argument("--socket", help="defaults to VOXA_MODEL_SERVER_SOCKET[_<MODEL> when serving one model]")
+    parser.add_argument("--metrics-port", type=int, default=MODEL_SERVER_METRICS_PORT, help="0 disables /metrics")
+    args = parser.parse_args()
+    path = args.socket or (MODEL_SERVER_SOCKETS[args.models[0]] if len(args.models) == 1 else MODEL_SERVER_SOCKET)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    handlers = load_handlers(args.models)
+
+    if os.path.exists(path):
+        os.unlink(path)  # left behind by a previous run
+    server = await asyncio.start_unix_server(lambda r, w: serve_connection(r, w, handlers), path=path)
+    logger.info("serving %s on %s", ", ".join(args.models), path)
+    metrics_server = None
+    if args.metrics_port:
+        metrics_server = serve_metrics(args.metrics_port)
+        logger.info("metrics on http://127.0.0.1:%d/metrics", args.metrics_port)
+    loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    preload = asyncio.create_task(registry.load_all())
+    try:
+        await stop.wait()
+    finally:
+        preload.cancel()
+        loop_monitor.cancel()
+        server.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if os.path.exists(path):
+            os.unlink(path)
+
+if __name__ == "__main__":
+    asyncio.run(main())
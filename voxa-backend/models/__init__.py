@@ -1 +1,4 @@
-from .progress_model import UserProgress
\ No newline at end of file
+from .progress_model import UserProgress
+from .user import User
+from .session import Session
+from .progress import Progress
@@ -1,11 +1,21 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, Float
 from database import Base
 
 class Progress(Base):
+    """Per-user rollup of the session log, upserted alongside every session insert."""
     __tablename__ = "progress"
-    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    user_id = Column(String, primary_key=True)
+    total_sessions = Column(Integer, default=0)
+    xp = Column(Integer, default=0)
     streak = Column(Integer, default=0)
     level = Column(Integer, default=1)
     badges = Column(String, default="")
     unlocked_scenarios = Column(String, default="")
-    last_active = Column(String)
\ No newline at end of file
+    last_active = Column(String)
+    last_grammar_score = Column(Integer)
+    last_tone_score = Column(Integer)
+    last_fluency_score = Column(Integer)
+    last_xp = Column(Integer)
+    avg_grammar_score = Column(Float)
+    avg_tone_score = Column(Float)
+    avg_fluency_score = Column(Float)
@@ -1,15 +1,25 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
 from database import Base
 from datetime import datetime
 
 class Session(Base):
+    """One practice turn. user_id is the client's id string, not necessarily a users.id."""
     __tablename__ = "sessions"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
-    scenario = Column(String)
+    user_id = Column(String)
+    scenario = Column(String, nullable=True)
     transcript = Column(String)
-    grammar_score = Column(String)
-    emotion_score = Column(String)
-    feedback_message = Column(String)
-    xp_earned = Column(Integer)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    grammar_feedback = Column(JSON)
+    tone = Column(String)
+    difficulty = Column(String)
+    grammar_score = Column(Integer)
+    tone_score = Column(Integer)
+    fluency_score = Column(Integer)
+    xp = Column(Integer)
+    feedback_message = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Serves history pages: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_sessions_user_id_created_at", "user_id", "created_at", "id"),
+    )
@@ -6,7 +6,9 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     email = Column(String, unique=True, index=True)
+    # Accounts created through /signup have a username instead of an email
+    username = Column(String, unique=True, index=True, nullable=True)
     password_hash = Column(String)
     avatar_url = Column(String, nullable=True)
     preferred_voice = Column(String, nullable=True)
-    baseline_tone = Column(String, nullable=True)
\ No newline at end of file
+    baseline_tone = Column(String, nullable=True)
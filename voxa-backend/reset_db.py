@@ -1,5 +1,5 @@
-from database import engine
-from models.progress_model import Base
+import asyncio
+from database import init_db
 
-Base.metadata.create_all(bind=engine)
+asyncio.run(init_db())
 print("Database reset and tables created.")
\ No newline at end of file
@@ -0,0 +1,32 @@
+import asyncio
+import os
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from services.audio_store import audio_store, URL_PREFIX
+from config import AUDIO_CACHE_MAX_AGE_SECONDS
+
+router = APIRouter()
+
+@router.get(URL_PREFIX + "/{path:path}")
+async def serve_audio(path: str, request: Request):
+    entry = audio_store.resolve(path)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    # Clip names are content hashes, so the name itself is a strong validator
+    etag = f'"{entry.key}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={AUDIO_CACHE_MAX_AGE_SECONDS}, immutable",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        # A sweep may have removed the clip since resolve(); once FileResponse opens it, removal is harmless
+        stat_result = await asyncio.to_thread(os.stat, entry.path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Audio not found")
+
+    # FileResponse answers Range requests with 206 partial content
+    return FileResponse(entry.path, media_type="audio/mpeg", headers=headers, stat_result=stat_result)
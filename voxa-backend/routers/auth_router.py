@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from models.user import User
+from services.auth_service import hash_password, check_login, create_token, decode_token
+
+router = APIRouter()
+
+bearer = HTTPBearer(auto_error=False)
+
+def current_claims(credentials: HTTPAuthorizationCredentials | None = Depends(bearer)) -> dict:
+    """Dependency for authenticated endpoints: the verified claims of the bearer token."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return decode_token(credentials.credentials)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired token", headers={"WWW-Authenticate": "Bearer"})
+
+def optional_claims(credentials: HTTPAuthorizationCredentials | None = Depends(bearer)) -> dict | None:
+    """Like current_claims, but anonymous requests get None instead of a 401."""
+    if credentials is None:
+        return None
+    return current_claims(credentials)
+
+@router.post("/signup")
+async def signup(username: str, password: str, db: AsyncSession = Depends(get_db)):
+    db.add(User(username=username, password_hash=await hash_password(password)))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Username already exists")
+    return {"message": "User created"}
+
+@router.post("/login")
+async def login(username: str, password: str, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.username == username))
+    if await check_login(db, user, password):
+        return {"message": "Login successful", "token": create_token(user.id)}
+    else:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+@router.get("/me")
+async def me(claims: dict = Depends(current_claims), db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, claims["user_id"])
+    if user is None:
+        raise HTTPException(status_code=401, detail="Unknown user")
+    return {"id": user.id, "name": user.name, "email": user.email, "username": user.username}
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from database import engine
+from services.model_registry import registry
+
+router = APIRouter()
+
+@router.get("/health/live")
+async def live():
+    """The process is up and serving; restart it only if this stops answering."""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def ready():
+    """200 once every required model is warm and the database answers, 503 until then."""
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        database = "ok"
+    except Exception as e:
+        database = f"{type(e).__name__}: {e}"
+
+    is_ready = registry.ready and database == "ok"
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "not_ready", "database": database, "models": registry.status()},
+    )
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from services import metrics
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage latencies, batch sizes, queue depths, cache hit ratios and event-loop lag for this process."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,10 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
 from services import progress_service
 
 router = APIRouter()
 
 @router.get("/user_progress/{user_id}")
-async def get_user_progress(user_id: str):
-    # Optional: filter by user_id if you store it in sessions
-    history = await progress_service.get_history(user_id)
-    return history
\ No newline at end of file
+async def get_user_progress(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=progress_service.MAX_HISTORY_PAGE),
+    cursor: str | None = Query(None, max_length=progress_service.MAX_CURSOR_LENGTH),
+    fields: str | None = None,
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        return await progress_service.get_history(db, user_id, limit=limit, cursor=cursor, fields=fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import logging
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from services.whisper_service import engine
+from services.batching import QueueFullError
+from services.streaming_service import VadSegmenter, PcmDecoder, SAMPLE_RATE, MAX_SAMPLE_RATE
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# 1003: the client sent data this endpoint can't take; 1011: the server failed
+CLOSE_UNSUPPORTED_DATA = 1003
+CLOSE_INTERNAL_ERROR = 1011
+
+@router.websocket("/ws/transcribe")
+async def stream_transcribe(websocket: WebSocket,
+                            sample_rate: int = Query(SAMPLE_RATE, gt=0, le=MAX_SAMPLE_RATE)):
+    """Live transcription.
+
+    The client sends binary frames of 16-bit little-endian mono PCM (16 kHz unless
+    `?sample_rate=` says otherwise) and a text frame `{"type": "end"}` when done.
+    The server replies with `partial` events while a phrase is being spoken and a
+    `final` event once the phrase ends, then `done` after the last final.
+    A segment that can't be transcribed gets an `error` event instead.
+    """
+    await websocket.accept()
+    segmenter = VadSegmenter()
+    decoder = PcmDecoder(sample_rate)
+    finalized = set()
+    partial_busy = False
+    last_final = None
+    tasks = set()
+
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return task
+
+    async def send_partial(segment_id, audio):
+        nonlocal partial_busy
+        try:
+            text = await engine.submit(audio)
+        except QueueFullError:
+            return  # partials are best-effort; the final for this segment still follows
+        except Exception:
+            logger.exception("partial transcription failed")
+            if segment_id not in finalized:
+                await websocket.send_json({"type": "error", "segment": segment_id, "detail": "Transcription failed"})
+            return
+        finally:
+            partial_busy = False
+        if segment_id not in finalized:
+            await websocket.send_json({"type": "partial", "segment": segment_id, "text": text.strip()})
+
+    async def send_final(segment_id, audio, previous):
+        finalized.add(segment_id)
+        try:
+            text = await engine.submit(audio)
+            event = {"type": "final", "segment": segment_id, "text": text.strip()}
+        except QueueFullError as e:
+            event = {"type": "error", "segment": segment_id, "detail": "Transcription queue is full",
+                     "retry_after": e.retry_after}
+        except Exception:
+            logger.exception("transcription failed")
+            event = {"type": "error", "segment": segment_id, "detail": "Transcription failed"}
+        if previous:
+            await previous  # keep finals in segment order
+        await websocket.send_json(event)
+
+    def dispatch(events):
+        nonlocal partial_busy, last_final
+        for kind, segment_id, audio in events:
+            if kind == "final":
+                last_final = spawn(send_final(segment_id, audio, last_final))
+            elif not partial_busy:
+                # Skip partials while one is still running so they never queue up behind finals
+                partial_busy = True
+                spawn(send_partial(segment_id, audio))
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                dispatch(segmenter.feed(decoder.decode(message["bytes"])))
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    await websocket.send_json({"type": "error", "detail": "Text frames must be JSON"})
+                    await websocket.close(code=CLOSE_UNSUPPORTED_DATA)
+                    return
+                if isinstance(control, dict) and control.get("type") == "end":
+                    break
+
+        dispatch(segmenter.flush())
+        if last_final:
+            await last_final
+        await websocket.send_json({"type": "done"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("live transcription failed")
+        try:
+            await websocket.send_json({"type": "error", "detail": "Transcription failed"})
+            await websocket.close(code=CLOSE_INTERNAL_ERROR)
+        except Exception:
+            pass  # the connection is already gone
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,63 @@
+# services/audio_service.py
+
+import asyncio
+import numpy as np
+
+from config import AUDIO_MAX_UPLOAD_BYTES, AUDIO_READ_CHUNK_BYTES, FFMPEG_BINARY
+
+SAMPLE_RATE = 16000
+
+
+class AudioTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size cap."""
+
+
+class AudioDecodeError(Exception):
+    """Raised when ffmpeg cannot decode an upload."""
+
+
+async def decode_upload(file, max_bytes: int = AUDIO_MAX_UPLOAD_BYTES) -> np.ndarray:
+    """Decode an UploadFile into a 16 kHz mono float32 array without touching disk.
+
+    The upload is read in chunks and piped straight into ffmpeg's stdin while its
+    PCM output is read back concurrently, so the encoded bytes are never held in
+    memory as a whole and no temp file is written. Containers that need a
+    seekable input (e.g. MP4 with the index at the end) are not supported.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise AudioTooLargeError(f"Upload is {file.size} bytes, limit is {max_bytes}")
+
+    proc = await asyncio.create_subprocess_exec(
+        FFMPEG_BINARY, "-nostdin", "-threads", "0", "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    async def feed():
+        total = 0
+        try:
+            while chunk := await file.read(AUDIO_READ_CHUNK_BYTES):
+                total += len(chunk)
+                if total > max_bytes:
+                    raise AudioTooLargeError(f"Upload exceeds {max_bytes} bytes")
+                proc.stdin.write(chunk)
+                await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg stopped reading; its exit status says why
+        finally:
+            proc.stdin.close()
+
+    try:
+        _, pcm, stderr = await asyncio.gather(feed(), proc.stdout.read(), proc.stderr.read())
+    except BaseException:
+        proc.kill()
+        await proc.wait()
+        raise
+
+    if await proc.wait() != 0:
+        lines = stderr.decode(errors="ignore").strip().splitlines()
+        raise AudioDecodeError(lines[-1] if lines else "ffmpeg failed to decode the upload")
+
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
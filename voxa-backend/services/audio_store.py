@@ -0,0 +1,269 @@
+# services/audio_store.py
+
+import asyncio
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from config import (
+    AUDIO_STORE_DIR,
+    AUDIO_STORE_MAX_BYTES,
+    AUDIO_STORE_TTL_SECONDS,
+    AUDIO_STORE_SWEEP_INTERVAL_SECONDS,
+)
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = "/static/responses"
+# Clip keys are hex content hashes (see tts_service.cache_key)
+_KEY_RE = re.compile(r"[0-9a-f]{4,64}")
+_SHARD_RE = re.compile(r"[0-9a-f]{2}")
+# A hit refreshes the file's mtime, which other workers read as its last access, at most this often
+TOUCH_INTERVAL_SECONDS = 60
+
+
+@dataclass
+class AudioEntry:
+    key: str
+    path: str
+    size: int
+    created_at: float
+    last_access: float
+    expires_at: float
+    hits: int = 0
+    meta: dict = field(default_factory=dict)
+
+
+class AudioStore:
+    """Index of generated clips with TTL, LRU order and a total byte budget.
+
+    Clips live under two levels of shard directories (`ab/cd/abcd....mp3`) so no
+    single directory grows huge. The index is kept in memory and rebuilt from the
+    files on startup, using mtime as the last-access time. All index updates
+    happen on the event loop; only file I/O is pushed to threads.
+
+    Every worker process has its own index over the same directory. A clip another
+    worker wrote is adopted on first lookup, and the periodic sweep rescans the
+    directory so all workers apply the TTL and byte budget to the same files.
+    """
+
+    def __init__(self, root=AUDIO_STORE_DIR, max_bytes=AUDIO_STORE_MAX_BYTES, ttl=AUDIO_STORE_TTL_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()  # least recently used first
+        self.total_bytes = 0
+        self._loaded = False
+        self._sweeper = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def relative_path(self, key: str) -> str:
+        return os.path.join(key[:2], key[2:4], f"{key}.mp3")
+
+    def url_for(self, entry: AudioEntry) -> str:
+        return f"{URL_PREFIX}/{os.path.relpath(entry.path, self.root).replace(os.sep, '/')}"
+
+    def _scan(self):
+        """Find clips in the sharded layout. Anything else under the root (such as
+        uuid-named clips from before the store) is neither indexed nor swept."""
+        found = []
+        stale_before = time.time() - 3600
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            shard = os.path.relpath(dirpath, self.root).split(os.sep) if dirpath != self.root else []
+            dirnames[:] = [d for d in dirnames if len(shard) < 2 and _SHARD_RE.fullmatch(d)]
+            if len(shard) != 2:
+                continue
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                if name.endswith(".tmp"):
+                    # Left over from an interrupted write; recent ones may belong to another worker
+                    if os.stat(path).st_mtime < stale_before:
+                        _remove_files([path])
+                elif name.endswith(".mp3"):
+                    key = name[:-4]
+                    if _KEY_RE.fullmatch(key) and shard == [key[:2], key[2:4]]:
+                        stat = os.stat(path)
+                        found.append((stat.st_mtime, key, path, stat.st_size))
+        return sorted(found)
+
+    def _register(self, entries):
+        for mtime, key, path, size in entries:
+            self._add(AudioEntry(key, path, size, mtime, mtime, mtime + self.ttl))
+        self._loaded = True
+
+    def _add(self, entry: AudioEntry):
+        old = self.entries.pop(entry.key, None)
+        if old:
+            self.total_bytes -= old.size
+        self.entries[entry.key] = entry
+        self.total_bytes += entry.size
+
+    def _reconcile(self, scanned, scan_started):
+        """Bring the index in line with the directory, which other workers write to as well."""
+        seen = set()
+        for mtime, key, path, size in scanned:
+            seen.add(key)
+            entry = self.entries.get(key)
+            if entry is None:
+                self._add(AudioEntry(key, path, size, mtime, mtime, mtime + self.ttl))
+            elif mtime > entry.last_access:
+                entry.last_access = mtime
+                entry.expires_at = max(entry.expires_at, mtime + self.ttl)
+        # Entries created while the scan ran may simply have been missed by it
+        for entry in [e for key, e in self.entries.items() if key not in seen and e.created_at < scan_started]:
+            self._drop(entry)
+        self.entries = OrderedDict(sorted(self.entries.items(), key=lambda item: item[1].last_access))
+
+    def _adopt(self, key: str):
+        """Index a clip written by another worker. Names are content hashes, so the file is that clip."""
+        if not _KEY_RE.fullmatch(key):
+            return None
+        path = os.path.join(self.root, self.relative_path(key))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        entry = AudioEntry(key, path, stat.st_size, stat.st_mtime, stat.st_mtime, stat.st_mtime + self.ttl)
+        self._add(entry)
+        return entry
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            os.makedirs(self.root, exist_ok=True)
+            self._register(self._scan())
+
+    def lookup(self, key: str):
+        """Return the entry for key and mark it used, or None."""
+        self._ensure_loaded()
+        entry = self.entries.get(key) or self._adopt(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not os.path.exists(entry.path):  # removed behind our back
+            self._drop(entry)
+            self.misses += 1
+            return None
+        self.hits += 1
+        now = time.time()
+        if now - entry.last_access > TOUCH_INTERVAL_SECONDS:
+            try:
+                os.utime(entry.path)
+            except OSError:
+                pass
+        entry.last_access = now
+        entry.expires_at = max(entry.expires_at, now + self.ttl)
+        entry.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def resolve(self, relative_url_path: str):
+        """Map a path below URL_PREFIX to its entry. Only indexed files are ever served."""
+        name = os.path.basename(relative_url_path)
+        if not name.endswith(".mp3"):
+            return None
+        self._ensure_loaded()
+        entry = self.entries.get(name[:-4]) or self._adopt(name[:-4])
+        if entry is None or self.url_for(entry) != f"{URL_PREFIX}/{relative_url_path}":
+            return None
+        return self.lookup(entry.key)
+
+    async def put(self, key: str, data: bytes, ttl=None, meta=None) -> AudioEntry:
+        self._ensure_loaded()
+        path = os.path.join(self.root, self.relative_path(key))
+        await asyncio.to_thread(_write_atomic, path, data)
+        now = time.time()
+        entry = AudioEntry(key, path, len(data), now, now, now + (ttl or self.ttl), meta=meta or {})
+        self._add(entry)
+        if self.total_bytes > self.max_bytes:
+            await self.sweep(keep=key)
+        return entry
+
+    def _drop(self, entry: AudioEntry):
+        if self.entries.pop(entry.key, None) is not None:
+            self.total_bytes -= entry.size
+
+    def _select_victims(self, now, keep=None):
+        victims = [entry for entry in self.entries.values() if entry.expires_at <= now and entry.key != keep]
+        for entry in victims:
+            self._drop(entry)
+        for entry in list(self.entries.values()):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if entry.key == keep:
+                continue
+            victims.append(entry)
+            self._drop(entry)
+        return victims
+
+    async def sweep(self, keep=None, rescan=False):
+        """Remove expired clips, then least recently used clips until under the byte budget.
+
+        With rescan=True the index is first reconciled with the files on disk.
+        """
+        self._ensure_loaded()
+        if rescan:
+            scan_started = time.time()
+            self._reconcile(await asyncio.to_thread(self._scan), scan_started)
+        # Victims leave the index synchronously, so overlapping sweeps never pick the same file
+        victims = self._select_victims(time.time(), keep)
+        if victims:
+            await asyncio.to_thread(_remove_files, [entry.path for entry in victims])
+            logger.info("audio_store_sweep removed=%d total_bytes=%d entries=%d",
+                        len(victims), self.total_bytes, len(self.entries))
+        return len(victims)
+
+    async def _sweep_forever(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep(rescan=True)
+            except Exception:
+                logger.exception("audio store sweep failed")
+
+    async def start(self, interval=AUDIO_STORE_SWEEP_INTERVAL_SECONDS):
+        os.makedirs(self.root, exist_ok=True)
+        if not self._loaded:
+            self._register(await asyncio.to_thread(self._scan))
+        await self.sweep()
+        self._sweeper = asyncio.create_task(self._sweep_forever(interval))
+
+    async def stop(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+def _write_atomic(path: str, data: bytes):
+    # Readers never see a partly written clip
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _remove_files(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+audio_store = AudioStore()
+metrics.track_cache("audio", audio_store)
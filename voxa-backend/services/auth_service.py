@@ -1,30 +1,101 @@
-from models.user import User
-from database import SessionLocal
-from jose import jwt
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
-import os
+from jose import jwt, JWTError
+from sqlalchemy import select
+
+from config import (
+    JWT_SECRET,
+    JWT_ALGORITHM,
+    JWT_TTL_SECONDS,
+    BCRYPT_ROUNDS,
+    AUTH_HASH_WORKERS,
+    AUTH_HASH_MAX_QUEUE,
+    AUTH_TOKEN_CACHE_SIZE,
+)
+from models.user import User
+from services.batching import QueueFullError
+from services.cache import LRUCache
+
+SECRET_KEY = JWT_SECRET
+ALGORITHM = JWT_ALGORITHM
+
+# bcrypt is deliberately slow (~250 ms at cost 12) and holds no lock the event
+# loop needs, so it runs on a few dedicated threads with a bounded backlog
+_hash_executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+
+async def _run_hash(fn, *args):
+    global _hash_pending
+    if _hash_pending >= AUTH_HASH_WORKERS + AUTH_HASH_MAX_QUEUE:
+        raise QueueFullError(f"password hashing queue is full ({_hash_pending} pending)", retry_after=1)
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_pending -= 1
 
-SECRET_KEY = "your-secret-key"  # Replace with env var in production
-ALGORITHM = "HS256"
+async def hash_password(password: str) -> str:
+    def work(password):
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+    return await _run_hash(work, password)
 
-def create_user(name, email, password):
-    db = SessionLocal()
-    if db.query(User).filter(User.email == email).first():
+async def verify_password(password: str, hashed: str) -> bool:
+    def work(password, hashed):
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    return await _run_hash(work, password, hashed)
+
+def needs_rehash(hashed: str) -> bool:
+    # bcrypt hashes look like $2b$12$<salt+digest>; the second field is the cost
+    try:
+        return int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+async def check_login(db, user, password) -> bool:
+    """Verify `password` for `user`, re-hashing it at the configured cost if that changed."""
+    if not user or not user.password_hash or not await verify_password(password, user.password_hash):
+        return False
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password(password)
+        await db.commit()
+    return True
+
+async def create_user(db, name, email, password):
+    if await db.scalar(select(User.id).where(User.email == email)):
         return None  # Email already exists
-    hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    hashed_pw = await hash_password(password)
     user = User(name=name, email=email, password_hash=hashed_pw)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
-def authenticate_user(email, password):
-    db = SessionLocal()
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not bcrypt.checkpw(password.encode(), user.password_hash.encode()):
+async def authenticate_user(db, email, password):
+    user = await db.scalar(select(User).where(User.email == email))
+    if not await check_login(db, user, password):
         return None
     return user
 
 def create_token(user_id):
-    payload = {"user_id": user_id}
-    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    now = int(time.time())
+    payload = {"user_id": user_id, "iat": now, "exp": now + JWT_TTL_SECONDS}
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+# Verified claims by token, so repeat requests skip signature checks and JSON decoding
+token_cache = LRUCache(maxsize=AUTH_TOKEN_CACHE_SIZE, name="auth_token")
+
+def decode_token(token: str) -> dict:
+    """Return the claims of a valid, unexpired token; raises JWTError otherwise."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        if claims["exp"] > time.time():
+            return claims
+        token_cache.pop(token)
+        raise JWTError("Signature has expired.")
+
+    claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require_exp": True})
+    token_cache.set(token, claims)
+    return claims
@@ -0,0 +1,107 @@
+# services/batching.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services import metrics
+
+
+class QueueFullError(Exception):
+    """Raised when a batcher's queue is at capacity and cannot accept more work."""
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class MicroBatcher:
+    """Collects concurrent requests into batches and runs them off the event loop.
+
+    `process_batch` is a blocking callable that takes a list of items and returns
+    a list of results in the same order. It runs on a bounded thread pool with at
+    most `workers` batches in flight; while every worker is busy new requests keep
+    queueing, so batches grow under load instead of piling up threads.
+    """
+
+    def __init__(self, process_batch, max_batch_size=8, max_wait_ms=10.0,
+                 max_queue=64, workers=1, name="batcher", retry_after=1):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.workers = workers
+        self.name = name
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._collector = None
+        self._inflight = set()
+        metrics.track_queue(name, lambda: self.queue_depth)
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._collector and not self._collector.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._collector = loop.create_task(self._collect())
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, item):
+        self._ensure_started()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"{self.name} queue is full ({self.max_queue} pending)", self.retry_after)
+        return await future
+
+    async def _collect(self):
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = self._loop.create_task(self._run(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch):
+        items = [item for item, _ in batch]
+        metrics.batch_size.labels(self.name).observe(len(items))
+        try:
+            results = await self._loop.run_in_executor(self._executor, self.process_batch, items)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        if self._collector:
+            self._collector.cancel()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
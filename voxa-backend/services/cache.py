@@ -0,0 +1,106 @@
+# services/cache.py
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from services import metrics
+
+
+class LRUCache:
+    """Small in-process LRU cache with hit/miss counters, exported on /metrics when named.
+
+    With `ttl` set, entries older than `ttl` seconds count as missing.
+    """
+
+    def __init__(self, maxsize=1024, name=None, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if name:
+            metrics.track_cache(name, self)
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        if self.ttl is not None:
+            expires_at, value = value
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.ttl is not None:
+            value = (time.monotonic() + self.ttl, value)
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        if key not in self._data:
+            return default
+        value = self._data.pop(key)
+        return value[1] if self.ttl is not None else value
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Runs one call per key at a time; callers arriving while it runs share its result.
+
+    The shared call is shielded: a caller that gives up (timeout, client gone)
+    doesn't cancel the work the others are waiting on.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+            if self.name:
+                metrics.coalesced_calls.labels(self.name).inc()
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark a failure nobody waited for as retrieved
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self):
+        return len(self._calls)
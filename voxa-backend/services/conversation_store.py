@@ -0,0 +1,190 @@
+# services/conversation_store.py
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from config import (
+    CONVERSATION_MAX,
+    CONVERSATION_TTL_SECONDS,
+    CONVERSATION_TOKEN_BUDGET,
+    CONVERSATION_OVERFLOW,
+)
+from services import metrics
+from services.llm_service import build_prompt, build_followup_prompt, generate, stream_generate
+from services.reply_cache import reply_cache, reply_key, generate_reply
+
+logger = logging.getLogger(__name__)
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English; only used to size rebuilt prompts
+    return len(text) // 4 + 1
+
+
+@dataclass
+class Conversation:
+    """One role-play conversation: recent turns verbatim, older ones summarized,
+    and Ollama's context tokens so the next turn only has to send the new line."""
+
+    id: str
+    user_id: str
+    scenario_id: str
+    turns: list = field(default_factory=list)  # (customer line, reply) pairs
+    summary: str = ""
+    context: list | None = None
+    expires_at: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def history(self):
+        return [line for turn in self.turns for line in turn]
+
+    def prompt_for(self, transcript):
+        """Return (prompt, context) for the next turn."""
+        if self.context:
+            return build_followup_prompt(transcript), self.context
+        return build_prompt(transcript, self.scenario_id, self.history(), self.summary), None
+
+    def record(self, transcript, reply, context, budget=CONVERSATION_TOKEN_BUDGET):
+        """Add a finished turn and apply the token budget; returns the turns dropped from the window."""
+        self.turns.append((transcript, reply))
+        # Past the budget Ollama would silently cut the start of the context, role included;
+        # rebuild the next prompt from recent turns instead
+        self.context = context if context and len(context) <= budget else None
+
+        # Verbatim turns get half the budget in a rebuilt prompt, leaving room for the role and reply
+        dropped = []
+        size = sum(estimate_tokens(line) for line in self.history())
+        while len(self.turns) > 1 and size > budget // 2:
+            turn = self.turns.pop(0)
+            size -= sum(estimate_tokens(line) for line in turn)
+            dropped.append(turn)
+        return dropped
+
+
+def build_summary_prompt(summary, turns):
+    lines = "\n".join(f"Customer: {customer}\nYou: {reply}" for customer, reply in turns)
+    return f"""
+Summarize this role-play conversation in at most three sentences, keeping names, orders and decisions.
+{f"Summary so far: {summary}" if summary else ""}
+{lines}
+Summary:
+"""
+
+
+class ConversationStore:
+    """Conversations by id in least-recently-used order, dropped after `ttl` idle seconds or past `maxsize`."""
+
+    def __init__(self, maxsize=CONVERSATION_MAX, ttl=CONVERSATION_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._summaries = set()
+        self.hits = 0
+        self.misses = 0
+        metrics.track_cache("conversations", self)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, conversation_id):
+        conversation = self._data.get(conversation_id)
+        if conversation is None or conversation.expires_at <= time.monotonic():
+            self._data.pop(conversation_id, None)
+            self.misses += 1
+            return None
+        self._data.move_to_end(conversation_id)
+        conversation.expires_at = time.monotonic() + self.ttl
+        self.hits += 1
+        return conversation
+
+    def open(self, conversation_id, user_id, scenario_id, history=()):
+        """The live conversation `conversation_id`, or a new one seeded from the client's history.
+
+        Only ids this store minted are continued, and only by the same user in the same
+        scenario; anything else starts a new conversation under a fresh id.
+        The history is alternating customer and reply lines; a trailing unanswered line
+        (the transcript of this turn) is ignored.
+        """
+        conversation = self._data.get(conversation_id) if conversation_id else None
+        if conversation is not None and (conversation.user_id, conversation.scenario_id) == (user_id, scenario_id):
+            conversation = self.get(conversation_id)
+        else:
+            conversation = None
+            self.misses += 1
+        if conversation is None:
+            conversation = Conversation(new_conversation_id(), user_id, scenario_id)
+            conversation.turns = list(zip(history[0::2], history[1::2]))
+            conversation.expires_at = time.monotonic() + self.ttl
+            self._data[conversation.id] = conversation
+            self._evict()
+        return conversation
+
+    def _evict(self):
+        # The least recently used conversation is also the first to expire
+        now = time.monotonic()
+        while self._data:
+            oldest = next(iter(self._data.values()))
+            if len(self._data) <= self.maxsize and oldest.expires_at > now:
+                break
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def finish_turn(self, conversation, transcript, reply, context):
+        dropped = conversation.record(transcript, reply, context)
+        if dropped and CONVERSATION_OVERFLOW == "summarize":
+            # Off the reply path; the summary only matters once the context is rebuilt
+            task = asyncio.create_task(self._summarize(conversation, dropped))
+            self._summaries.add(task)
+            task.add_done_callback(self._summaries.discard)
+
+    async def _summarize(self, conversation, dropped):
+        try:
+            conversation.summary, _ = await generate(build_summary_prompt(conversation.summary, dropped))
+        except Exception:
+            logger.warning("Summarizing conversation %s failed; its oldest turns are dropped", conversation.id,
+                           exc_info=True)
+
+    def stats(self):
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+conversations = ConversationStore()
+
+def new_conversation_id():
+    return uuid.uuid4().hex
+
+async def take_turn(conversation, transcript):
+    """Reply to `transcript` within `conversation` (from `conversations.open`), sending Ollama only what it hasn't seen."""
+    # Turns of one conversation run one at a time, each building on the context of the last
+    async with conversation.lock:
+        prompt, context = conversation.prompt_for(transcript)
+        key = reply_key(conversation.scenario_id, conversation.history(), transcript)
+        reply, context = await generate_reply(key, prompt, context)
+        conversations.finish_turn(conversation, transcript, reply, context)
+    return reply
+
+async def stream_turn(conversation, transcript):
+    """Streaming `take_turn`: yields reply tokens. A stream abandoned midway leaves the conversation as it was."""
+    async with conversation.lock:
+        key = reply_key(conversation.scenario_id, conversation.history(), transcript)
+        reply = reply_cache.get(key)
+        if reply is not None:
+            yield reply
+            conversations.finish_turn(conversation, transcript, reply, None)
+            return
+
+        # Streams aren't coalesced: waiting on another request's whole reply would delay the first token
+        prompt, context = conversation.prompt_for(transcript)
+        result = {}
+        tokens = []
+        async for token in stream_generate(prompt, context, result):
+            tokens.append(token)
+            yield token
+        reply = "".join(tokens).strip()
+        reply_cache.set(key, reply)
+        conversations.finish_turn(conversation, transcript, reply, result.get("context"))
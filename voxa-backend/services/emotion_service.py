@@ -1,26 +1,77 @@
 # services/emotion_service.py
 
-from transformers import pipeline
-import re
+import logging
+import random
 
-# Load sentiment classifier
-classifier = pipeline("sentiment-analysis")
+from config import (
+    EMOTION_MAX_BATCH_SIZE,
+    EMOTION_MAX_WAIT_MS,
+    EMOTION_MAX_QUEUE,
+    EMOTION_WORKERS,
+    EMOTION_CACHE_SIZE,
+    EMOTION_LOG_SAMPLE_RATE,
+    MODEL_BACKEND,
+)
+from services.batching import MicroBatcher
+from services.cache import LRUCache
+from services.metrics import timed
+from services.model_client import RemoteModel
+from services.model_registry import registry
+from services.text_features import extract_features
+
+logger = logging.getLogger(__name__)
+
+def _load_classifier():
+    # transformers (and torch under it) is imported only once the classifier is needed
+    from transformers import pipeline
+    return pipeline("sentiment-analysis")
+
+def _warmup(classifier):
+    classifier(["Hello, it's nice to meet you."], truncation=True)
+
+def _classify_batch(texts):
+    classifier = registry.get("sentiment")
+    return classifier(texts, batch_size=len(texts), truncation=True)
+
+if MODEL_BACKEND == "server":
+    sentiment_batcher = RemoteModel("sentiment")
+    registry.register("sentiment", sentiment_batcher.wait_ready)
+else:
+    sentiment_batcher = MicroBatcher(
+        _classify_batch,
+        max_batch_size=EMOTION_MAX_BATCH_SIZE,
+        max_wait_ms=EMOTION_MAX_WAIT_MS,
+        max_queue=EMOTION_MAX_QUEUE,
+        workers=EMOTION_WORKERS,
+        name="sentiment",
+    )
+    registry.register("sentiment", _load_classifier, warmup=_warmup)
+
+# Scenario turns repeat a lot ("yes please", "thank you"), so whole results are cached
+emotion_cache = LRUCache(maxsize=EMOTION_CACHE_SIZE, name="emotion")
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+@timed("sentiment")
+async def analyze_emotion(text: str):
+    key = normalize_text(text)
+    cached = emotion_cache.get(key)
+    if cached is not None:
+        return dict(cached)
 
-def analyze_emotion(text: str):
     # Sentiment → Tone
-    result = classifier(text)[0]
+    result = await sentiment_batcher.submit(text)
     label = result["label"].lower()
     tone = "confident" if label == "positive" else "nervous"
 
+    features = extract_features(text)
+
     # Empathy: based on emotional/relational keywords
-    empathy_keywords = ["sorry", "understand", "feel", "appreciate", "thank", "hope"]
-    empathy_score = sum(word in text.lower() for word in empathy_keywords)
-    empathy = round(min(1.0, 0.4 + 0.1 * empathy_score), 2)
+    empathy = round(min(1.0, 0.4 + 0.1 * features.empathy_hits), 2)
 
     # Pacing: based on average sentence length
-    sentence_count = text.count(".") + text.count("?") + text.count("!")
-    word_count = len(text.split())
-    avg_sentence_length = word_count / max(1, sentence_count)
+    avg_sentence_length = features.avg_sentence_length
     pacing = (
         "fast" if avg_sentence_length > 20 else
         "slow" if avg_sentence_length < 8 else
@@ -28,26 +79,25 @@ def analyze_emotion(text: str):
     )
 
     # Clarity: based on filler words
-    filler_words = ["um", "uh", "like", "you know", "so", "actually"]
-    clean_text = re.sub(r"[^\w\s]", "", text.lower())
-    filler_count = sum(clean_text.count(f) for f in filler_words)
+    filler_count = features.filler_hits
     clarity = (
         "high" if filler_count == 0 else
         "medium" if filler_count <= 2 else
         "low"
     )
 
-    # Debug log (optional)
-    print("Emotion analysis:", {
+    analysis = {
         "tone": tone,
         "empathy": empathy,
         "pacing": pacing,
         "clarity": clarity
-    })
+    }
+    emotion_cache.set(key, analysis)
 
-    return {
-        "tone": tone,
-        "empathy": empathy,
-        "pacing": pacing,
-        "clarity": clarity
-    }
\ No newline at end of file
+    if random.random() < EMOTION_LOG_SAMPLE_RATE:
+        logger.info(
+            "emotion_analysis tone=%s empathy=%.2f pacing=%s clarity=%s words=%d cache_size=%d",
+            tone, empathy, pacing, clarity, features.word_count, len(emotion_cache),
+        )
+
+    return dict(analysis)
@@ -1,15 +1,120 @@
 # services/grammar_service.py
 
-import language_tool_python
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# Initialize grammar tool
-tool = language_tool_python.LanguageTool('en-US')
+from config import (
+    GRAMMAR_LANGUAGE,
+    GRAMMAR_POOL_SIZE,
+    GRAMMAR_TIMEOUT_MS,
+    GRAMMAR_CACHE_SIZE,
+    GRAMMAR_MAX_ISSUES,
+    MODEL_BACKEND,
+)
+from services.cache import LRUCache, SingleFlight
+from services.metrics import timed
+from services.model_client import RemoteModel
+from services.model_registry import registry
+from services.text_features import split_sentences
 
-def analyze_grammar(text: str):
-    matches = tool.check(text)
+logger = logging.getLogger(__name__)
+
+def _start_tool():
+    # Each LanguageTool backend is a JVM; importing the wrapper is cheap, starting one is not
+    import language_tool_python
+    return language_tool_python.LanguageTool(GRAMMAR_LANGUAGE)
+
+def _warmup(tool):
+    tool.check("This are a warmup sentence.")
+
+
+class GrammarToolPool:
+    """A fixed number of LanguageTool backends, each used by one worker thread at a time."""
+
+    def __init__(self, size):
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="grammar")
+        self._tools = queue.Queue()
+        self._started = 0
+        self._started_lock = threading.Lock()
+
+    def _checkout(self):
+        # The first backend is the registry's; extra ones are started on first use,
+        # never more than one per worker
+        try:
+            return self._tools.get_nowait()
+        except queue.Empty:
+            pass
+        with self._started_lock:
+            first = self._started == 0
+            self._started += 1
+        try:
+            return registry.get("grammar") if first else _start_tool()
+        except Exception:
+            with self._started_lock:
+                self._started -= 1
+            raise
+
+    def _check(self, sentence):
+        backend = self._checkout()
+        try:
+            return [match.message for match in backend.check(sentence)]
+        finally:
+            self._tools.put(backend)
+
+    async def check(self, sentence):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._check, sentence)
+
+
+# Grammar checks fail soft (analyze_grammar returns no feedback), so the app can serve without it
+if MODEL_BACKEND == "server":
+    remote = RemoteModel("grammar")
+    check_sentence = remote.submit
+    registry.register("grammar", remote.wait_ready, required=False)
+else:
+    pool = GrammarToolPool(GRAMMAR_POOL_SIZE)
+    check_sentence = pool.check
+    registry.register("grammar", _start_tool, warmup=_warmup, required=False)
+
+sentence_cache = LRUCache(maxsize=GRAMMAR_CACHE_SIZE, name="grammar")
+# Identical sentences from concurrent requests share one check
+sentence_checks = SingleFlight("grammar")
+
+async def _check_sentence(sentence):
+    try:
+        messages = await check_sentence(sentence)
+    except Exception:
+        logger.exception("grammar check failed")
+        return []
+    sentence_cache.set(sentence, messages)
+    return messages
+
+@timed("grammar")
+async def analyze_grammar(text: str, timeout_ms: float = GRAMMAR_TIMEOUT_MS):
+    sentences = split_sentences(text)
+    results = {}
+    pending = {}
+    for sentence in dict.fromkeys(sentences):
+        cached = sentence_cache.get(sentence)
+        if cached is not None:
+            results[sentence] = cached
+            continue
+        pending[sentence] = asyncio.ensure_future(
+            sentence_checks.do(sentence, lambda sentence=sentence: _check_sentence(sentence)))
+
+    if pending:
+        # Checks still running at the deadline keep going and fill the cache for next time
+        done, _ = await asyncio.wait(pending.values(), timeout=timeout_ms / 1000)
+        for sentence, task in pending.items():
+            if task in done:
+                results[sentence] = task.result()
 
     # Extract grammar feedback messages
-    feedback = [match.message for match in matches]
+    feedback = [message for sentence in sentences for message in results.get(sentence, [])]
 
     # Optional: limit to top 5 issues for clarity
-    return feedback[:5]
\ No newline at end of file
+    return feedback[:GRAMMAR_MAX_ISSUES]
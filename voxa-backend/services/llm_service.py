@@ -1,21 +1,122 @@
-import requests
+import asyncio
+import json
+import httpx
 
-def generate_dynamic_reply(transcript, scenario_id, history):
-    prompt = f"""
+from services.metrics import timed
+
+from config import (
+    OLLAMA_URL,
+    LLM_MODEL,
+    LLM_CONNECT_TIMEOUT,
+    LLM_READ_TIMEOUT,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BACKOFF_SECONDS,
+    LLM_MAX_CONNECTIONS,
+)
+
+_client = None
+
+def get_client() -> httpx.AsyncClient:
+    # One pooled keep-alive client per process instead of a new connection per reply
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=OLLAMA_URL,
+            timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            ),
+        )
+    return _client
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+async def _backoff(attempt: int):
+    await asyncio.sleep(LLM_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+def build_prompt(transcript, scenario_id, history, summary=""):
+    earlier = f"Summary of the earlier conversation: {summary}\n" if summary else ""
+    return f"""
 You are roleplaying as a {scenario_id.replace('_', ' ')} character. Respond naturally and conversationally.
-Conversation so far:
+{earlier}Conversation so far:
 {format_history(history)}
 Customer just said: "{transcript}"
 Your reply:
 """
 
-    response = requests.post("http://localhost:11434/api/generate", json={
-        "model": "llama3",
-        "prompt": prompt,
-        "stream": False
-    })
+def build_followup_prompt(transcript):
+    # The role and every earlier turn are already in the context tokens sent with this prompt
+    return f"""
+Customer just said: "{transcript}"
+Your reply:
+"""
+
+def _payload(prompt, context, stream):
+    payload = {"model": LLM_MODEL, "prompt": prompt, "stream": stream}
+    if context:
+        payload["context"] = context
+    return payload
+
+@timed("llm")
+async def generate(prompt, context=None):
+    """Return (reply, context): Ollama's context tokens let the next turn continue without resending history."""
+    payload = _payload(prompt, context, stream=False)
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            response = await get_client().post("/api/generate", json=payload)
+            response.raise_for_status()
+            data = response.json()
+            return data["response"].strip(), data.get("context")
+        except httpx.HTTPError as e:
+            if attempt == LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            await _backoff(attempt)
+
+@timed("llm_stream")
+async def stream_generate(prompt, context=None, result=None):
+    """Yield reply tokens as Ollama produces them.
+
+    Once the reply is complete, the new context tokens are stored in
+    `result["context"]` when a `result` dict is passed.
+
+    Failures are retried only until the first token has been yielded; after that
+    a retry would repeat text the caller has already forwarded.
+    """
+    payload = _payload(prompt, context, stream=True)
 
-    return response.json()["response"].strip()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        started = False
+        try:
+            async with get_client().stream("POST", "/api/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    token = chunk.get("response", "")
+                    if token:
+                        started = True
+                        yield token
+                    if chunk.get("done"):
+                        if result is not None:
+                            result["context"] = chunk.get("context")
+                        return
+            return
+        except httpx.HTTPError as e:
+            if started or attempt == LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            await _backoff(attempt)
 
 def format_history(history):
-    return "\n".join([f"User: {line}" if i % 2 == 0 else f"AI: {line}" for i, line in enumerate(history)])
\ No newline at end of file
+    return "\n".join([f"User: {line}" if i % 2 == 0 else f"AI: {line}" for i, line in enumerate(history)])
@@ -1,9 +1,11 @@
 # services/metric_service.py
 
+from services.text_features import extract_features
+
 def estimate_metrics(transcript: str):
-    word_count = len(transcript.split())
-    sentence_count = transcript.count(".") + transcript.count("?") + transcript.count("!")
-    avg_sentence_length = word_count / max(1, sentence_count)
+    features = extract_features(transcript)
+    word_count = features.word_count
+    avg_sentence_length = features.avg_sentence_length
 
     # Fluency score: longer, well-structured sentences = higher fluency
     fluency_score = min(100, int(avg_sentence_length * 5))
@@ -0,0 +1,139 @@
+# services/metrics.py
+
+import asyncio
+import functools
+import inspect
+import time
+from contextlib import contextmanager, nullcontext
+
+from prometheus_client import CONTENT_TYPE_PLAIN_0_0_4, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from config import TRACING_ENABLED, EVENT_LOOP_LAG_INTERVAL_S
+
+try:
+    from opentelemetry import trace
+except ImportError:  # tracing is optional
+    trace = None
+
+# Seconds; covers cache hits (sub-ms) through long transcriptions and LLM replies
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+CONTENT_TYPE = CONTENT_TYPE_PLAIN_0_0_4
+
+
+def render(registry=REGISTRY):
+    """Every metric in the Prometheus text exposition format."""
+    return generate_latest(registry).decode()
+
+
+class CacheCollector(Collector):
+    """Reads hit, miss and size figures from each tracked cache at scrape time."""
+
+    def __init__(self):
+        self.caches = {}
+
+    def collect(self):
+        hits = CounterMetricFamily("voxa_cache_hits", "Cache lookups that found an entry.", labels=["cache"])
+        misses = CounterMetricFamily("voxa_cache_misses", "Cache lookups that found nothing.", labels=["cache"])
+        ratio = GaugeMetricFamily("voxa_cache_hit_ratio", "Hits over lookups since the process started.",
+                                  labels=["cache"])
+        entries = GaugeMetricFamily("voxa_cache_entries", "Entries currently cached.", labels=["cache"])
+        for name, cache in list(self.caches.items()):
+            lookups = cache.hits + cache.misses
+            hits.add_metric([name], cache.hits)
+            misses.add_metric([name], cache.misses)
+            ratio.add_metric([name], round(cache.hits / lookups, 4) if lookups else 0.0)
+            entries.add_metric([name], len(cache))
+        yield from (hits, misses, ratio, entries)
+
+
+stage_seconds = Histogram(
+    "voxa_stage_duration_seconds", "Time spent in each pipeline stage.", ["stage"], buckets=LATENCY_BUCKETS)
+stage_errors = Counter(
+    "voxa_stage_errors_total", "Pipeline stage calls that raised.", ["stage"])
+batch_size = Histogram(
+    "voxa_batch_size", "Items per batch run by a batcher or writer.", ["batcher"], buckets=SIZE_BUCKETS)
+queue_depth = Gauge(
+    "voxa_queue_depth", "Items waiting in a batcher or writer queue.", ["queue"])
+coalesced_calls = Counter(
+    "voxa_coalesced_calls_total", "Calls that joined an identical call already in flight.", ["call"])
+rows_dropped = Counter(
+    "voxa_session_rows_dropped_total", "Queued rows a writer gave up on after retrying.", ["writer"])
+loop_lag_seconds = Histogram(
+    "voxa_event_loop_lag_seconds", "How late the event loop ran a timer; time the loop was blocked.",
+    buckets=LATENCY_BUCKETS)
+caches = CacheCollector()
+REGISTRY.register(caches)
+
+
+def track_queue(name, depth):
+    """Report `depth()` as the depth of queue `name` on every scrape."""
+    queue_depth.labels(name).set_function(depth)
+
+def track_cache(name, cache):
+    """Report hit, miss and size figures for anything with `hits`, `misses` and `len()`."""
+    caches.caches[name] = cache
+
+
+_tracer = trace.get_tracer("voxa") if trace is not None and TRACING_ENABLED else None
+
+@contextmanager
+def stage(name, current=True):
+    """Time a block as pipeline stage `name`, inside a tracing span when OpenTelemetry is installed.
+
+    Pass current=False when the block spans async generator yields: a span made
+    current there would leak its context into whatever runs between items.
+    """
+    if _tracer is None:
+        span = nullcontext()
+    elif current:
+        span = _tracer.start_as_current_span(f"voxa.{name}")
+    else:
+        span = _tracer.start_span(f"voxa.{name}")
+    start = time.perf_counter()
+    with span:
+        try:
+            yield
+        except Exception:
+            stage_errors.labels(name).inc()
+            raise
+        finally:
+            stage_seconds.labels(name).observe(time.perf_counter() - start)
+
+def timed(name):
+    """Decorator form of `stage()` for async functions and async generators.
+
+    A generator is timed from the first item requested to the last one produced.
+    """
+    def decorate(fn):
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def generator_wrapper(*args, **kwargs):
+                generator = fn(*args, **kwargs)
+                try:
+                    with stage(name, current=False):
+                        async for item in generator:
+                            yield item
+                finally:
+                    await generator.aclose()
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with stage(name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+async def monitor_event_loop(interval=EVENT_LOOP_LAG_INTERVAL_S):
+    """Run for the life of the app, recording how late each `interval` timer fires.
+
+    Anything that blocks the loop (a sync call, a CPU-heavy step) shows up here as lag.
+    """
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        loop_lag_seconds.observe(max(0.0, time.perf_counter() - start - interval))
@@ -0,0 +1,148 @@
+# services/model_client.py
+
+import asyncio
+import itertools
+import json
+import socket
+import struct
+import time
+
+import numpy as np
+
+from config import MODEL_SERVER_SOCKETS, MODEL_SERVER_TIMEOUT_S, MODEL_SERVER_CONNECT_TIMEOUT_S
+from services.batching import QueueFullError
+
+# Wire format, both directions: a 4-byte big-endian header length, a JSON header,
+# then `header["size"]` bytes of binary body (float32 PCM for whisper, else empty).
+_LENGTH = struct.Struct(">I")
+
+
+class RemoteModelError(RuntimeError):
+    """Inference failed inside the model server."""
+
+
+def encode_frame(header, body=b""):
+    header = json.dumps({**header, "size": len(body)}).encode()
+    return _LENGTH.pack(len(header)) + header + body
+
+async def read_frame(reader):
+    """Read one frame; raises asyncio.IncompleteReadError when the peer hangs up."""
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    header = json.loads(await reader.readexactly(length))
+    body = await reader.readexactly(header["size"]) if header["size"] else b""
+    return header, body
+
+def _raise_for(response):
+    if "error" not in response:
+        return response.get("result")
+    if response.get("kind") == "queue_full":
+        raise QueueFullError(response["error"], retry_after=response.get("retry_after", 1))
+    raise RemoteModelError(response["error"])
+
+
+class ModelServerClient:
+    """One connection to a model server, shared by every request from this process.
+
+    Requests are pipelined: each carries an id, responses come back in whatever
+    order the server's batches finish, and a reader task hands them to the
+    waiting callers. A dropped connection fails the requests in flight and the
+    next call reconnects.
+    """
+
+    def __init__(self, path, timeout=MODEL_SERVER_TIMEOUT_S):
+        self.path = path
+        self.timeout = timeout
+        self._ids = itertools.count()
+        self._loop = None
+        self._lock = None
+        self._writer = None
+        self._pending = {}
+
+    async def _ensure_connected(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._lock, self._writer, self._pending = loop, asyncio.Lock(), None, {}
+        if self._writer is not None and not self._writer.is_closing():
+            return
+        async with self._lock:
+            if self._writer is None or self._writer.is_closing():
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                self._writer = writer
+                loop.create_task(self._read_responses(reader, writer))
+
+    async def _read_responses(self, reader, writer):
+        error = ConnectionError(f"model server at {self.path} closed the connection")
+        try:
+            while True:
+                header, _ = await read_frame(reader)
+                future = self._pending.pop(header["id"], None)
+                if future is not None and not future.done():
+                    future.set_result(header)
+        except (ConnectionError, OSError) as exc:
+            error = ConnectionError(f"model server at {self.path} went away: {exc}")
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+            if self._writer is writer:
+                self._writer = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def call(self, model, payload=None, body=b""):
+        await self._ensure_connected()
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        try:
+            self._writer.write(encode_frame({"id": request_id, "model": model, "payload": payload}, body))
+            await self._writer.drain()
+            response = await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+        return _raise_for(response)
+
+
+_clients = {}
+
+def client_for(path):
+    if path not in _clients:
+        _clients[path] = ModelServerClient(path)
+    return _clients[path]
+
+
+class RemoteModel:
+    """Stands in for a local MicroBatcher: `submit()` runs inference on the model server."""
+
+    def __init__(self, name, path=None):
+        self.name = name
+        self.path = path or MODEL_SERVER_SOCKETS[name]
+        self.client = client_for(self.path)
+
+    async def submit(self, item):
+        if isinstance(item, np.ndarray):
+            return await self.client.call(self.name, body=np.ascontiguousarray(item, dtype=np.float32).tobytes())
+        return await self.client.call(self.name, item)
+
+    def wait_ready(self, timeout=MODEL_SERVER_CONNECT_TIMEOUT_S):
+        """Block until the server has this model loaded and warm (a model registry loader).
+
+        Retries while the server is still starting; raises once `timeout` runs out.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(max(deadline - time.monotonic(), 0.1))
+                    sock.connect(self.path)
+                    sock.sendall(encode_frame({"id": 0, "model": self.name, "op": "ready"}))
+                    with sock.makefile("rb") as stream:
+                        (length,) = _LENGTH.unpack(stream.read(_LENGTH.size))
+                        response = json.loads(stream.read(length))
+                return _raise_for(response)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.5)
@@ -0,0 +1,106 @@
+# services/model_registry.py
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from config import MODEL_WARMUP_RUNS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelSlot:
+    name: str
+    loader: object
+    warmup: object = None
+    required: bool = True
+    state: str = "pending"  # pending -> loading -> warming -> ready, or failed
+    error: str | None = None
+    load_ms: float | None = None
+    warmup_ms: float | None = None
+    model: object = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class ModelRegistry:
+    """Loads models on first use, or ahead of time from the app lifespan.
+
+    Services register a loader (and optionally a warmup that runs a throwaway
+    inference) at import time, which costs nothing; the heavy imports and
+    weights load only when `get()` or `load_all()` is first called. `get()` is
+    blocking and thread-safe, so the worker threads that run inference call it
+    directly; if a background load is already under way they wait for it.
+    """
+
+    def __init__(self, warmup_runs=MODEL_WARMUP_RUNS):
+        self.warmup_runs = warmup_runs
+        self.slots = {}
+
+    def register(self, name, loader, warmup=None, required=True):
+        self.slots[name] = ModelSlot(name, loader, warmup, required)
+
+    def get(self, name):
+        slot = self.slots[name]
+        if slot.model is not None:
+            return slot.model
+        with slot.lock:
+            if slot.model is None:
+                self._load(slot)
+        return slot.model
+
+    def _load(self, slot):
+        try:
+            slot.state = "loading"
+            start = time.perf_counter()
+            model = slot.loader()
+            slot.load_ms = (time.perf_counter() - start) * 1000
+
+            if slot.warmup is not None and self.warmup_runs > 0:
+                # First inferences pay for lazy init (kernels, caches, JIT); pay it before traffic does
+                slot.state = "warming"
+                start = time.perf_counter()
+                for _ in range(self.warmup_runs):
+                    slot.warmup(model)
+                slot.warmup_ms = (time.perf_counter() - start) * 1000
+        except Exception as exc:
+            slot.state = "failed"
+            slot.error = f"{type(exc).__name__}: {exc}"
+            logger.exception("failed to load model %s", slot.name)
+            raise
+        slot.model = model
+        slot.state = "ready"
+        slot.error = None
+        logger.info("model %s ready (load %.0f ms, warmup %s ms)", slot.name, slot.load_ms,
+                    "-" if slot.warmup_ms is None else f"{slot.warmup_ms:.0f}")
+
+    async def load_all(self):
+        """Load and warm every registered model concurrently, each on its own thread."""
+        async def load(name):
+            try:
+                await asyncio.to_thread(self.get, name)
+            except Exception:
+                pass  # recorded on the slot and reported by status()
+
+        await asyncio.gather(*(load(name) for name in self.slots))
+
+    @property
+    def ready(self):
+        return all(slot.state == "ready" for slot in self.slots.values() if slot.required)
+
+    def status(self):
+        return {
+            name: {
+                "state": slot.state,
+                "required": slot.required,
+                "load_ms": None if slot.load_ms is None else round(slot.load_ms, 1),
+                "warmup_ms": None if slot.warmup_ms is None else round(slot.warmup_ms, 1),
+                "error": slot.error,
+            }
+            for name, slot in self.slots.items()
+        }
+
+
+registry = ModelRegistry()
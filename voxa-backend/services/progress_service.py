@@ -1,43 +1,26 @@
-import aiosqlite
+import base64
+import binascii
 import json
-from datetime import datetime
-
-DB_PATH = "data/user_sessions.db"
-
-async def init_db():
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Create base table if it doesn't exist
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                transcript TEXT,
-                grammar_feedback TEXT,
-                tone TEXT,
-                timestamp TEXT
-            )
-        """)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE,
-                password_hash TEXT
-            )
-        """)
-        await db.commit()
-
-        # Check for missing columns
-        cursor = await db.execute("PRAGMA table_info(sessions)")
-        columns = [row[1] for row in await cursor.fetchall()]
-
-        # Add missing columns if needed
-        if "user_id" not in columns:
-            await db.execute("ALTER TABLE sessions ADD COLUMN user_id TEXT")
-        if "difficulty" not in columns:
-            await db.execute("ALTER TABLE sessions ADD COLUMN difficulty TEXT")
-        await db.commit()
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, case, func, insert, select, tuple_
+from database import SessionLocal, upsert
+from models.progress import Progress
+from models.session import Session
+from config import (
+    PROGRESS_EMA_ALPHA,
+    SESSION_WRITE_DURABILITY,
+    SESSION_WRITE_MAX_BATCH,
+    SESSION_WRITE_MAX_WAIT_MS,
+    SESSION_WRITE_MAX_QUEUE,
+    SESSION_WRITE_RETRIES,
+    SESSION_WRITE_RETRY_BACKOFF_MS,
+)
+from services.metrics import timed
+from services.session_writer import SessionWriter
+from services.text_features import extract_features
 
 def estimate_difficulty(transcript: str, tone: str) -> str:
-    word_count = len(transcript.split())
+    word_count = extract_features(transcript).word_count
     if tone == "nervous" or word_count < 5:
         return "easy"
     elif word_count < 15:
@@ -45,35 +28,117 @@ def estimate_difficulty(transcript: str, tone: str) -> str:
     else:
         return "hard"
 
-async def log_session(user_id: str, transcript: str, grammar_feedback: list[str], tone: str):
-    await init_db()
-    difficulty = estimate_difficulty(transcript, tone)
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            INSERT INTO sessions (user_id, transcript, grammar_feedback, tone, difficulty, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            user_id,
-            transcript,
-            json.dumps(grammar_feedback),
-            tone,
-            difficulty,
-            datetime.utcnow().isoformat()
-        ))
-        await db.commit()
+def progress_upsert(db):
+    """INSERT ... ON CONFLICT that folds one session into its user's progress row.
 
-def score_session(transcript: str, grammar_feedback: list[str], tone: str):
-    grammar_score = max(0, 100 - len(grammar_feedback) * 20)
+    Levels follow 100 xp each; the streak counts consecutive UTC days with a
+    session; averages are exponential moving averages weighted by
+    PROGRESS_EMA_ALPHA. Every right-hand side reads the row as it was before
+    this session. Parameters come from progress_row().
+    """
+    stmt = upsert(db, Progress.__table__)
+    new = stmt.excluded
+
+    def average(column, score):
+        # Rows migrated from before the rollup have no average yet; this session starts it
+        previous = func.coalesce(column, score)
+        return previous + PROGRESS_EMA_ALPHA * (score - previous)
 
-    tone_map = {
-        "confident": 100,
-        "neutral": 70,
-        "nervous": 40,
-        "low_energy": 30
+    return stmt.on_conflict_do_update(
+        index_elements=[Progress.user_id],
+        set_={
+            "total_sessions": Progress.total_sessions + 1,
+            "xp": Progress.xp + new.xp,
+            "level": 1 + (Progress.xp + new.xp) // 100,
+            "streak": case(
+                (Progress.last_active == new.last_active, Progress.streak),
+                (Progress.last_active == bindparam("previous_day"), Progress.streak + 1),
+                else_=1,
+            ),
+            "last_active": case((new.last_active > Progress.last_active, new.last_active), else_=Progress.last_active),
+            "last_grammar_score": new.last_grammar_score,
+            "last_tone_score": new.last_tone_score,
+            "last_fluency_score": new.last_fluency_score,
+            "last_xp": new.last_xp,
+            "avg_grammar_score": average(Progress.avg_grammar_score, new.last_grammar_score),
+            "avg_tone_score": average(Progress.avg_tone_score, new.last_tone_score),
+            "avg_fluency_score": average(Progress.avg_fluency_score, new.last_fluency_score),
+        },
+    )
+
+def progress_row(user_id: str, created_at: datetime, scores: dict) -> dict:
+    day = created_at.date()
+    return {
+        "user_id": user_id,
+        "total_sessions": 1,
+        "xp": scores["xp"],
+        "level": 1 + scores["xp"] // 100,
+        "streak": 1,
+        "last_active": day.isoformat(),
+        "previous_day": (day - timedelta(days=1)).isoformat(),
+        "last_grammar_score": scores["grammar_score"],
+        "last_tone_score": scores["tone_score"],
+        "last_fluency_score": scores["fluency_score"],
+        "last_xp": scores["xp"],
+        "avg_grammar_score": scores["grammar_score"],
+        "avg_tone_score": scores["tone_score"],
+        "avg_fluency_score": scores["fluency_score"],
     }
-    tone_score = tone_map.get(tone.lower(), 50)
 
-    fluency_score = min(100, len(transcript.split()) * 2)
+@timed("db_write")
+async def write_sessions(records: list[dict]):
+    """Insert a batch of session rows and their progress upserts in one transaction."""
+    async with SessionLocal() as db:
+        await db.execute(insert(Session), records)
+        # Same transaction as the inserts, so the rollup never disagrees with the log
+        await db.execute(progress_upsert(db), [
+            progress_row(record["user_id"], record["created_at"], record) for record in records
+        ])
+        await db.commit()
+
+session_writer = SessionWriter(
+    write_sessions,
+    max_batch_size=SESSION_WRITE_MAX_BATCH,
+    max_wait_ms=SESSION_WRITE_MAX_WAIT_MS,
+    max_queue=SESSION_WRITE_MAX_QUEUE,
+    durability=SESSION_WRITE_DURABILITY,
+    retries=SESSION_WRITE_RETRIES,
+    retry_backoff_ms=SESSION_WRITE_RETRY_BACKOFF_MS,
+)
+
+async def log_session(user_id: str, transcript: str, grammar_feedback: list[str], tone: str,
+                      scores: dict | None = None, wait: bool | None = None):
+    """Queue a session for the write-behind logger.
+
+    Pass wait=True to return only once the row is committed, e.g. before reading it back.
+    """
+    # Scores are stored with the row so history reads never recompute them
+    scores = scores or score_session(transcript, grammar_feedback, tone)
+    await session_writer.write({
+        "user_id": user_id,
+        "transcript": transcript,
+        "grammar_feedback": grammar_feedback,
+        "tone": tone,
+        "difficulty": estimate_difficulty(transcript, tone),
+        # Taken at call time, not flush time, so history order follows the turns
+        "created_at": datetime.utcnow(),
+        "grammar_score": scores["grammar_score"],
+        "tone_score": scores["tone_score"],
+        "fluency_score": scores["fluency_score"],
+        "xp": scores["xp"]
+    }, wait=wait)
+
+TONE_SCORES = {
+    "confident": 100,
+    "neutral": 70,
+    "nervous": 40,
+    "low_energy": 30
+}
+
+def score_session(transcript: str, grammar_feedback: list[str], tone: str):
+    grammar_score = max(0, 100 - len(grammar_feedback) * 20)
+    tone_score = TONE_SCORES.get(tone.lower(), 50)
+    fluency_score = min(100, extract_features(transcript).word_count * 2)
     xp = int((grammar_score + tone_score + fluency_score) / 3)
 
     return {
@@ -83,68 +148,113 @@ def score_session(transcript: str, grammar_feedback: list[str], tone: str):
         "xp": xp
     }
 
-async def get_progress(user_id: str):
-    await init_db()
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute("""
-            SELECT transcript, grammar_feedback, tone
-            FROM sessions
-            WHERE user_id = ?
-            ORDER BY timestamp DESC
-            LIMIT 1
-        """, (user_id,))
-        row = await cursor.fetchone()
-
-        if row:
-            transcript, grammar_feedback_json, tone = row
-            try:
-                grammar_feedback = json.loads(grammar_feedback_json)
-            except (json.JSONDecodeError, TypeError):
-                grammar_feedback = []
-            scores = score_session(transcript, grammar_feedback, tone)
-        else:
-            scores = {
-                "grammar_score": 0,
-                "tone_score": 0,
-                "fluency_score": 0,
-                "xp": 0
-            }
-
-        cursor = await db.execute("SELECT COUNT(*) FROM sessions WHERE user_id = ?", (user_id,))
-        total_sessions = (await cursor.fetchone())[0]
+def rounded(average):
+    # NULL until a migrated user's first session since the rollup was added
+    return None if average is None else round(average, 1)
 
+@timed("progress_read")
+async def get_progress(db, user_id: str):
+    row = await db.get(Progress, user_id)
+
+    if row is None:
         return {
-            "total_sessions": total_sessions,
-            "latest_scores": scores
+            "total_sessions": 0,
+            "xp": 0,
+            "level": 1,
+            "streak": 0,
+            "last_active": None,
+            "latest_scores": {"grammar_score": 0, "tone_score": 0, "fluency_score": 0, "xp": 0},
+            "average_scores": {"grammar_score": 0, "tone_score": 0, "fluency_score": 0}
+        }
+
+    return {
+        "total_sessions": row.total_sessions,
+        "xp": row.xp,
+        "level": row.level,
+        "streak": row.streak,
+        "last_active": row.last_active,
+        "latest_scores": {
+            "grammar_score": row.last_grammar_score,
+            "tone_score": row.last_tone_score,
+            "fluency_score": row.last_fluency_score,
+            "xp": row.last_xp
+        },
+        "average_scores": {
+            "grammar_score": rounded(row.avg_grammar_score),
+            "tone_score": rounded(row.avg_tone_score),
+            "fluency_score": rounded(row.avg_fluency_score)
         }
+    }
+
+# Public history field -> the columns it is built from
+HISTORY_FIELDS = {
+    "transcript": ["transcript"],
+    "grammar_feedback": ["grammar_feedback"],
+    "tone": ["tone"],
+    "difficulty": ["difficulty"],
+    "timestamp": ["created_at"],
+    "scores": ["grammar_score", "tone_score", "fluency_score", "xp"],
+    "xp": ["xp"],
+}
+DEFAULT_HISTORY_FIELDS = ["transcript", "tone", "difficulty", "timestamp", "scores", "xp"]
+MAX_HISTORY_PAGE = 200
+MAX_CURSOR_LENGTH = 256  # encode_cursor() output is well under this
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at.isoformat(), row_id]).encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def parse_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return DEFAULT_HISTORY_FIELDS
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown history fields: {', '.join(unknown)}")
+    return selected
+
+@timed("history_read")
+async def get_history(db, user_id: str, limit: int = 50, cursor: str | None = None, fields: str | None = None):
+    """One page of a user's sessions, newest first.
+
+    Pages are addressed by a keyset cursor on (created_at, id) and served from the
+    (user_id, created_at, id) index, so a page costs the same however long the
+    history is. Returns {"items": [...], "next_cursor": str | None}.
+    """
+    selected = parse_fields(fields)
+    limit = max(1, min(limit, MAX_HISTORY_PAGE))
+    columns = list(dict.fromkeys(["id", "created_at"] + [c for f in selected for c in HISTORY_FIELDS[f]]))
+
+    query = select(*(getattr(Session, c) for c in columns)).where(Session.user_id == user_id)
+    if cursor:
+        query = query.where(tuple_(Session.created_at, Session.id) < tuple_(*decode_cursor(cursor)))
+    query = query.order_by(Session.created_at.desc(), Session.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    items = []
+    for row in rows[:limit]:
+        record = row._mapping
+        item = {}
+        for field in selected:
+            if field == "scores":
+                item["scores"] = {c: record[c] for c in HISTORY_FIELDS["scores"]}
+            elif field == "grammar_feedback":
+                item["grammar_feedback"] = record["grammar_feedback"] or []
+            elif field == "timestamp":
+                item["timestamp"] = record["created_at"].isoformat()
+            else:
+                item[field] = record[field]
+        items.append(item)
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.created_at, last.id)
 
-async def get_history(user_id: str):
-    await init_db()
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute("""
-            SELECT transcript, grammar_feedback, tone, difficulty, timestamp
-            FROM sessions
-            WHERE user_id = ?
-            ORDER BY timestamp DESC
-        """, (user_id,))
-        rows = await cursor.fetchall()
-
-        history = []
-        for row in rows:
-            transcript, grammar_feedback_json, tone, difficulty, timestamp = row
-            try:
-                grammar_feedback = json.loads(grammar_feedback_json)
-            except (json.JSONDecodeError, TypeError):
-                grammar_feedback = []
-            scores = score_session(transcript, grammar_feedback, tone)
-
-            history.append({
-                "transcript": transcript,
-                "tone": tone,
-                "difficulty": difficulty,
-                "timestamp": timestamp,
-                "scores": scores,
-                "xp": scores["xp"]
-            })
-
-        return history
\ No newline at end of file
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,23 +1,37 @@
+from datetime import datetime, timezone
+from database import upsert
+from models.progress import Progress
 from models.progress_model import UserProgress
-from database import SessionLocal
 
-def save_user_progress(user_id: str, transcript: str, feedback: dict, metrics: dict):
-    db = SessionLocal()
+async def save_user_progress(db, user_id: str, transcript: str, feedback: dict, metrics: dict):
     xp = metrics.get("xp", 0)
+    now = datetime.now(timezone.utc)
 
-    # Get latest progress
-    previous = db.query(UserProgress).filter_by(user_id=user_id).order_by(UserProgress.timestamp.desc()).first()
-    total_xp = (previous.xp if previous else 0) + xp
-    level = 1 + (total_xp // 100)
+    # Bump the running total atomically and read it back in one statement,
+    # instead of reading the latest row and adding to it
+    stmt = upsert(db, Progress.__table__).values(
+        user_id=user_id, total_sessions=1, xp=xp, level=1 + xp // 100, last_active=now.date().isoformat()
+    )
+    total_xp, level = (await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Progress.user_id],
+            set_={
+                "total_sessions": Progress.total_sessions + 1,
+                "xp": Progress.xp + xp,
+                "level": 1 + (Progress.xp + xp) // 100,
+                "last_active": now.date().isoformat(),
+            },
+        )
+        .returning(Progress.xp, Progress.level)
+    )).one()
 
-    progress = UserProgress(
+    db.add(UserProgress(
         user_id=user_id,
+        timestamp=now,
         transcript=transcript,
         feedback=feedback,
         metrics=metrics,
         xp=total_xp,
         level=level
-    )
-    db.add(progress)
-    db.commit()
-    db.close()
\ No newline at end of file
+    ))
+    await db.commit()
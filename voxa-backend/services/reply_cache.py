@@ -0,0 +1,34 @@
+# services/reply_cache.py
+
+from config import LLM_MODEL, REPLY_CACHE_SIZE, REPLY_CACHE_TTL_SECONDS, REPLY_CACHE_HISTORY_TURNS
+from services.cache import LRUCache, SingleFlight
+from services.llm_service import generate
+from services.text_features import normalize_line
+
+# Scenario practice repeats itself: the same opening lines in the same scenario get the same reply
+reply_cache = LRUCache(maxsize=REPLY_CACHE_SIZE, ttl=REPLY_CACHE_TTL_SECONDS, name="llm_reply")
+_generations = SingleFlight("llm_reply")
+
+def reply_key(scenario_id, history, transcript):
+    tail = history[-2 * REPLY_CACHE_HISTORY_TURNS:] if REPLY_CACHE_HISTORY_TURNS else []
+    return (LLM_MODEL, scenario_id, tuple(normalize_line(line) for line in tail), normalize_line(transcript))
+
+async def generate_reply(key, prompt, context=None):
+    """Return (reply, context), reusing a cached reply or an identical generation in flight.
+
+    A reused reply comes without context: the context tokens describe the
+    conversation that generated it, so the caller has to rebuild its next prompt.
+    """
+    reply = reply_cache.get(key)
+    if reply is not None:
+        return reply, None
+
+    own = {}
+
+    async def run():
+        reply, own["context"] = await generate(prompt, context)
+        reply_cache.set(key, reply)
+        return reply
+
+    reply = await _generations.do(key, run)
+    return reply, own.get("context")
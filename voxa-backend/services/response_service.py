@@ -1,24 +1,12 @@
 import random
 from models.scenario import AIResponse, Feedback
+from services.scenario_engine import scenario_engine
 
-def generate_ai_response(transcript: str, scenario_id: str, history: list) -> AIResponse:
-    transcript = transcript.lower()
-    progress = 10
-    reply = "Thanks for your message. Let’s keep going!"
-
-    if scenario_id == "coffee_shop":
-        if "cappuccino" in transcript:
-            reply = "Sure! Would you like that hot or iced?"
-            progress = 25
-        elif "hot" in transcript or "iced" in transcript:
-            reply = "Great. Any milk preference?"
-            progress = 50
-        elif "oat" in transcript or "almond" in transcript:
-            reply = "We’re out of oat milk — would almond work?"
-            progress = 75
-        else:
-            reply = "Perfect! That’ll be $4.50. Anything else?"
-            progress = 100
+def generate_ai_response(transcript: str, scenario_id: str, history: list, conversation_id: str | None = None) -> AIResponse:
+    # Scripted replies come from scenarios/*.json; anything unscripted gets a generic nudge
+    rule = scenario_engine.respond(scenario_id, transcript, conversation_id, history)
+    reply = rule.reply if rule else "Thanks for your message. Let’s keep going!"
+    progress = rule.progress if rule else 10
 
     feedback = Feedback(
         tone=random.choice(["confident", "friendly", "neutral"]),
@@ -28,4 +16,4 @@ def generate_ai_response(transcript: str, scenario_id: str, history: list) -> AI
         grammar=random.choice(["perfect", "minor issues", "needs improvement"])
     )
 
-    return AIResponse(reply=reply, feedback=feedback, progress=progress)
\ No newline at end of file
+    return AIResponse(reply=reply, feedback=feedback, progress=progress)
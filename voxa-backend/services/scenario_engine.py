@@ -0,0 +1,276 @@
+# services/scenario_engine.py
+
+"""Scripted role-play scenarios, loaded from declarative JSON files.
+
+A scenario is a small state machine. Each state has ordered rules, followed by the
+scenario-wide rules, and a default reply for turns that match none of them:
+
+    {
+      "id": "bakery",
+      "match": "words",
+      "initial": "ordering",
+      "default": {"reply": "...", "progress": 100},
+      "rules": [{"triggers": ["bagel", "croissant"], "reply": "...", "progress": 25, "next": "toasted"}],
+      "states": {"ordering": {"rules": [...], "default": {...}}, "toasted": {}}
+    }
+
+Every trigger phrase of a scenario is compiled into one Aho-Corasick automaton,
+so matching a turn costs time proportional to its length, however many rules there are.
+Triggers match whole words, ignoring case and punctuation; "match": "substring"
+lets them match inside words too, as the old hard-coded chains did.
+
+Files are read on first use and re-checked for changes at most every
+VOXA_SCENARIO_RELOAD_INTERVAL seconds after that, so nothing polls the
+directory while no scenario is being played.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from config import (
+    SCENARIO_DIR,
+    SCENARIO_RELOAD_INTERVAL_S,
+    CONVERSATION_MAX,
+    CONVERSATION_TTL_SECONDS,
+)
+from services.cache import LRUCache
+from services.text_features import normalize_line
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioError(ValueError):
+    pass
+
+
+class Automaton:
+    """Aho-Corasick matcher: yields the value of every phrase found in a text, in one pass."""
+
+    def __init__(self, phrases):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase, value in phrases:
+            node = 0
+            for char in phrase:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = self._goto[node][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = child
+            self._out[node].append(value)
+
+        # Breadth-first, so every node's failure link is final before its children need it
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def __len__(self):
+        return len(self._goto)
+
+    def matches(self, text):
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            yield from self._out[node]
+
+
+def _words(text):
+    # Padding with spaces makes every match a whole-word match
+    return f" {normalize_line(text)} "
+
+_MATCHERS = {"words": _words, "substring": normalize_line}
+
+
+@dataclass(frozen=True)
+class Rule:
+    reply: str
+    progress: int
+    next: str | None = None  # None stays in the current state
+
+
+class Scenario:
+    def __init__(self, scenario_id, initial, rules, states, automaton, text=_words):
+        self.id = scenario_id
+        self.initial = initial
+        self.rules = rules  # every rule in the file, indexed by the automaton's values
+        self.states = states  # state -> ({rule index: priority}, default rule)
+        self.automaton = automaton
+        self.text = text  # normalizes triggers and turns alike
+
+    def step(self, state, transcript):
+        """Return (rule, next state) for one turn in `state`."""
+        if state not in self.states:
+            state = self.initial
+        priorities, default = self.states[state]
+        best = None
+        for index in self.automaton.matches(self.text(transcript)):
+            priority = priorities.get(index)
+            if priority is not None and (best is None or priority < priorities[best]):
+                best = index
+        rule = self.rules[best] if best is not None else default
+        return rule, rule.next or state
+
+
+def _rule(spec, states, where):
+    if not isinstance(spec, dict) or not isinstance(spec.get("reply"), str):
+        raise ScenarioError(f"{where}: needs a reply")
+    next_state = spec.get("next")
+    if next_state is not None and next_state not in states:
+        raise ScenarioError(f"{where}: unknown next state '{next_state}'")
+    return Rule(spec["reply"], int(spec.get("progress", 0)), next_state)
+
+def compile_scenario(spec):
+    """Build a Scenario from its parsed JSON, raising ScenarioError on anything malformed."""
+    states = spec.get("states") or {}
+    scenario_id = spec.get("id")
+    if not scenario_id or not isinstance(states, dict) or spec.get("initial") not in states:
+        raise ScenarioError("needs an id, states and an initial state among them")
+    if "default" not in spec:
+        raise ScenarioError("needs a default reply")
+    text = _MATCHERS.get(spec.get("match", "words"))
+    if text is None:
+        raise ScenarioError(f"match must be one of {', '.join(_MATCHERS)}")
+    default = _rule(spec["default"], states, "default")
+
+    rules, phrases = [], []
+
+    def add_rules(specs, where):
+        indexes = []
+        for i, rule_spec in enumerate(specs):
+            triggers = [text(t) for t in rule_spec.get("triggers", []) if isinstance(t, str)]
+            if not any(t.strip() for t in triggers):
+                raise ScenarioError(f"{where}[{i}]: needs at least one trigger")
+            index = len(rules)
+            rules.append(_rule(rule_spec, states, f"{where}[{i}]"))
+            phrases.extend((trigger, index) for trigger in triggers if trigger.strip())
+            indexes.append(index)
+        return indexes
+
+    shared = add_rules(spec.get("rules", []), "rules")
+    compiled_states = {}
+    for name, state in states.items():
+        state = state or {}
+        # A state's own rules take precedence over the scenario-wide ones, each in file order
+        order = add_rules(state.get("rules", []), f"states.{name}.rules") + shared
+        state_default = _rule(state["default"], states, f"states.{name}.default") if "default" in state else default
+        compiled_states[name] = ({index: priority for priority, index in enumerate(order)}, state_default)
+
+    return Scenario(scenario_id, spec["initial"], rules, compiled_states, Automaton(phrases), text)
+
+
+class ScenarioEngine:
+    """Compiled scenarios from `directory`, plus the state each conversation is in.
+
+    Reloading compiles changed files off to the side and swaps the result in whole,
+    so a turn always sees one consistent set of scenarios.
+    """
+
+    def __init__(self, directory=SCENARIO_DIR):
+        self.directory = directory
+        self.scenarios = {}
+        self._files = {}  # path -> (mtime, size, scenario); last good version of each file
+        self._checked_at = None  # monotonic time of the last reload
+        # Keyed by (conversation id, scenario id); idle conversations age out with the conversation store
+        self._states = LRUCache(maxsize=CONVERSATION_MAX, ttl=CONVERSATION_TTL_SECONDS)
+
+    def _paths(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(os.path.join(self.directory, name) for name in names if name.endswith(".json"))
+
+    def reload(self):
+        """Compile new and changed files; return True when the set of scenarios changed."""
+        self._checked_at = time.monotonic()
+        files = {}
+        changed = False
+        for path in self._paths():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            previous = self._files.get(path)
+            if previous is not None and previous[:2] == (stat.st_mtime, stat.st_size):
+                files[path] = previous
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    scenario = compile_scenario(json.load(f))
+            except Exception as e:
+                # Mid-edit or broken: keep serving the last version that compiled
+                logger.error("Scenario %s not loaded: %s", path, e)
+                if previous is not None:
+                    files[path] = previous
+                continue
+            files[path] = (stat.st_mtime, stat.st_size, scenario)
+            changed = True
+        changed = changed or files.keys() != self._files.keys()
+
+        if changed:
+            scenarios = {}
+            for path, (_, _, scenario) in files.items():
+                if scenario.id in scenarios:
+                    logger.error("Scenario %s in %s is already defined; skipped", scenario.id, path)
+                    continue
+                scenarios[scenario.id] = scenario
+            self.scenarios = scenarios
+            logger.info("Loaded %d scenarios from %s", len(scenarios), self.directory)
+        self._files = files
+        return changed
+
+    def get(self, scenario_id):
+        if self._checked_at is None or (
+                SCENARIO_RELOAD_INTERVAL_S > 0 and time.monotonic() - self._checked_at >= SCENARIO_RELOAD_INTERVAL_S):
+            try:
+                self.reload()
+            except Exception:
+                logger.exception("Scenario reload failed")
+        return self.scenarios.get(scenario_id)
+
+    def respond(self, scenario_id, transcript, conversation_id=None, history=()):
+        """Return the matched Rule for this turn, or None if `scenario_id` isn't scripted.
+
+        With a conversation id the state carries over between turns; without one it is
+        rebuilt by replaying the customer's lines in `history` (alternating with replies).
+        """
+        scenario = self.get(scenario_id)
+        if scenario is None:
+            return None
+        key = (conversation_id, scenario_id)
+        state = self._states.get(key) if conversation_id else None
+        if state is None:
+            state = scenario.initial
+            for line in history[0::2]:
+                _, state = scenario.step(state, line)
+        rule, state = scenario.step(state, transcript)
+        if conversation_id:
+            self._states.set(key, state)
+        return rule
+
+    def stats(self):
+        return {
+            "scenarios": len(self.scenarios),
+            "rules": sum(len(s.rules) for s in self.scenarios.values()),
+            "conversations": len(self._states),
+        }
+
+
+scenario_engine = ScenarioEngine()
@@ -0,0 +1,134 @@
+# services/session_writer.py
+
+import asyncio
+import logging
+import time
+
+from services import metrics
+from services.batching import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("buffered", "commit")
+
+
+class SessionWriter(MicroBatcher):
+    """Write-behind queue that turns many small session writes into few transactions.
+
+    `write_batch` is an async callable that writes and commits a list of records
+    in one transaction. Batches are collected as in MicroBatcher: flushed once one
+    holds `max_batch_size` records or `max_wait_ms` after its first record arrived,
+    so under load one commit (and one fsync) covers many turns. Flushes run one
+    at a time, in queue order.
+
+    With durability "buffered", write() returns as soon as the record is queued,
+    and a crash can lose the records still in the queue. With "commit", write()
+    returns only after the batch holding its record has committed. Concurrent
+    writers still share that batch's transaction.
+
+    A failed batch is retried `retries` times, backing off from `retry_backoff_ms`.
+    Records that still fail are counted in voxa_session_rows_dropped_total.
+    """
+
+    def __init__(self, write_batch, max_batch_size=256, max_wait_ms=50.0, max_queue=10000,
+                 durability="buffered", retries=3, retry_backoff_ms=100.0, name="session_writer"):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}, got {durability!r}")
+        super().__init__(None, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                         max_queue=max_queue, workers=1, name=name)
+        self.write_batch = write_batch
+        self.durability = durability
+        self.retries = retries
+        self.retry_backoff = retry_backoff_ms / 1000
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    async def write(self, record, wait=None):
+        """Queue a record. Waits for its commit when `wait` is true, or by default in "commit" mode."""
+        self._ensure_started()
+        if wait is None:
+            wait = self.durability == "commit"
+        future = self._loop.create_future() if wait else None
+        # A full queue means the database is falling behind; make writers wait rather than drop rows
+        await self._queue.put((record, future))
+        if future is not None:
+            await future
+
+    async def flush(self):
+        """Return once every record queued before this call has been written."""
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return
+        if self._collector.done():
+            return
+        future = self._loop.create_future()
+        await self._queue.put((None, future))
+        await future
+
+    async def _write(self, records):
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.write_batch(records)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                self.retried += len(records)
+                logger.warning("%s failed to write %d record(s); retrying", self.name, len(records), exc_info=True)
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def _run(self, batch):
+        # Flush barriers carry no record, only a future to resolve
+        records = [record for record, _ in batch if record is not None]
+        error = None
+        try:
+            if records:
+                metrics.batch_size.labels(self.name).observe(len(records))
+                start = time.perf_counter()
+                try:
+                    await self._write(records)
+                except Exception as exc:
+                    error = exc
+                    self.failed += len(records)
+                    metrics.rows_dropped.labels(self.name).inc(len(records))
+                    logger.exception("%s dropped %d record(s) after %d retries", self.name, len(records), self.retries)
+                else:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    self.written += len(records)
+                    self.flushes += 1
+                    self.last_flush_ms = elapsed_ms
+                    self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                    self._total_flush_ms += elapsed_ms
+
+            for record, future in batch:
+                if future is None or future.done():
+                    continue
+                if error is not None and record is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "durability": self.durability,
+            "queue_depth": self.queue_depth,
+            "written": self.written,
+            "retried": self.retried,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "avg_batch_size": round(self.written / self.flushes, 1) if self.flushes else 0.0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+    async def close(self):
+        """Flush whatever is queued, then stop the background writer."""
+        await self.flush()
+        await super().close()
+        self._collector = None
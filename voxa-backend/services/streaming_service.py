@@ -0,0 +1,141 @@
+# services/streaming_service.py
+
+import numpy as np
+
+from services.audio_service import SAMPLE_RATE
+
+MAX_SAMPLE_RATE = 192000
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    """Convert little-endian 16-bit mono PCM into a float32 array in [-1, 1)."""
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+class PcmDecoder:
+    """Decodes a stream of PCM chunks into the 16 kHz float32 audio Whisper expects.
+
+    WebSocket frames can split a 16-bit sample, so an odd trailing byte is carried
+    over to the next chunk. Other rates are resampled by linear interpolation as one
+    continuous signal: the last input sample and the fractional position of the next
+    output sample carry over too, so chunk boundaries add no error.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        if not 0 < sample_rate <= MAX_SAMPLE_RATE:
+            raise ValueError(f"sample_rate must be in 1..{MAX_SAMPLE_RATE}, got {sample_rate}")
+        self.sample_rate = sample_rate
+        self._step = sample_rate / SAMPLE_RATE  # input samples per output sample
+        self._remainder = b""
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._position = 0.0  # of the next output sample, counted from the start of _tail
+
+    def decode(self, data: bytes) -> np.ndarray:
+        data = self._remainder + data
+        whole = len(data) - len(data) % 2
+        self._remainder = data[whole:]
+        audio = pcm16_to_float32(data[:whole])
+        if self.sample_rate == SAMPLE_RATE:
+            return audio
+
+        source = np.concatenate([self._tail, audio])
+        last = len(source) - 1
+        count = int((last - self._position) // self._step) + 1 if last >= self._position else 0
+        positions = self._position + self._step * np.arange(count)
+        self._tail = source[-1:]
+        self._position += self._step * count - max(last, 0)
+        return np.interp(positions, np.arange(len(source)), source).astype(np.float32)
+
+
+class VadSegmenter:
+    """Energy-based voice activity segmentation for a live audio stream.
+
+    Audio is scored in fixed-size frames by RMS energy. A segment opens on the
+    first voiced frame (keeping a short pre-roll so word onsets are not clipped)
+    and closes after `min_silence_ms` of silence or once it reaches
+    `max_segment_s`. While a segment is open, `feed` also emits a partial every
+    `partial_interval_ms` of new audio so callers can show text mid-utterance.
+    """
+
+    def __init__(self, frame_ms=30, energy_threshold=0.01, min_silence_ms=600,
+                 min_speech_ms=200, max_segment_s=15.0, partial_interval_ms=1000,
+                 pre_roll_ms=200):
+        self.frame_len = SAMPLE_RATE * frame_ms // 1000
+        self.energy_threshold = energy_threshold
+        self.min_silence_frames = max(1, min_silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_segment_frames = int(max_segment_s * 1000 // frame_ms)
+        self.partial_interval_frames = max(1, partial_interval_ms // frame_ms)
+        self.pre_roll_frames = pre_roll_ms // frame_ms
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pre_roll = []
+        self._segment = []
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._frames_since_partial = 0
+        self.segment_id = 0
+
+    @property
+    def in_speech(self):
+        return bool(self._segment)
+
+    def feed(self, audio: np.ndarray):
+        """Consume float32 samples and return a list of ("partial" | "final", segment_id, audio) events."""
+        events = []
+        buffer = np.concatenate([self._pending, audio])
+        n_frames = len(buffer) // self.frame_len
+        self._pending = buffer[n_frames * self.frame_len:]
+        if not n_frames:
+            return events
+
+        frames = buffer[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        voiced = np.sqrt(np.mean(frames ** 2, axis=1)) >= self.energy_threshold
+
+        for frame, is_voiced in zip(frames, voiced):
+            if not self._segment:
+                if is_voiced:
+                    self._segment = self._pre_roll + [frame]
+                    self._pre_roll = []
+                    self._speech_frames = 1
+                    self._silence_frames = 0
+                    self._frames_since_partial = 1
+                elif self.pre_roll_frames:
+                    self._pre_roll = (self._pre_roll + [frame])[-self.pre_roll_frames:]
+                continue
+
+            self._segment.append(frame)
+            self._frames_since_partial += 1
+            if is_voiced:
+                self._speech_frames += 1
+                self._silence_frames = 0
+            else:
+                self._silence_frames += 1
+
+            if self._silence_frames >= self.min_silence_frames or len(self._segment) >= self.max_segment_frames:
+                event = self._close_segment()
+                if event:
+                    events.append(event)
+            elif self._frames_since_partial >= self.partial_interval_frames:
+                self._frames_since_partial = 0
+                if self._speech_frames >= self.min_speech_frames:
+                    events.append(("partial", self.segment_id, np.concatenate(self._segment)))
+        return events
+
+    def flush(self):
+        """Close any open segment at end of stream."""
+        if self._pending.size and self._segment:
+            self._segment.append(self._pending)
+        self._pending = np.zeros(0, dtype=np.float32)
+        event = self._close_segment()
+        return [event] if event else []
+
+    def _close_segment(self):
+        segment, speech_frames = self._segment, self._speech_frames
+        self._segment = []
+        self._speech_frames = 0
+        self._silence_frames = 0
+        if not segment or speech_frames < self.min_speech_frames:
+            return None
+        event = ("final", self.segment_id, np.concatenate(segment))
+        self.segment_id += 1
+        return event
@@ -0,0 +1,79 @@
+# services/text_features.py
+
+from dataclasses import dataclass
+from functools import lru_cache
+import re
+
+import numpy as np
+
+FILLER_WORDS = ["um", "uh", "like", "you know", "so", "actually"]
+EMPATHY_KEYWORDS = ["sorry", "understand", "feel", "appreciate", "thank", "hope"]
+
+def _alternation(words):
+    # Longest first so multi-word fillers win over their first word
+    return "|".join(r"\s+".join(map(re.escape, w.split())) for w in sorted(words, key=len, reverse=True))
+
+# One alternation scanned left to right: every token is classified in a single pass.
+# Empathy keywords match as word prefixes ("thanks", "feeling"); fillers must be whole words,
+# so "so" no longer fires inside "also".
+_TOKEN_RE = re.compile(
+    rf"(?P<empathy>\b(?P<stem>{_alternation(EMPATHY_KEYWORDS)})[\w'’-]*)"
+    rf"|(?P<filler>\b(?:{_alternation(FILLER_WORDS)})\b)"
+    r"|(?P<word>\w[\w'’-]*)"
+    r"|(?P<end>[.!?])"
+)
+
+_SENTENCE_RE = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+_PUNCTUATION_RE = re.compile(r"[^\w\s']")
+
+
+@dataclass(frozen=True)
+class TextFeatures:
+    word_count: int
+    sentence_count: int
+    filler_hits: int
+    empathy_hits: int  # distinct empathy keywords present
+
+    @property
+    def avg_sentence_length(self) -> float:
+        return self.word_count / max(1, self.sentence_count)
+
+
+@lru_cache(maxsize=4096)
+def extract_features(text: str) -> TextFeatures:
+    """Tokenize a transcript once; repeated calls for the same text are free."""
+    words = sentences = fillers = 0
+    empathy = set()
+    for match in _TOKEN_RE.finditer(text.lower()):
+        kind = match.lastgroup
+        if kind == "end":
+            sentences += 1
+        elif kind == "filler":
+            fillers += 1
+            words += len(match.group().split())
+        else:
+            if kind == "empathy":
+                empathy.add(match.group("stem"))
+            words += 1
+    return TextFeatures(words, sentences, fillers, len(empathy))
+
+def extract_features_batch(texts) -> dict[str, np.ndarray]:
+    """Features for many transcripts at once, as parallel integer arrays."""
+    features = [extract_features(text) for text in texts]
+    counts = np.array(
+        [(f.word_count, f.sentence_count, f.filler_hits, f.empathy_hits) for f in features],
+        dtype=np.int64,
+    ).reshape(-1, 4)
+    return {
+        "word_count": counts[:, 0],
+        "sentence_count": counts[:, 1],
+        "filler_hits": counts[:, 2],
+        "empathy_hits": counts[:, 3],
+    }
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_RE.findall(text) if s.strip()]
+
+def normalize_line(text: str) -> str:
+    # Whisper punctuates and capitalizes the same words differently from take to take
+    return " ".join(_PUNCTUATION_RE.sub(" ", text.lower().replace("’", "'")).split())
@@ -1,16 +1,103 @@
-import edge_tts
+import abc
 import asyncio
-import uuid
-import os
+import hashlib
+import json
 
-OUTPUT_DIR = "static/responses"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+from config import TTS_BACKEND, TTS_STREAM_CONCURRENCY
+from services.audio_store import audio_store, AudioEntry
+from services.cache import SingleFlight
+from services.metrics import timed
+from services.text_features import split_sentences
+
+
+class TTSBackend(abc.ABC):
+    """Turns text into MP3 bytes."""
+
+    @abc.abstractmethod
+    async def synthesize(self, text: str, voice: str) -> bytes:
+        """MP3 audio of `text` spoken in `voice`."""
+
+
+class EdgeTTSBackend(TTSBackend):
+    async def synthesize(self, text, voice):
+        import edge_tts
+
+        communicate = edge_tts.Communicate(text, voice)
+        chunks = [chunk["data"] async for chunk in communicate.stream() if chunk["type"] == "audio"]
+        return b"".join(chunks)
+
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz frame with an all-zero body: decodes as ~26 ms of silence
+SILENT_MP3_FRAME = b"\xff\xfb\x90\x64" + bytes(413)
+
+class StubTTSBackend(TTSBackend):
+    """Offline backend for tests and benchmarks: deterministic silence, optional fake latency."""
+
+    def __init__(self, latency_ms: float = 0):
+        self.latency_ms = latency_ms
+
+    async def synthesize(self, text, voice):
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return SILENT_MP3_FRAME * (10 + len(text) // 4)
+
+
+BACKENDS = {"edge": EdgeTTSBackend, "stub": StubTTSBackend}
+backend = BACKENDS[TTS_BACKEND]()
+
+def set_backend(new_backend: TTSBackend):
+    global backend
+    backend = new_backend
+
+def cache_key(text: str, voice: str) -> str:
+    # JSON keeps the fields apart even if a voice name contains the separator
+    return hashlib.sha256(json.dumps([voice, text]).encode()).hexdigest()[:32]
+
+# Popular replies are often requested by several users at once; each clip is synthesized once
+_syntheses = SingleFlight("tts")
+
+async def _synthesize(key, text, voice):
+    data = await backend.synthesize(text, voice)
+    return await audio_store.put(key, data, meta={"voice": voice, "chars": len(text)})
+
+@timed("tts")
+async def synthesize_cached(text: str, voice: str) -> AudioEntry:
+    """Return the stored clip for (text, voice), synthesizing it only on a cache miss."""
+    # Whitespace doesn't change the speech, so it doesn't split the cache
+    text = " ".join(text.split())
+    key = cache_key(text, voice)
+    entry = audio_store.lookup(key)
+    if entry is not None:
+        return entry
+    return await _syntheses.do(key, lambda: _synthesize(key, text, voice))
 
 async def generate_tts(text: str, voice: str = "en-US-JennyNeural"):
-    filename = f"{uuid.uuid4()}.mp3"
-    filepath = os.path.join(OUTPUT_DIR, filename)
+    entry = await synthesize_cached(text, voice)
+    return audio_store.url_for(entry)
+
+async def stream_tts(text: str, voice: str = "en-US-JennyNeural"):
+    """Yield MP3 bytes sentence by sentence, in order.
+
+    Sentences are synthesized a few at a time ahead of the one being sent, so the
+    first sentence's audio goes out without waiting for the rest of the reply.
+    MP3 frames concatenate cleanly, so the stream plays as one clip.
+    """
+    sentences = split_sentences(text) or [text]
+    window = asyncio.Semaphore(TTS_STREAM_CONCURRENCY)
+
+    async def synthesize(sentence):
+        async with window:
+            entry = await synthesize_cached(sentence, voice)
+        return await asyncio.to_thread(_read_bytes, entry.path)
 
-    communicate = edge_tts.Communicate(text, voice)
-    await communicate.save(filepath)
+    tasks = [asyncio.ensure_future(synthesize(sentence)) for sentence in sentences]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
 
-    return f"/static/responses/{filename}"
\ No newline at end of file
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
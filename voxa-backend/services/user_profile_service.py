@@ -1,32 +1,56 @@
-import json
-import os
+from sqlalchemy import update
 
-PROFILE_PATH = "data/user_profile.json"
+from config import PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_SECONDS
+from models.user import User
+from services.cache import LRUCache
 
-def init_profile():
-    if not os.path.exists(PROFILE_PATH):
-        default_profile = {
-            "preferred_voice": "en-US-JennyNeural",
-            "baseline_tone": "neutral"
-        }
-        with open(PROFILE_PATH, "w") as f:
-            json.dump(default_profile, f)
+DEFAULT_PROFILE = {
+    "preferred_voice": "en-US-JennyNeural",
+    "baseline_tone": "neutral"
+}
 
-def get_profile():
-    init_profile()
-    with open(PROFILE_PATH, "r") as f:
-        return json.load(f)
+profile_cache = LRUCache(maxsize=PROFILE_CACHE_SIZE, name="profile", ttl=PROFILE_CACHE_TTL_SECONDS)
 
-def update_profile(preferred_voice=None, baseline_tone=None):
-    init_profile()
-    profile = get_profile()
+async def get_profile(db, user_id: int):
+    """The user's profile with defaults filled in, or None for an unknown user."""
+    cached = profile_cache.get(user_id)
+    if cached is not None:
+        return cached
 
+    # populate_existing: a User already loaded in this session may predate an update
+    user = await db.get(User, user_id, populate_existing=True)
+    if user is None:
+        return None
+    profile = {
+        "preferred_voice": user.preferred_voice or DEFAULT_PROFILE["preferred_voice"],
+        "baseline_tone": user.baseline_tone or DEFAULT_PROFILE["baseline_tone"]
+    }
+    profile_cache.set(user_id, profile)
+    return profile
+
+async def update_profile(db, user_id: int, preferred_voice=None, baseline_tone=None):
+    changes = {}
     if preferred_voice:
-        profile["preferred_voice"] = preferred_voice
+        changes["preferred_voice"] = preferred_voice
     if baseline_tone:
-        profile["baseline_tone"] = baseline_tone
+        changes["baseline_tone"] = baseline_tone
+
+    if changes:
+        # A single UPDATE, so concurrent edits to different fields don't overwrite each other
+        result = await db.execute(update(User).where(User.id == user_id).values(**changes))
+        await db.commit()
+        if result.rowcount == 0:
+            return None
+        profile_cache.pop(user_id)
 
-    with open(PROFILE_PATH, "w") as f:
-        json.dump(profile, f)
+    return await get_profile(db, user_id)
 
-    return profile
\ No newline at end of file
+async def resolve_voice(db, user_id: int | None, requested: str | None = None) -> str:
+    """Voice for a TTS request: an explicit choice, else the user's preference, else the default."""
+    if requested:
+        return requested
+    if user_id is not None:
+        profile = await get_profile(db, user_id)
+        if profile is not None:
+            return profile["preferred_voice"]
+    return DEFAULT_PROFILE["preferred_voice"]
@@ -1,11 +1,101 @@
-import whisper
-import tempfile
+import queue
+import threading
 
-model = whisper.load_model("base")
+import numpy as np
 
+from config import (
+    WHISPER_MODEL_NAME,
+    WHISPER_MAX_BATCH_SIZE,
+    WHISPER_MAX_WAIT_MS,
+    WHISPER_MAX_QUEUE,
+    WHISPER_WORKERS,
+    WHISPER_RETRY_AFTER_SECONDS,
+    MODEL_BACKEND,
+)
+from services.batching import MicroBatcher
+from services.audio_service import SAMPLE_RATE, decode_upload
+from services.metrics import timed
+from services.model_client import RemoteModel
+from services.model_registry import registry
+
+# Whisper decodes 30 s windows (whisper.audio.N_SAMPLES)
+N_SAMPLES = 30 * SAMPLE_RATE
+
+def _load_model():
+    # torch and whisper take seconds to import, so they wait until a model is needed
+    import whisper
+    return whisper.load_model(WHISPER_MODEL_NAME)
+
+def _warmup(model):
+    _decode(model, [np.zeros(SAMPLE_RATE, dtype=np.float32)])
+
+# One model per worker thread. The first is the registry's; extra instances are loaded on first use.
+_models = queue.Queue()
+_instances = 0
+_instances_lock = threading.Lock()
+
+def _checkout_model():
+    global _instances
+    try:
+        return _models.get_nowait()
+    except queue.Empty:
+        pass
+    with _instances_lock:
+        first = _instances == 0
+        _instances += 1
+    try:
+        return registry.get("whisper") if first else _load_model()
+    except Exception:
+        with _instances_lock:
+            _instances -= 1
+        raise
+
+def _decode(model, audios):
+    import torch
+    import whisper
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels)
+        for audio in audios
+    ]).to(model.device)
+    options = whisper.DecodingOptions(fp16=model.device.type == "cuda")
+    return [decoded.text for decoded in whisper.decode(model, mels, options)]
+
+def _transcribe_batch(audios):
+    worker_model = _checkout_model()
+    try:
+        results = [None] * len(audios)
+
+        # Clips that fit in one 30 s window are decoded together in a single forward pass
+        short = [i for i, audio in enumerate(audios) if len(audio) <= N_SAMPLES]
+        if short:
+            for i, text in zip(short, _decode(worker_model, [audios[i] for i in short])):
+                results[i] = text
+
+        # Longer clips need the sliding-window transcribe loop
+        for i, audio in enumerate(audios):
+            if results[i] is None:
+                results[i] = worker_model.transcribe(audio)["text"]
+        return results
+    finally:
+        _models.put(worker_model)
+
+if MODEL_BACKEND == "server":
+    # Decoding uploads stays here; the model and its batching live in model_server.py
+    engine = RemoteModel("whisper")
+    registry.register("whisper", engine.wait_ready)
+else:
+    engine = MicroBatcher(
+        _transcribe_batch,
+        max_batch_size=WHISPER_MAX_BATCH_SIZE,
+        max_wait_ms=WHISPER_MAX_WAIT_MS,
+        max_queue=WHISPER_MAX_QUEUE,
+        workers=WHISPER_WORKERS,
+        name="whisper",
+        retry_after=WHISPER_RETRY_AFTER_SECONDS,
+    )
+    registry.register("whisper", _load_model, warmup=_warmup)
+
+@timed("transcribe")
 async def transcribe_audio(file):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-        tmp.write(await file.read())
-        tmp_path = tmp.name
-    result = model.transcribe(tmp_path)
-    return result["text"]
\ No newline at end of file
+    audio = await decode_upload(file)
+    return await engine.submit(audio)
@@ -0,0 +1,73 @@
+import asyncio
+import io
+import sys
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from services import audio_service
+from services.audio_service import AudioDecodeError, AudioTooLargeError, decode_upload
+
+# Stands in for ffmpeg: passes "decoded" PCM through, or fails the way ffmpeg does on garbage
+FAKE_FFMPEG = """
+import sys
+data = sys.stdin.buffer.read()
+if data.startswith(b"BAD"):
+    sys.stderr.write("pipe:0: Invalid data found when processing input\\n")
+    sys.exit(1)
+sys.stdout.buffer.write(data)
+"""
+
+class Upload:
+    def __init__(self, data, size=None):
+        self._buffer = io.BytesIO(data)
+        self.size = size
+
+    async def read(self, n=-1):
+        return self._buffer.read(n)
+
+@pytest.fixture
+def fake_ffmpeg(monkeypatch):
+    calls = []
+    create = asyncio.create_subprocess_exec
+
+    async def spawn(*args, **kwargs):
+        calls.append(args)
+        return await create(sys.executable, "-c", FAKE_FFMPEG, **kwargs)
+
+    monkeypatch.setattr(audio_service.asyncio, "create_subprocess_exec", spawn)
+    monkeypatch.setattr(audio_service, "AUDIO_READ_CHUNK_BYTES", 1000)
+    return calls
+
+def test_decodes_piped_pcm_to_float32(fake_ffmpeg):
+    pcm = (np.arange(4000, dtype=np.int16) - 2000).astype("<i2").tobytes()
+    audio = asyncio.run(decode_upload(Upload(pcm)))
+    assert audio.dtype == np.float32 and len(audio) == 4000
+    assert audio[0] == pytest.approx(-2000 / 32768)
+    assert "pipe:0" in fake_ffmpeg[0] and "16000" in fake_ffmpeg[0]
+
+def test_declared_size_over_the_cap_is_rejected_before_decoding(fake_ffmpeg):
+    with pytest.raises(AudioTooLargeError):
+        asyncio.run(decode_upload(Upload(b"", size=101), max_bytes=100))
+    assert fake_ffmpeg == []
+
+def test_streamed_size_over_the_cap_stops_the_decoder(fake_ffmpeg):
+    with pytest.raises(AudioTooLargeError):
+        asyncio.run(decode_upload(Upload(b"x" * 5000), max_bytes=2500))
+
+def test_ffmpeg_failure_becomes_a_decode_error(fake_ffmpeg):
+    with pytest.raises(AudioDecodeError, match="Invalid data"):
+        asyncio.run(decode_upload(Upload(b"BAD" + b"x" * 100)))
+
+@pytest.mark.parametrize("error, status", [(AudioTooLargeError("too big"), 413), (AudioDecodeError("garbage"), 400)])
+def test_upload_errors_map_to_http_statuses(monkeypatch, error, status):
+    import main
+
+    async def failing(file):
+        raise error
+
+    monkeypatch.setattr(main, "transcribe_audio", failing)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(main.transcribe_upload(Upload(b"")))
+    assert raised.value.status_code == status
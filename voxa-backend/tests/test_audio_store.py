@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+
+from services.audio_store import AudioStore
+
+def test_put_shards_and_evicts_least_recently_used(tmp_path):
+    store = AudioStore(root=str(tmp_path), max_bytes=250, ttl=3600)
+
+    async def run():
+        first = await store.put("aaaa1111", b"x" * 100)
+        await store.put("bbbb2222", b"x" * 100)
+        store.lookup("aaaa1111")  # "bbbb2222" is now least recently used
+        await store.put("cccc3333", b"x" * 100)
+        return first
+
+    first = asyncio.run(run())
+    assert first.path == os.path.join(str(tmp_path), "aa", "aa", "aaaa1111.mp3")
+    assert list(store.entries) == ["aaaa1111", "cccc3333"]
+    assert store.total_bytes == 200
+    assert not os.path.exists(os.path.join(str(tmp_path), "bb", "bb", "bbbb2222.mp3"))
+
+def test_sweep_removes_expired_clips(tmp_path):
+    store = AudioStore(root=str(tmp_path), max_bytes=10_000, ttl=3600)
+
+    async def run():
+        entry = await store.put("dddd4444", b"x" * 10, ttl=1)
+        entry.expires_at = time.time() - 1
+        return await store.sweep()
+
+    assert asyncio.run(run()) == 1
+    assert len(store.entries) == 0
+
+def test_resolve_only_serves_indexed_paths(tmp_path):
+    store = AudioStore(root=str(tmp_path))
+    asyncio.run(store.put("eeee5555", b"x"))
+    assert store.resolve("ee/ee/eeee5555.mp3") is not None
+    assert store.resolve("eeee5555.mp3") is None
+    assert store.resolve("../ee/ee/eeee5555.mp3") is None
+
+def test_workers_sharing_a_directory_see_each_others_clips(tmp_path):
+    writer = AudioStore(root=str(tmp_path), max_bytes=10_000, ttl=3600)
+    reader = AudioStore(root=str(tmp_path), max_bytes=10_000, ttl=3600)
+
+    async def run():
+        await reader.sweep()  # the reader's index is loaded before the clip exists
+        await writer.put("ffff6666", b"x" * 10)
+        served = reader.resolve("ff/ff/ffff6666.mp3")
+
+        await writer.put("abcd7777", b"x" * 10)
+        writer.max_bytes = 10
+        await writer.sweep(keep="abcd7777")  # evicts ffff6666 from disk
+        await reader.sweep(rescan=True)
+        return served
+
+    served = asyncio.run(run())
+    assert served is not None and served.size == 10
+    assert list(reader.entries) == ["abcd7777"]
+    assert reader.resolve("ff/ff/ffff6666.mp3") is None
+    assert reader.resolve("zz/zz/zzzz.mp3") is None
+
+def test_scan_ignores_files_outside_the_sharded_layout(tmp_path):
+    legacy = tmp_path / "3f2b9c1e-8a7d-4e2f-9b1a-5c6d7e8f9a0b.mp3"
+    legacy.write_bytes(b"x" * 100)
+    misplaced = tmp_path / "ab" / "cd" / "ffff0000.mp3"
+    misplaced.parent.mkdir(parents=True)
+    misplaced.write_bytes(b"x" * 100)
+    store = AudioStore(root=str(tmp_path), max_bytes=0, ttl=0)
+
+    async def run():
+        await store.put("abcd1234", b"x" * 10)
+        return await store.sweep(rescan=True)
+
+    asyncio.run(run())
+    assert len(store) == 0 and store.total_bytes == 0
+    assert legacy.exists() and misplaced.exists()
+
+def test_clip_swept_after_resolve_is_a_404(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from routers import audio_router
+
+    store = AudioStore(root=str(tmp_path))
+    entry = asyncio.run(store.put("eeee5555", b"x" * 10))
+    monkeypatch.setattr(audio_router, "audio_store", store)
+    url = store.url_for(entry)
+    app = FastAPI()
+    app.include_router(audio_router.router)
+    client = TestClient(app)
+
+    assert client.get(url).status_code == 200
+    resolve = store.resolve
+
+    def resolve_then_sweep(path):
+        found = resolve(path)
+        os.remove(found.path)
+        return found
+
+    monkeypatch.setattr(store, "resolve", resolve_then_sweep)
+    assert client.get(url).status_code == 404
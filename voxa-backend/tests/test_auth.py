@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+import pytest
+from jose import JWTError, jwt
+
+from services import auth_service
+
+class FakeUser:
+    def __init__(self, password_hash):
+        self.password_hash = password_hash
+
+class FakeDB:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+def test_login_rehashes_when_cost_changes(monkeypatch):
+    monkeypatch.setattr(auth_service, "BCRYPT_ROUNDS", 4)
+    user = FakeUser(asyncio.run(auth_service.hash_password("secret")))
+    assert user.password_hash.startswith("$2b$04$")
+
+    monkeypatch.setattr(auth_service, "BCRYPT_ROUNDS", 5)
+    db = FakeDB()
+    assert not asyncio.run(auth_service.check_login(db, user, "wrong"))
+    assert asyncio.run(auth_service.check_login(db, user, "secret"))
+    assert user.password_hash.startswith("$2b$05$")
+    assert db.commits == 1
+
+def test_decoded_claims_are_cached_until_expiry():
+    token = auth_service.create_token(42)
+    assert auth_service.decode_token(token)["user_id"] == 42
+    hits = auth_service.token_cache.hits
+    assert auth_service.decode_token(token)["user_id"] == 42
+    assert auth_service.token_cache.hits == hits + 1
+
+    expired = jwt.encode({"user_id": 42, "exp": int(time.time()) - 1}, auth_service.SECRET_KEY, algorithm=auth_service.ALGORITHM)
+    with pytest.raises(JWTError):
+        auth_service.decode_token(expired)
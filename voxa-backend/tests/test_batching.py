@@ -0,0 +1,59 @@
+import asyncio
+import threading
+
+from services.batching import MicroBatcher, QueueFullError
+
+def test_concurrent_requests_share_a_batch():
+    batches = []
+
+    def process(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(4)))
+        await batcher.close()
+        return results
+
+    assert asyncio.run(run()) == [0, 2, 4, 6]
+    assert batches == [[0, 1, 2, 3]]
+
+def test_full_queue_rejects_new_work():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(timeout=5)
+        return items
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=1, max_wait_ms=0, max_queue=1)
+        first = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.05)  # "a" is now running on the only worker
+        second = asyncio.ensure_future(batcher.submit("b"))
+        await asyncio.sleep(0)
+        try:
+            await batcher.submit("c")
+            rejected = False
+        except QueueFullError:
+            rejected = True
+        release.set()
+        await asyncio.gather(first, second)
+        await batcher.close()
+        return rejected
+
+    assert asyncio.run(run())
+
+def test_item_errors_are_raised_to_their_caller_only():
+    def process(items):
+        return [ValueError(item) if item == "bad" else item for item in items]
+
+    async def run():
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=50)
+        results = await asyncio.gather(batcher.submit("ok"), batcher.submit("bad"), return_exceptions=True)
+        await batcher.close()
+        return results
+
+    ok, bad = asyncio.run(run())
+    assert ok == "ok"
+    assert isinstance(bad, ValueError)
@@ -0,0 +1,32 @@
+from bench.run import compare, percentile
+
+def result(rps, p50, p95, errors=0, rss=1.0):
+    return {"throughput_rps": rps, "p50_ms": p50, "p95_ms": p95, "p99_ms": p95, "errors": errors, "rss_growth_mb": rss}
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"endpoints": {"coach_me": result(400, 25, 180), "get_history": result(200, 80, 120)}}
+    current = {"endpoints": {
+        "coach_me": result(250, 26, 400, errors=2),
+        "get_history": result(190, 110, 150),  # within the absolute slack
+        "new_endpoint": result(1, 1, 1),
+    }}
+    regressions = compare(current, baseline, tolerance=0.2, slack_ms=50)
+    assert len(regressions) == 3
+    assert all(r.startswith("coach_me:") for r in regressions)
+
+def test_percentile_uses_nearest_rank():
+    values = sorted(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+    assert percentile([], 95) == 0.0
+
+def stage(users, rps, error_rate=0.0, p95=100.0):
+    return {"users": users, "throughput_rps": rps, "error_rate": error_rate,
+            "steps": {"respond": {"count": 10, "p95_ms": p95}}}
+
+def test_knee_is_where_extra_users_stop_adding_throughput():
+    from bench.loadgen import find_knee
+
+    assert find_knee([stage(1, 2), stage(4, 8), stage(16, 30)]) is None
+    assert find_knee([stage(1, 2), stage(4, 8), stage(16, 10)])["users"] == 16
+    assert find_knee([stage(1, 2), stage(4, 8, error_rate=0.05)])["users"] == 4
+    assert find_knee([stage(1, 2), stage(4, 8, p95=900)], slo_ms=500)["reason"].startswith("p95 over 500")
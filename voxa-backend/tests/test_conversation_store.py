@@ -0,0 +1,83 @@
+import asyncio
+import json
+import time
+
+import httpx
+
+from bench.stubs import stub_ollama_transport
+from services import conversation_store, llm_service
+from services.conversation_store import Conversation, ConversationStore
+
+def test_later_turns_send_only_the_new_line(monkeypatch):
+    sent = []
+    stub = stub_ollama_transport(latency_ms=0, token_ms=0)
+
+    async def handle(request):
+        sent.append(json.loads(request.content))
+        return await stub.handle_async_request(request)
+
+    client = httpx.AsyncClient(base_url="http://ollama", transport=httpx.MockTransport(handle))
+    monkeypatch.setattr(llm_service, "_client", client)
+    store = ConversationStore(maxsize=10, ttl=60)
+    monkeypatch.setattr(conversation_store, "conversations", store)
+
+    async def chat():
+        first = store.open(None, "u1", "coffee_shop", ["Hi there", "Welcome in!"])
+        await conversation_store.take_turn(first, "A latte please")
+        second = store.open(first.id, "u1", "coffee_shop")
+        async for _ in conversation_store.stream_turn(second, "Make it oat milk"):
+            pass
+        await client.aclose()
+        return first, second
+
+    first, second = asyncio.run(chat())
+
+    assert "Welcome in!" in sent[0]["prompt"] and "context" not in sent[0]
+    assert "A latte please" not in sent[1]["prompt"] and "Make it oat milk" in sent[1]["prompt"]
+    assert sent[1]["context"]
+    assert second is first and len(first.turns) == 3
+
+def test_budget_drops_context_and_oldest_turns():
+    conversation = Conversation("c1", "u1", "coffee_shop", turns=[("a" * 40, "b" * 40)] * 3)
+
+    dropped = conversation.record("hello", "hi", context=list(range(100)), budget=64)
+
+    assert conversation.context is None
+    assert dropped and len(conversation.turns) < 4
+    prompt, context = conversation.prompt_for("next")
+    assert context is None and "coffee shop" in prompt
+
+def test_idle_and_least_recently_used_conversations_are_evicted():
+    store = ConversationStore(maxsize=2, ttl=60)
+    a = store.open(None, "u", "s").id
+    b = store.open(None, "u", "s").id
+    store.get(a)
+    store.open(None, "u", "s")
+    assert store.get(b) is None and store.get(a) is not None
+
+    store.get(a).expires_at = time.monotonic() - 1
+    assert store.get(a) is None
+
+def test_only_the_owner_continues_a_server_minted_conversation():
+    store = ConversationStore(maxsize=10, ttl=60)
+    mine = store.open(None, "u1", "coffee_shop")
+
+    assert store.open(mine.id, "u1", "coffee_shop") is mine
+    assert store.open(mine.id, "u2", "coffee_shop").id != mine.id
+    assert store.open(mine.id, "u1", "job_interview").id != mine.id
+    chosen = store.open("1", "u1", "coffee_shop", ["Hi", "Hello!"])
+    assert chosen.id != "1" and chosen.turns == [("Hi", "Hello!")]
+    assert store.open("1", "u3", "coffee_shop").id not in (chosen.id, "1")
+
+def test_open_conversation_leaves_the_request_as_sent(monkeypatch):
+    from view import response_router
+
+    store = ConversationStore(maxsize=10, ttl=60)
+    monkeypatch.setattr(response_router, "conversations", store)
+    request = response_router.RespondInput(user_id="u1", transcript="Hi", scenario_id="coffee_shop",
+                                           conversation_id="chosen-by-client")
+
+    conversation = response_router.open_conversation(request)
+    assert conversation.id != "chosen-by-client" and request.conversation_id == "chosen-by-client"
+    again = request.model_copy(update={"conversation_id": conversation.id})
+    assert response_router.open_conversation(again) is conversation
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+import pytest
+
+from services import emotion_service
+from services.batching import MicroBatcher, QueueFullError
+from services.cache import LRUCache
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Swap the classifier for a fake that records each batch; "great" reads as positive."""
+    batches = []
+
+    def classify(texts):
+        batches.append(list(texts))
+        return [{"label": "POSITIVE" if "great" in text else "NEGATIVE", "score": 0.9} for text in texts]
+
+    monkeypatch.setattr(emotion_service, "sentiment_batcher", MicroBatcher(classify, max_batch_size=8, max_wait_ms=50))
+    monkeypatch.setattr(emotion_service, "emotion_cache", LRUCache(maxsize=64))
+    return batches
+
+def test_concurrent_calls_share_one_batch(batches):
+    async def run():
+        texts = ["I feel great.", "Sorry, I am late.", "Um, hello?"]
+        return await asyncio.gather(*(emotion_service.analyze_emotion(t) for t in texts))
+
+    results = asyncio.run(run())
+    assert batches == [["I feel great.", "Sorry, I am late.", "Um, hello?"]]
+    assert [r["tone"] for r in results] == ["confident", "nervous", "nervous"]
+
+def test_cache_hits_skip_the_pipeline(batches):
+    async def run():
+        first = await emotion_service.analyze_emotion("Thank you, that was great!")
+        again = await emotion_service.analyze_emotion("  thank YOU,   that was great! ")
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert batches == [["Thank you, that was great!"]]
+    assert first == again
+    assert emotion_service.emotion_cache.hits == 1
+
+def test_full_queue_raises_queue_full_error(monkeypatch):
+    release = threading.Event()
+
+    def classify(texts):
+        release.wait(timeout=5)
+        return [{"label": "POSITIVE", "score": 0.9} for _ in texts]
+
+    batcher = MicroBatcher(classify, max_batch_size=1, max_wait_ms=0, max_queue=1)
+    monkeypatch.setattr(emotion_service, "sentiment_batcher", batcher)
+    monkeypatch.setattr(emotion_service, "emotion_cache", LRUCache(maxsize=64))
+
+    async def run():
+        first = asyncio.ensure_future(emotion_service.analyze_emotion("first"))
+        await asyncio.sleep(0.05)  # "first" is now running on the only worker
+        second = asyncio.ensure_future(emotion_service.analyze_emotion("second"))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(QueueFullError):
+                await emotion_service.analyze_emotion("third")
+        finally:
+            release.set()
+            await asyncio.gather(first, second)
+            await batcher.close()
+
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from bench.stubs import StubLanguageTool
+from services import grammar_service
+from services.cache import LRUCache, SingleFlight
+from services.model_registry import ModelRegistry
+
+@pytest.fixture
+def checks(monkeypatch):
+    """Swap the grammar backend for a fake: sentences containing "slow" take 0.3 s, "has" gets flagged."""
+    calls = []
+
+    async def check_sentence(sentence):
+        calls.append(sentence)
+        await asyncio.sleep(0.3 if "slow" in sentence else 0.01)
+        return [f"Agreement: {sentence}"] if "has" in sentence else []
+
+    monkeypatch.setattr(grammar_service, "check_sentence", check_sentence)
+    monkeypatch.setattr(grammar_service, "sentence_cache", LRUCache(maxsize=64))
+    monkeypatch.setattr(grammar_service, "sentence_checks", SingleFlight())
+    return calls
+
+def test_pool_checks_sentences_with_stub_tools(monkeypatch):
+    registry = ModelRegistry(warmup_runs=0)
+    registry.register("grammar", lambda: StubLanguageTool(0), required=False)
+    monkeypatch.setattr(grammar_service, "registry", registry)
+    monkeypatch.setattr(grammar_service, "_start_tool", lambda: StubLanguageTool(0))
+    pool = grammar_service.GrammarToolPool(2)
+
+    async def run():
+        sentences = [f"Sentence number {i}." for i in range(12)]
+        return sentences, await asyncio.gather(*(pool.check(s) for s in sentences))
+
+    sentences, results = asyncio.run(run())
+    expected = [[m.message for m in StubLanguageTool(0).check(s)] for s in sentences]
+    assert results == expected and any(results) and not all(results)
+    assert pool._started <= 2
+
+def test_identical_sentences_are_checked_once_then_cached(checks):
+    async def run():
+        text = "I has a cat. It is black. I has a cat."
+        together = await asyncio.gather(*(grammar_service.analyze_grammar(text) for _ in range(3)))
+        again = await grammar_service.analyze_grammar(text)
+        return together, again
+
+    together, again = asyncio.run(run())
+    assert sorted(checks) == ["I has a cat.", "It is black."]
+    assert together[0] == together[1] == together[2] == again
+    assert again == ["Agreement: I has a cat.", "Agreement: I has a cat."]
+
+def test_timeout_returns_partial_feedback_and_fills_the_cache(checks):
+    async def run():
+        text = "He has a slow answer. She has a quick one."
+        partial = await grammar_service.analyze_grammar(text, timeout_ms=100)
+        await asyncio.sleep(0.4)  # the slow check keeps running in the background
+        complete = await grammar_service.analyze_grammar(text, timeout_ms=100)
+        return partial, complete
+
+    partial, complete = asyncio.run(run())
+    assert partial == ["Agreement: She has a quick one."]
+    assert complete == ["Agreement: He has a slow answer.", "Agreement: She has a quick one."]
+    assert len(checks) == 2
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from services import llm_service
+
+def use_transport(monkeypatch, handler):
+    requests = []
+
+    async def handle(request):
+        requests.append(json.loads(request.content))
+        return await handler(len(requests))
+
+    monkeypatch.setattr(llm_service, "LLM_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(llm_service, "_client", httpx.AsyncClient(
+        base_url="http://ollama", transport=httpx.MockTransport(handle)))
+    return requests
+
+def test_server_errors_are_retried(monkeypatch):
+    async def handler(attempt):
+        if attempt == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"response": " Hello! ", "done": True, "context": [1, 2]})
+
+    requests = use_transport(monkeypatch, handler)
+    assert asyncio.run(llm_service.generate("Hi", context=[7])) == ("Hello!", [1, 2])
+    assert len(requests) == 2 and requests[1]["context"] == [7]
+
+def test_client_errors_are_not_retried(monkeypatch):
+    async def handler(attempt):
+        return httpx.Response(400, json={"error": "bad model"})
+
+    requests = use_transport(monkeypatch, handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(llm_service.generate("Hi"))
+    assert len(requests) == 1
+
+def test_stream_is_not_retried_after_the_first_token(monkeypatch):
+    async def handler(attempt):
+        async def lines():
+            yield json.dumps({"response": "Hello", "done": False}).encode() + b"\n"
+            raise httpx.ReadError("connection reset")
+        return httpx.Response(200, content=lines())
+
+    requests = use_transport(monkeypatch, handler)
+    tokens = []
+
+    async def run():
+        async for token in llm_service.stream_generate("Hi"):
+            tokens.append(token)
+
+    with pytest.raises(httpx.ReadError):
+        asyncio.run(run())
+    assert tokens == ["Hello"] and len(requests) == 1
+
+def test_stream_is_retried_before_the_first_token(monkeypatch):
+    async def handler(attempt):
+        if attempt == 1:
+            raise httpx.ConnectError("refused")
+        body = [{"response": "Hi", "done": False}, {"response": "", "done": True, "context": [3]}]
+        return httpx.Response(200, content=b"".join(json.dumps(line).encode() + b"\n" for line in body))
+
+    requests = use_transport(monkeypatch, handler)
+    result = {}
+
+    async def run():
+        return [token async for token in llm_service.stream_generate("Hi", result=result)]
+
+    assert asyncio.run(run()) == ["Hi"]
+    assert result == {"context": [3]} and len(requests) == 2
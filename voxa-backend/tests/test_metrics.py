@@ -0,0 +1,68 @@
+import asyncio
+
+from prometheus_client import CollectorRegistry
+from prometheus_client.parser import text_string_to_metric_families
+
+from services import metrics
+from services.cache import LRUCache
+
+def scrape(registry=metrics.REGISTRY):
+    """{(sample name, ((label, value), ...)): value}, parsed back from the exposition text."""
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(metrics.render(registry))
+        for sample in family.samples
+    }
+
+def test_timed_records_stage_latency_and_errors():
+    @metrics.timed("test_stage")
+    async def work(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return "ok"
+
+    @metrics.timed("test_stream")
+    async def tokens():
+        for token in ("a", "b", "c"):
+            yield token
+
+    async def run():
+        assert await work() == "ok"
+        try:
+            await work(fail=True)
+        except ValueError:
+            pass
+        return [token async for token in tokens()]
+
+    assert asyncio.run(run()) == ["a", "b", "c"]
+
+    samples = scrape()
+    assert samples[("voxa_stage_duration_seconds_count", (("stage", "test_stage"),))] == 2
+    assert samples[("voxa_stage_duration_seconds_bucket", (("le", "+Inf"), ("stage", "test_stage")))] == 2
+    assert samples[("voxa_stage_errors_total", (("stage", "test_stage"),))] == 1
+    assert samples[("voxa_stage_duration_seconds_count", (("stage", "test_stream"),))] == 1
+
+def test_histogram_buckets_are_cumulative():
+    registry = CollectorRegistry()
+    histogram = metrics.Histogram("voxa_test_sizes", "Test.", ["batcher"], buckets=(1, 4), registry=registry)
+    for size in (1, 3, 3, 9):
+        histogram.labels("x").observe(size)
+    lines = metrics.render(registry).splitlines()
+    assert 'voxa_test_sizes_bucket{batcher="x",le="1.0"} 1.0' in lines
+    assert 'voxa_test_sizes_bucket{batcher="x",le="4.0"} 3.0' in lines
+    assert 'voxa_test_sizes_bucket{batcher="x",le="+Inf"} 4.0' in lines
+    assert 'voxa_test_sizes_sum{batcher="x"} 16.0' in lines
+
+def test_tracked_caches_and_queues_are_read_at_scrape_time():
+    cache = LRUCache(maxsize=4, name="test_cache")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    metrics.track_queue("test_queue", lambda: 7)
+
+    samples = scrape()
+    assert samples[("voxa_cache_hits_total", (("cache", "test_cache"),))] == 1
+    assert samples[("voxa_cache_misses_total", (("cache", "test_cache"),))] == 1
+    assert samples[("voxa_cache_hit_ratio", (("cache", "test_cache"),))] == 0.5
+    assert samples[("voxa_cache_entries", (("cache", "test_cache"),))] == 1
+    assert samples[("voxa_queue_depth", (("queue", "test_queue"),))] == 7
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+from services.model_registry import ModelRegistry
+
+def test_models_load_once_and_report_state():
+    registry = ModelRegistry(warmup_runs=2)
+    loads, warmups = [], []
+
+    def load():
+        loads.append(threading.get_ident())
+        return "model"
+
+    def broken():
+        raise RuntimeError("no weights")
+
+    registry.register("asr", load, warmup=warmups.append)
+    registry.register("grammar", broken, required=False)
+    assert registry.status()["asr"]["state"] == "pending"
+    assert not registry.ready
+
+    asyncio.run(registry.load_all())
+
+    status = registry.status()
+    assert status["asr"]["state"] == "ready"
+    assert status["grammar"]["state"] == "failed"
+    assert "no weights" in status["grammar"]["error"]
+    # An optional model failing doesn't hold back readiness
+    assert registry.ready
+    assert registry.get("asr") == "model"
+    assert len(loads) == 1 and warmups == ["model", "model"]
+
+def test_concurrent_first_use_shares_one_load():
+    registry = ModelRegistry(warmup_runs=0)
+    started = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    def slow_load():
+        loads.append(1)
+        started.set()
+        release.wait()
+        return object()
+
+    registry.register("asr", slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("asr"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.wait()
+    assert registry.status()["asr"]["state"] == "loading"
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert len({id(model) for model in results}) == 1
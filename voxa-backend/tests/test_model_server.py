@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+import model_server
+from services.batching import QueueFullError
+from services.model_client import RemoteModel, RemoteModelError
+
+def test_requests_round_trip_over_the_socket(tmp_path):
+    path = str(tmp_path / "models.sock")
+
+    async def transcribe(payload, body):
+        audio = np.frombuffer(body, dtype=np.float32)
+        await asyncio.sleep(0.05 if len(audio) > 1 else 0)  # longer clips finish later
+        return f"{len(audio)} samples"
+
+    async def classify(payload, body):
+        if payload == "busy":
+            raise QueueFullError("sentiment queue is full", retry_after=3)
+        if payload == "boom":
+            raise ValueError("bad input")
+        return {"label": "POSITIVE", "score": 0.9}
+
+    handlers = {"whisper": transcribe, "sentiment": classify}
+
+    async def run():
+        server = await asyncio.start_unix_server(
+            lambda r, w: model_server.serve_connection(r, w, handlers), path=path)
+        whisper, sentiment = RemoteModel("whisper", path), RemoteModel("sentiment", path)
+        try:
+            # Pipelined on one connection; the slow request doesn't hold up the fast one
+            slow = asyncio.ensure_future(whisper.submit(np.zeros(16000, dtype=np.float32)))
+            fast = await whisper.submit(np.zeros(1, dtype=np.float32))
+            assert not slow.done()
+            assert (fast, await slow) == ("1 samples", "16000 samples")
+
+            assert (await sentiment.submit("hello"))["label"] == "POSITIVE"
+            with pytest.raises(QueueFullError) as busy:
+                await sentiment.submit("busy")
+            assert busy.value.retry_after == 3
+            with pytest.raises(RemoteModelError, match="bad input"):
+                await sentiment.submit("boom")
+            with pytest.raises(RemoteModelError, match="not hosted"):
+                await RemoteModel("grammar", path).submit("Hi.")
+        finally:
+            server.close()
+
+    asyncio.run(run())
+
+def test_metrics_endpoint_serves_the_servers_batchers():
+    from services import metrics
+    metrics.batch_size.labels("whisper").observe(4)
+
+    server = model_server.serve_metrics(0)
+    try:
+        scrape = httpx.get(f"http://127.0.0.1:{server.server_port}/metrics")
+    finally:
+        server.shutdown()
+
+    assert scrape.status_code == 200 and scrape.headers["content-type"] == metrics.CONTENT_TYPE
+    assert 'voxa_batch_size_count{batcher="whisper"}' in scrape.text
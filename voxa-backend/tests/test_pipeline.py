@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+
+from services.pipeline import Pipeline, server_timing
+
+async def slow(value, delay=0.1):
+    await asyncio.sleep(delay)
+    return value
+
+def test_independent_stages_run_concurrently():
+    pipeline = (
+        Pipeline()
+        .add("a", lambda x: slow(x + 1))
+        .add("b", lambda x: slow(x + 2))
+        .add("sum", lambda x, a, b: a + b, "a", "b")
+    )
+
+    start = time.perf_counter()
+    results, timings = asyncio.run(pipeline.run(1))
+    elapsed = time.perf_counter() - start
+
+    assert results == {"a": 2, "b": 3, "sum": 5}
+    assert elapsed < 0.18  # ~0.1 s, not 0.2 s
+    assert set(timings) == {"a", "b", "sum"}
+
+def test_failing_stage_cancels_the_rest():
+    cancelled = []
+
+    async def sibling(x):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("sibling")
+            raise
+
+    async def boom(x):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("stage failed")
+
+    pipeline = Pipeline().add("sibling", sibling).add("boom", boom)
+
+    async def run():
+        with pytest.raises(RuntimeError, match="stage failed"):
+            await pipeline.run(0)
+        await asyncio.sleep(0.01)
+        # Checked here: asyncio.run would cancel a leftover task itself on the way out
+        assert cancelled == ["sibling"]
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    assert time.perf_counter() - start < 1
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="unknown stage 'a'"):
+        Pipeline().add("b", lambda x, a: a, "a")
+
+def test_server_timing_header():
+    assert server_timing({"emotion": 12.34, "total": 50}) == "emotion;dur=12.3, total;dur=50.0"
@@ -1,52 +1,58 @@
-from database import SessionLocal
+import asyncio
+from database import SessionLocal, engine, init_db
 from models.progress_model import UserProgress
 from datetime import datetime, timezone
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 
 def test_insert_progress():
-    db = SessionLocal()
+    asyncio.run(insert_progress())
 
-    # Clean slate
-    db.query(UserProgress).delete()
-    db.commit()
-
-    # Insert a record
-    entry = UserProgress(
-        user_id="test_user_001",
-        timestamp=datetime.now(timezone.utc),
-        transcript="Testing progress logging.",
-        feedback={"clarity": "good"},
-        metrics={"words_spoken": 5},
-        xp=100,
-        level=3
-    )
-    db.add(entry)
-    db.commit()
-
-    # Try inserting duplicate
-    duplicate = UserProgress(
-        user_id="test_user_001",
-        timestamp=datetime.now(timezone.utc),
-        transcript="Testing progress logging.",
-        feedback={"clarity": "good"},
-        metrics={"words_spoken": 5},
-        xp=100,
-        level=3
-    )
+async def insert_progress():
+    await init_db()
     try:
-        db.add(duplicate)
-        db.commit()
-        print("❌ Duplicate insert allowed — test failed.")
-    except IntegrityError:
-        db.rollback()
-        print("✅ Duplicate blocked — test passed.")
+        async with SessionLocal() as db:
+            # Clean slate
+            await db.execute(delete(UserProgress))
+            await db.commit()
+
+            # Insert a record
+            entry = UserProgress(
+                user_id="test_user_001",
+                timestamp=datetime.now(timezone.utc),
+                transcript="Testing progress logging.",
+                feedback={"clarity": "good"},
+                metrics={"words_spoken": 5},
+                xp=100,
+                level=3
+            )
+            db.add(entry)
+            await db.commit()
 
-    # Confirm record exists
-    records = db.query(UserProgress).filter_by(user_id="test_user_001").all()
-    assert len(records) == 1
-    print("✅ Record inserted and verified.")
+            # Try inserting duplicate
+            duplicate = UserProgress(
+                user_id="test_user_001",
+                timestamp=datetime.now(timezone.utc),
+                transcript="Testing progress logging.",
+                feedback={"clarity": "good"},
+                metrics={"words_spoken": 5},
+                xp=100,
+                level=3
+            )
+            try:
+                db.add(duplicate)
+                await db.commit()
+                print("❌ Duplicate insert allowed — test failed.")
+            except IntegrityError:
+                await db.rollback()
+                print("✅ Duplicate blocked — test passed.")
 
-    db.close()
+            # Confirm record exists
+            records = (await db.scalars(select(UserProgress).filter_by(user_id="test_user_001"))).all()
+            assert len(records) == 1
+            print("✅ Record inserted and verified.")
+    finally:
+        await engine.dispose()
 
 if __name__ == "__main__":
-    test_insert_progress()
\ No newline at end of file
+    test_insert_progress()
@@ -0,0 +1,85 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database import init_db, make_engine
+from models.progress import Progress
+from services import progress_service
+
+def test_log_session_keeps_progress_rollup_current(tmp_path, monkeypatch):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'voxa.db'}"
+    engine = make_engine(url)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(progress_service, "SessionLocal", sessions)
+
+    async def run():
+        await init_db(url)
+        try:
+            await progress_service.log_session("u1", "I would like a coffee please.", [], "confident")
+            await progress_service.log_session("u1", "Um.", ["Possible typo"], "nervous")
+            await progress_service.log_session("u2", "Hello.", [], "neutral")
+            await progress_service.session_writer.flush()
+            async with sessions() as db:
+                first_page = await progress_service.get_history(db, "u1", limit=1)
+                second_page = await progress_service.get_history(db, "u1", limit=1, cursor=first_page["next_cursor"])
+                return (
+                    await progress_service.get_progress(db, "u1"),
+                    await progress_service.get_progress(db, "nobody"),
+                    first_page,
+                    second_page,
+                )
+        finally:
+            await progress_service.session_writer.close()
+            await engine.dispose()
+
+    progress, empty, first_page, second_page = asyncio.run(run())
+    first = progress_service.score_session("I would like a coffee please.", [], "confident")
+    second = progress_service.score_session("Um.", ["Possible typo"], "nervous")
+
+    assert progress["total_sessions"] == 2
+    assert progress["xp"] == first["xp"] + second["xp"]
+    assert progress["level"] == 1 + progress["xp"] // 100
+    assert progress["streak"] == 1
+    assert progress["latest_scores"] == second
+    assert first["tone_score"] > progress["average_scores"]["tone_score"] > second["tone_score"]
+    assert empty["total_sessions"] == 0
+
+    assert [item["transcript"] for item in first_page["items"] + second_page["items"]] == ["Um.", "I would like a coffee please."]
+    assert second_page["next_cursor"] is None
+
+def test_rows_without_averages_read_as_none_until_the_next_session(tmp_path, monkeypatch):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'voxa.db'}"
+    engine = make_engine(url)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(progress_service, "SessionLocal", sessions)
+
+    async def run():
+        await init_db(url)
+        try:
+            async with sessions() as db:
+                # As migrated from before the rollup columns existed
+                db.add(Progress(user_id="u1", total_sessions=3, xp=120, level=2, last_active="2026-01-01"))
+                await db.commit()
+                before = await progress_service.get_progress(db, "u1")
+            await progress_service.log_session("u1", "I would like a coffee please.", [], "confident")
+            await progress_service.session_writer.flush()
+            async with sessions() as db:
+                return before, await progress_service.get_progress(db, "u1")
+        finally:
+            await progress_service.session_writer.close()
+            await engine.dispose()
+
+    before, after = asyncio.run(run())
+    scores = progress_service.score_session("I would like a coffee please.", [], "confident")
+
+    assert before["average_scores"] == {"grammar_score": None, "tone_score": None, "fluency_score": None}
+    assert after["total_sessions"] == 4 and after["xp"] == 120 + scores["xp"]
+    assert after["average_scores"] == {k: float(scores[k]) for k in ("grammar_score", "tone_score", "fluency_score")}
+
+def test_get_history_validates_like_the_router():
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+    for params in ({"limit": 0}, {"limit": progress_service.MAX_HISTORY_PAGE + 1}, {"cursor": "x" * 1000}):
+        assert client.get("/get_history", params={"user_id": "u1", **params}).status_code == 422
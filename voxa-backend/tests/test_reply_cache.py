@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from services import reply_cache
+from services.cache import LRUCache
+
+def test_identical_concurrent_replies_share_one_generation(monkeypatch):
+    calls = []
+
+    async def fake_generate(prompt, context=None):
+        calls.append(context)
+        await asyncio.sleep(0.05)
+        return "One cappuccino coming up!", [len(calls)]
+
+    monkeypatch.setattr(reply_cache, "generate", fake_generate)
+    monkeypatch.setattr(reply_cache, "reply_cache", LRUCache(maxsize=16, ttl=60))
+
+    async def turns():
+        keys = [reply_cache.reply_key("coffee_shop", ["Hi", "Welcome in!"], line)
+                for line in ("I'd like a cappuccino.", "i'd like a  Cappuccino")]
+        assert keys[0] == keys[1]
+        together = await asyncio.gather(*(reply_cache.generate_reply(key, "prompt", [i]) for i, key in enumerate(keys)))
+        later = await reply_cache.generate_reply(keys[0], "prompt", [7])
+        return together, later
+
+    together, later = asyncio.run(turns())
+
+    assert len(calls) == 1
+    # Only the caller whose generation ran gets its context tokens back
+    assert together == [("One cappuccino coming up!", [1]), ("One cappuccino coming up!", None)]
+    assert later == ("One cappuccino coming up!", None)
+
+def test_lru_cache_entries_expire_after_ttl():
+    cache = LRUCache(maxsize=4, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None and len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,77 @@
+import json
+import os
+
+from services import scenario_engine
+from services.scenario_engine import Automaton, ScenarioEngine
+
+SCENARIO_DIR = os.path.join(os.path.dirname(__file__), "..", "scenarios")
+
+def test_automaton_finds_overlapping_phrases():
+    automaton = Automaton([("he", 1), ("she", 2), ("hers", 3), ("his", 4)])
+    assert sorted(automaton.matches("ushers")) == [1, 2, 3]
+
+def test_coffee_shop_matches_the_old_if_chain():
+    engine = ScenarioEngine(SCENARIO_DIR)
+    engine.reload()
+
+    def old_chain(transcript):
+        transcript = transcript.lower()
+        if "cappuccino" in transcript:
+            return "Sure! Would you like that hot or iced?", 25
+        elif "hot" in transcript or "iced" in transcript:
+            return "Great. Any milk preference?", 50
+        elif "oat" in transcript or "almond" in transcript:
+            return "We’re out of oat milk — would almond work?", 75
+        return "Perfect! That’ll be $4.50. Anything else?", 100
+
+    lines = ["Hello!", "Could I get a Cappuccino?", "Iced, please.", "Oat milk", "A hot cappuccino",
+             "Nice photo", "Almond, iced", "No thanks.", "BOAT"]
+    for line in lines:
+        rule = engine.respond("coffee_shop", line, conversation_id="c1")
+        assert (rule.reply, rule.progress) == old_chain(line), line
+    assert engine.respond("job_interview", "Hello") is None
+
+def test_word_matching_walks_states(tmp_path):
+    spec = {"id": "order", "initial": "menu", "default": {"reply": "Anything else?", "progress": 100},
+            "rules": [{"triggers": ["hot"], "reply": "Milk?", "progress": 50, "next": "milk"}],
+            "states": {"menu": {"default": {"reply": "What can I get you?", "progress": 10}}, "milk": {}}}
+    (tmp_path / "order.json").write_text(json.dumps(spec))
+    engine = ScenarioEngine(str(tmp_path))
+
+    # "photo" contains "hot" but isn't the word
+    assert engine.respond("order", "Nice photo", conversation_id="c1").progress == 10
+    assert engine.respond("order", "Hot, please", conversation_id="c1").reply == "Milk?"
+    assert engine.respond("order", "Nice photo", conversation_id="c1").progress == 100
+    assert engine.respond("order", "Nice photo", history=["Hot please", "Milk?"]).progress == 100
+
+def test_reload_picks_up_changes_and_keeps_the_last_good_version(tmp_path):
+    path = tmp_path / "greeting.json"
+    spec = {"id": "greeting", "initial": "start", "default": {"reply": "Hm?"},
+            "rules": [{"triggers": ["hi"], "reply": "Hello!", "progress": 100}], "states": {"start": {}}}
+    path.write_text(json.dumps(spec))
+    engine = ScenarioEngine(str(tmp_path))
+    assert engine.reload()
+    assert engine.respond("greeting", "hi there").reply == "Hello!"
+
+    spec["rules"][0]["reply"] = "Hey!"
+    path.write_text(json.dumps(spec) + " ")
+    assert engine.reload()
+    assert engine.respond("greeting", "hi there").reply == "Hey!"
+
+    path.write_text("{ broken")
+    assert not engine.reload()
+    assert engine.respond("greeting", "hi there").reply == "Hey!"
+
+def test_scenarios_load_on_first_use_and_reload_after_the_interval(tmp_path, monkeypatch):
+    spec = {"id": "greeting", "initial": "start", "default": {"reply": "Hm?"}, "states": {"start": {}}}
+    path = tmp_path / "greeting.json"
+    path.write_text(json.dumps(spec))
+    monkeypatch.setattr(scenario_engine, "SCENARIO_RELOAD_INTERVAL_S", 60)
+    engine = ScenarioEngine(str(tmp_path))
+    assert engine.respond("greeting", "hi").reply == "Hm?"
+
+    spec["default"]["reply"] = "Hello?"
+    path.write_text(json.dumps(spec) + " ")
+    assert engine.respond("greeting", "hi").reply == "Hm?"
+    engine._checked_at -= 60
+    assert engine.respond("greeting", "hi").reply == "Hello?"
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from services import metrics
+from services.session_writer import SessionWriter
+
+def test_concurrent_writes_share_one_commit():
+    batches = []
+
+    async def write_batch(records):
+        batches.append(list(records))
+
+    writer = SessionWriter(write_batch, max_batch_size=100, max_wait_ms=20, durability="commit")
+
+    async def run():
+        await asyncio.gather(*[writer.write(i) for i in range(30)])
+        await writer.close()
+
+    asyncio.run(run())
+    assert batches == [list(range(30))]
+    assert writer.stats()["flushes"] == 1
+
+def test_buffered_writes_are_flushed_on_close():
+    written = []
+
+    async def write_batch(records):
+        written.extend(records)
+
+    writer = SessionWriter(write_batch, max_batch_size=4, max_wait_ms=1000)
+
+    async def run():
+        for i in range(10):
+            await writer.write(i)
+        assert writer.queue_depth > 0
+        await writer.close()
+
+    asyncio.run(run())
+    assert written == list(range(10))
+
+def test_commit_mode_surfaces_write_errors():
+    async def write_batch(records):
+        raise RuntimeError("disk full")
+
+    writer = SessionWriter(write_batch, max_wait_ms=1, durability="commit", retries=1, retry_backoff_ms=1)
+
+    async def run():
+        try:
+            with pytest.raises(RuntimeError):
+                await writer.write({"user_id": "u1"})
+        finally:
+            await writer.close()
+
+    asyncio.run(run())
+    assert writer.stats()["failed"] == 1
+
+def test_failed_batches_are_retried_then_counted_as_dropped():
+    attempts = []
+
+    async def write_batch(records):
+        attempts.append(list(records))
+        if len(attempts) < 3 or records[0] == "poison":
+            raise RuntimeError("database is locked")
+
+    writer = SessionWriter(write_batch, max_wait_ms=1, retries=2, retry_backoff_ms=1, name="test_writer")
+    def dropped():
+        return metrics.REGISTRY.get_sample_value("voxa_session_rows_dropped_total", {"writer": "test_writer"}) or 0
+
+    async def run():
+        await writer.write("a")
+        await writer.flush()
+        before = dropped()
+        await writer.write("poison")
+        await writer.close()
+        return dropped() - before
+
+    assert asyncio.run(run()) == 1
+    assert attempts == [["a"]] * 3 + [["poison"]] * 3
+    assert writer.stats()["written"] == 1 and writer.stats()["failed"] == 1
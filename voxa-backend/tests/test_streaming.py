@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from routers import stream_router
+from services.streaming_service import PcmDecoder, VadSegmenter, pcm16_to_float32
+
+def pcm(seconds, amplitude):
+    samples = int(16000 * seconds)
+    tone = amplitude * np.sin(2 * np.pi * 220 * np.arange(samples) / 16000)
+    return tone.astype("<i2").tobytes()
+
+def test_decoder_carries_odd_bytes_between_chunks():
+    data = pcm(0.1, 8000)
+    decoder = PcmDecoder()
+    parts = [decoder.decode(data[i:i + 333]) for i in range(0, len(data), 333)]
+    assert np.array_equal(np.concatenate(parts), pcm16_to_float32(data))
+
+@pytest.mark.parametrize("rate", [8000, 44100, 48000])
+def test_chunked_resampling_matches_resampling_the_whole_stream(rate):
+    samples = (8000 * np.sin(2 * np.pi * 220 * np.arange(rate // 2) / rate)).astype("<i2")
+    data = samples.tobytes()
+    decoder = PcmDecoder(rate)
+    chunked = np.concatenate([decoder.decode(data[i:i + 333]) for i in range(0, len(data), 333)])
+
+    source = pcm16_to_float32(data)
+    whole = np.interp(np.arange(len(chunked)) * rate / 16000, np.arange(len(source)), source)
+    assert abs(len(chunked) - len(source) * 16000 / rate) <= 1
+    assert np.allclose(chunked, whole, atol=1e-6)
+
+@pytest.mark.parametrize("rate", [0, -16000, 10**6])
+def test_decoder_rejects_bad_sample_rates(rate):
+    with pytest.raises(ValueError):
+        PcmDecoder(rate)
+
+def test_segmenter_emits_partials_then_one_final():
+    segmenter = VadSegmenter(partial_interval_ms=300)
+    audio = pcm16_to_float32(pcm(0.5, 0) + pcm(1.0, 8000) + pcm(0.8, 0))
+
+    events = segmenter.feed(audio) + segmenter.flush()
+
+    kinds = [kind for kind, _, _ in events]
+    assert "partial" in kinds and kinds.count("final") == 1
+    final = events[kinds.index("final")][2]
+    assert 1.0 <= len(final) / 16000 <= 1.9  # the speech plus pre-roll and trailing silence
+
+def test_segmenter_drops_blips_shorter_than_min_speech():
+    segmenter = VadSegmenter()
+    assert segmenter.feed(pcm16_to_float32(pcm(0.06, 8000) + pcm(0.8, 0))) == []
+
+
+class StubEngine:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    async def submit(self, audio):
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return f" {len(audio) // 1600} tenths of a second"
+
+def client_for(monkeypatch, engine):
+    monkeypatch.setattr(stream_router, "engine", engine)
+    app = FastAPI()
+    app.include_router(stream_router.router)
+    return TestClient(app)
+
+def stream(ws, data, chunk=999):
+    # An odd chunk size splits samples across frames
+    for i in range(0, len(data), chunk):
+        ws.send_bytes(data[i:i + chunk])
+    ws.send_text('{"type": "end"}')
+    events = []
+    while not events or events[-1]["type"] != "done":
+        events.append(ws.receive_json())
+    return events
+
+def test_endpoint_transcribes_odd_sized_frames(monkeypatch):
+    with client_for(monkeypatch, StubEngine()).websocket_connect("/ws/transcribe") as ws:
+        events = stream(ws, pcm(1.0, 8000) + pcm(0.8, 0))
+    finals = [e for e in events if e["type"] == "final"]
+    assert len(finals) == 1 and finals[0]["text"].endswith("tenths of a second")
+
+def test_engine_failure_becomes_an_error_event(monkeypatch):
+    with client_for(monkeypatch, StubEngine(fail=True)).websocket_connect("/ws/transcribe") as ws:
+        events = stream(ws, pcm(1.0, 8000) + pcm(0.8, 0))
+    assert {"type": "error", "segment": 0, "detail": "Transcription failed"} in events
+
+def test_malformed_text_frame_closes_with_1003(monkeypatch):
+    with client_for(monkeypatch, StubEngine()).websocket_connect("/ws/transcribe") as ws:
+        ws.send_text("{not json")
+        assert ws.receive_json()["type"] == "error"
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 1003
+
+@pytest.mark.parametrize("rate", ["0", "-8000", "1000000"])
+def test_endpoint_rejects_bad_sample_rates(monkeypatch, rate):
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client_for(monkeypatch, StubEngine()).websocket_connect(f"/ws/transcribe?sample_rate={rate}") as ws:
+            ws.receive_json()
+    assert closed.value.code == 1008
@@ -0,0 +1,18 @@
+from services.text_features import extract_features, extract_features_batch
+
+def test_single_pass_counts():
+    features = extract_features("Um, I really appreciate it. Thanks, you know? I feel great!")
+    assert features.word_count == 11
+    assert features.sentence_count == 3
+    assert features.filler_hits == 2  # "um", "you know"
+    assert features.empathy_hits == 3  # appreciate, thank(s), feel
+
+def test_fillers_only_match_whole_words():
+    features = extract_features("I also want soup, actually.")
+    assert features.filler_hits == 1  # "actually"; not "so" inside "also"/"soup"
+
+def test_batch_matches_single_extraction():
+    texts = ["Hello there.", "Sorry, um, I understand", ""]
+    batch = extract_features_batch(texts)
+    assert list(batch["word_count"]) == [extract_features(t).word_count for t in texts]
+    assert list(batch["empathy_hits"]) == [0, 2, 0]
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from services import tts_service
+from services.audio_store import AudioStore
+from services.tts_service import SILENT_MP3_FRAME, StubTTSBackend, TTSBackend
+
+class RecordingBackend(StubTTSBackend):
+    """Later sentences finish first, so ordering has to come from stream_tts itself."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def synthesize(self, text, voice):
+        self.calls.append(text)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.05 / len(self.calls))
+        self.running -= 1
+        return text.encode()
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_service, "audio_store", AudioStore(root=str(tmp_path)))
+    recording = RecordingBackend()
+    monkeypatch.setattr(tts_service, "backend", recording)
+    return recording
+
+def test_backend_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        TTSBackend()
+
+def test_cache_key_separates_voice_and_text():
+    assert tts_service.cache_key("Hi", "en-US-JennyNeural") != tts_service.cache_key("Hi", "en-GB-RyanNeural")
+    assert tts_service.cache_key("a\nb", "c") != tts_service.cache_key("b", "c\na")
+    assert tts_service.cache_key("Hi", "v") == tts_service.cache_key("Hi", "v")
+
+def test_stub_backend_returns_silent_frames():
+    data = asyncio.run(StubTTSBackend().synthesize("Hello there", "v"))
+    assert data.startswith(SILENT_MP3_FRAME) and len(data) % len(SILENT_MP3_FRAME) == 0
+
+def test_synthesize_cached_hits_the_store_after_the_first_call(backend):
+    async def run():
+        first = await tts_service.synthesize_cached("Hello  there.", "v")
+        again = await tts_service.synthesize_cached("Hello there.", "v")
+        together = await asyncio.gather(*(tts_service.synthesize_cached("Bye.", "v") for _ in range(3)))
+        return first, again, together
+
+    first, again, together = asyncio.run(run())
+    assert again.key == first.key
+    assert len({entry.key for entry in together}) == 1
+    assert backend.calls == ["Hello there.", "Bye."]
+    assert (tts_service.audio_store.hits, tts_service.audio_store.misses) == (1, 4)
+
+def test_stream_tts_yields_sentences_in_order(backend, monkeypatch):
+    monkeypatch.setattr(tts_service, "TTS_STREAM_CONCURRENCY", 2)
+
+    async def run():
+        return [chunk async for chunk in tts_service.stream_tts("One. Two. Three. Four.", "v")]
+
+    assert asyncio.run(run()) == [b"One.", b"Two.", b"Three.", b"Four."]
+    assert backend.max_running == 2
@@ -0,0 +1,85 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database import init_db, make_engine
+from models.user import User
+from services import user_profile_service
+
+def test_profile_is_cached_and_invalidated_on_update(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'voxa.db'}"
+    engine = make_engine(url)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    user_profile_service.profile_cache.clear()
+
+    async def run():
+        await init_db(url)
+        try:
+            async with sessions() as db:
+                user = User(name="Ana", email="ana@example.com")
+                db.add(user)
+                await db.commit()
+
+                before = await user_profile_service.get_profile(db, user.id)
+                hits = user_profile_service.profile_cache.hits
+                assert await user_profile_service.resolve_voice(db, user.id) == before["preferred_voice"]
+                assert user_profile_service.profile_cache.hits == hits + 1
+
+                after = await user_profile_service.update_profile(db, user.id, preferred_voice="en-GB-RyanNeural")
+                voice = await user_profile_service.resolve_voice(db, user.id)
+                missing = await user_profile_service.update_profile(db, user.id + 1, baseline_tone="calm")
+                return before, after, voice, missing
+        finally:
+            await engine.dispose()
+
+    before, after, voice, missing = asyncio.run(run())
+    assert before == user_profile_service.DEFAULT_PROFILE
+    assert after["preferred_voice"] == voice == "en-GB-RyanNeural"
+    assert after["baseline_tone"] == "neutral"
+    assert missing is None
+
+def test_cached_profiles_expire_after_the_ttl(monkeypatch):
+    from services.cache import LRUCache
+
+    cache = LRUCache(maxsize=8, ttl=60)
+    monkeypatch.setattr(user_profile_service, "profile_cache", cache)
+    cache.set(1, {"preferred_voice": "cached", "baseline_tone": "neutral"})
+
+    class Db:
+        async def get(self, model, user_id, populate_existing=False):
+            return User(id=user_id, preferred_voice="stored")
+
+    assert asyncio.run(user_profile_service.resolve_voice(Db(), 1)) == "cached"
+    expires_at, profile = cache._data[1]
+    cache._data[1] = (expires_at - 61, profile)
+    assert asyncio.run(user_profile_service.resolve_voice(Db(), 1)) == "stored"
+
+def test_old_profile_file_fills_in_users_without_a_preference(tmp_path, monkeypatch):
+    import merge_databases
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'voxa.db'}"
+    engine = make_engine(url)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(merge_databases, "SessionLocal", sessions)
+    path = tmp_path / "user_profile.json"
+    path.write_text('{"preferred_voice": "en-US-GuyNeural", "baseline_tone": "confident"}')
+
+    async def run():
+        await init_db(url)
+        try:
+            async with sessions() as db:
+                db.add_all([User(email="a@example.com"), User(email="b@example.com", preferred_voice="en-GB-RyanNeural")])
+                await db.commit()
+            counts = await merge_databases.import_profile(str(path))
+            again = await merge_databases.import_profile(str(path))
+            async with sessions() as db:
+                users = (await db.scalars(select(User).order_by(User.email))).all()
+                return counts, again, [(u.preferred_voice, u.baseline_tone) for u in users]
+        finally:
+            await engine.dispose()
+
+    counts, again, profiles = asyncio.run(run())
+    assert counts == {"preferred_voice": 1, "baseline_tone": 2}
+    assert again == {"preferred_voice": 0, "baseline_tone": 0}
+    assert profiles == [("en-US-GuyNeural", "confident"), ("en-GB-RyanNeural", "confident")]
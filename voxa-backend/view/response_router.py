@@ -1,12 +1,21 @@
-from fastapi import APIRouter
+import asyncio
+import json
+import time
+from fastapi import APIRouter, BackgroundTasks, Depends, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from services.llm_service import generate_dynamic_reply
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from routers.auth_router import optional_claims
+from services.conversation_store import conversations, take_turn, stream_turn
 from services.feedback_service import generate_feedback
-from services.progress_service import score_session, log_session, get_history
+from services.progress_service import score_session, log_session
 from services.grammar_service import analyze_grammar
 from services.emotion_service import analyze_emotion
 from services.metric_service import estimate_metrics
 from services.tts_service import generate_tts
+from services.user_profile_service import resolve_voice
+from services.pipeline import Pipeline, server_timing
 
 router = APIRouter()
 
@@ -14,40 +23,24 @@ class RespondInput(BaseModel):
     user_id: str
     transcript: str
     scenario_id: str
-    conversation_history: list[str]
-    voice: str = "en-US-JennyNeural"
+    # Returned by the first turn; later turns send it back instead of the whole history
+    conversation_id: str | None = None
+    # Only read when the server doesn't know the conversation (first turn, expired, another worker)
+    conversation_history: list[str] = []
+    voice: str | None = None  # defaults to the signed-in user's preferred voice
 
-@router.post("/respond_to_user")
-async def respond_to_user(input: RespondInput):
-    emotion_result = analyze_emotion(input.transcript)
-    tone = emotion_result.get("tone", "neutral")
-    grammar_feedback = analyze_grammar(input.transcript)
-
-    reply = generate_dynamic_reply(
-        transcript=input.transcript,
-        scenario_id=input.scenario_id,
-        history=input.conversation_history
-    )
-
-    scores = score_session(input.transcript, grammar_feedback, tone)
-
-    feedback = generate_feedback(
+def build_feedback(input, emotion_result, grammar_feedback, scores):
+    return generate_feedback(
         input.transcript,
         grammar_feedback,
-        tone,
+        emotion_result.get("tone", "neutral"),
         {**scores, **emotion_result}
     )
 
-    await log_session(
-        user_id=input.user_id,
-        transcript=input.transcript,
-        grammar_feedback=grammar_feedback,
-        tone=feedback.get("tone", "neutral")
-    )
-
+def build_metrics(input, emotion_result, grammar_feedback, scores):
     metrics = estimate_metrics(input.transcript)
     metrics.update({
-        "tone": tone,
+        "tone": emotion_result.get("tone", "neutral"),
         "empathy": emotion_result.get("empathy", 0.5),
         "pacing": emotion_result.get("pacing", "moderate"),
         "clarity": emotion_result.get("clarity", "medium"),
@@ -58,17 +51,108 @@ async def respond_to_user(input: RespondInput):
         ),
         "xp": scores["xp"]
     })
+    return metrics
+
+# Emotion and grammar run concurrently; scoring, feedback and metrics follow once both are in
+analysis_pipeline = (
+    Pipeline()
+    .add("emotion", lambda input: analyze_emotion(input.transcript))
+    .add("grammar", lambda input: analyze_grammar(input.transcript))
+    .add("scores", lambda input, emotion_result, grammar_feedback: score_session(
+        input.transcript, grammar_feedback, emotion_result.get("tone", "neutral")
+    ), "emotion", "grammar")
+    .add("feedback", build_feedback, "emotion", "grammar", "scores")
+    .add("metrics", build_metrics, "emotion", "grammar", "scores")
+)
 
-    audio_file = await generate_tts(reply, voice=input.voice)
+def open_conversation(input: RespondInput):
+    # Unknown, foreign or other-scenario ids start a new conversation under an id the server mints
+    return conversations.open(input.conversation_id, input.user_id, input.scenario_id, input.conversation_history)
 
+# The LLM reply runs alongside the analysis, and TTS starts as soon as the reply is ready
+turn_pipeline = (
+    analysis_pipeline.copy()
+    .add("conversation", open_conversation)
+    .add("reply", lambda input, conversation: take_turn(conversation, input.transcript), "conversation")
+    .add("tts", lambda input, reply: generate_tts(reply, voice=input.voice), "reply")
+)
+
+def log_turn(background_tasks: BackgroundTasks, input: RespondInput, results: dict):
+    background_tasks.add_task(
+        log_session,
+        user_id=input.user_id,
+        transcript=input.transcript,
+        grammar_feedback=results["grammar"],
+        tone=results["emotion"].get("tone", "neutral"),
+        scores=results["scores"]
+    )
+
+def analysis_payload(results: dict):
     return {
-        "reply": reply,
-        "tone": tone,
-        "feedback": feedback,
-        "metrics": metrics,
-        "audio_file": audio_file
+        "tone": results["emotion"].get("tone", "neutral"),
+        "feedback": results["feedback"],
+        "metrics": results["metrics"]
     }
 
-@router.get("/user_progress")
-async def get_user_progress():
-    return await get_history()
\ No newline at end of file
+@router.post("/respond_to_user")
+async def respond_to_user(input: RespondInput, response: Response, background_tasks: BackgroundTasks,
+                          db: AsyncSession = Depends(get_db), claims: dict | None = Depends(optional_claims)):
+    start = time.perf_counter()
+    input.voice = await resolve_voice(db, claims and claims["user_id"], input.voice)
+    results, timings = await turn_pipeline.run(input)
+    timings["total"] = (time.perf_counter() - start) * 1000
+    response.headers["Server-Timing"] = server_timing(timings)
+
+    # Persisting the turn doesn't affect the reply, so it runs after the response is sent
+    log_turn(background_tasks, input, results)
+
+    return {
+        "reply": results["reply"],
+        **analysis_payload(results),
+        "audio_file": results["tts"],
+        "conversation_id": results["conversation"].id
+    }
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/respond_to_user/stream")
+async def respond_to_user_stream(input: RespondInput, background_tasks: BackgroundTasks,
+                                 db: AsyncSession = Depends(get_db), claims: dict | None = Depends(optional_claims)):
+    """Server-sent events: `token` events as the reply is generated, then one `done`
+    event carrying the same payload /respond_to_user returns."""
+    input.voice = await resolve_voice(db, claims and claims["user_id"], input.voice)
+    conversation = open_conversation(input)
+
+    async def events():
+        analysis = asyncio.create_task(analysis_pipeline.run(input))
+        try:
+            tokens = []
+            async for token in stream_turn(conversation, input.transcript):
+                if not tokens:
+                    token = token.lstrip()
+                    if not token:
+                        continue
+                tokens.append(token)
+                yield sse_event("token", {"text": token})
+
+            reply = "".join(tokens).strip()
+            audio_file = await generate_tts(reply, voice=input.voice)
+            results, _ = await analysis
+            log_turn(background_tasks, input, results)
+            yield sse_event("done", {
+                "reply": reply,
+                **analysis_payload(results),
+                "audio_file": audio_file,
+                "conversation_id": conversation.id
+            })
+        finally:
+            if not analysis.done():
+                analysis.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+        background=background_tasks,
+    )
@@ -15,6 +15,8 @@ export default function ChatLoop() {
   const [audioUrl, setAudioUrl] = useState(null);
   const [voice, setVoice] = useState("en-US-JennyNeural");
   const [scenarioId, setScenarioId] = useState("interview_coach");
+  // Lets the backend continue the conversation it already holds; history is only a fallback
+  const [conversationId, setConversationId] = useState(null);
 
   const startRecording = async () => {
     await recorder.start();
@@ -40,8 +42,10 @@ export default function ChatLoop() {
         transcript,
         scenario_id: scenarioId,
         conversation_history,
+        conversation_id: conversationId,
         voice,
       });
+      setConversationId(responseData.conversation_id);
 
       setChatHistory(prev => [
         ...prev,
@@ -73,7 +77,7 @@ export default function ChatLoop() {
       {/* Scenario Selector */}
       <div className="flex gap-2 items-center">
         <label>Scenario:</label>
-        <select value={scenarioId} onChange={e => setScenarioId(e.target.value)}>
+        <select value={scenarioId} onChange={e => { setScenarioId(e.target.value); setConversationId(null); }}>
           <option value="interview_coach">Interview Coach</option>
           <option value="restaurant">Restaurant Roleplay</option>
           <option value="doctor_visit">Doctor Visit</option>